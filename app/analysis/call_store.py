@@ -0,0 +1,378 @@
+"""Indexed SQLite store for call transcripts, reports and findings.
+
+Each call gets one row in `calls`, one row per turn in `turns`, one row per
+report in `reports` and one row per finding in `findings`. The finding and
+call rows are indexed by scenario, run, severity and type, so questions
+across runs are a single query instead of a scan over JSON files.
+
+Writes are queued and applied by a background thread in batches, one
+transaction per batch, so callers on the event loop never touch the disk.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+
+from app import config
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS calls (
+    call_id TEXT PRIMARY KEY,
+    scenario_id TEXT NOT NULL,
+    run_id TEXT,
+    started_at REAL,
+    duration_seconds REAL,
+    turn_count INTEGER,
+    transcript_path TEXT,
+    meta TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS calls_scenario ON calls (scenario_id, started_at);
+CREATE INDEX IF NOT EXISTS calls_run ON calls (run_id);
+
+CREATE TABLE IF NOT EXISTS turns (
+    call_id TEXT NOT NULL,
+    turn_index INTEGER NOT NULL,
+    speaker TEXT NOT NULL,
+    text TEXT NOT NULL,
+    timestamp REAL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (call_id, turn_index)
+);
+
+CREATE TABLE IF NOT EXISTS reports (
+    report_id TEXT PRIMARY KEY,
+    call_id TEXT,
+    scenario_id TEXT NOT NULL,
+    run_id TEXT,
+    generated_at REAL,
+    total_bugs INTEGER,
+    critical INTEGER,
+    high INTEGER,
+    report_path TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reports_call ON reports (call_id);
+CREATE INDEX IF NOT EXISTS reports_scenario ON reports (scenario_id, generated_at);
+CREATE INDEX IF NOT EXISTS reports_run ON reports (run_id);
+
+CREATE TABLE IF NOT EXISTS findings (
+    report_id TEXT NOT NULL,
+    finding_index INTEGER NOT NULL,
+    call_id TEXT,
+    scenario_id TEXT NOT NULL,
+    run_id TEXT,
+    generated_at REAL,
+    severity TEXT,
+    type TEXT,
+    source TEXT,
+    turn_index INTEGER,
+    reason TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (report_id, finding_index)
+);
+CREATE INDEX IF NOT EXISTS findings_scenario ON findings (scenario_id, generated_at);
+CREATE INDEX IF NOT EXISTS findings_run ON findings (run_id);
+CREATE INDEX IF NOT EXISTS findings_severity ON findings (severity, generated_at);
+CREATE INDEX IF NOT EXISTS findings_type ON findings (type, generated_at);
+"""
+
+
+def new_call_id(scenario_id: str) -> str:
+    """Unique, sortable id for a call; also used for its file names."""
+    return f"{scenario_id}_{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+
+
+def _parse_generated_at(value) -> float | None:
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return time.mktime(time.strptime(value, "%Y-%m-%d %H:%M:%S"))
+    except (TypeError, ValueError):
+        return None
+
+
+def write_json(path: str, data: dict):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, default=str)
+
+
+def insert_transcript(db: sqlite3.Connection, transcript: dict, path: str | None = None):
+    """Insert or replace a transcript's call row and turn rows."""
+    call_id = transcript["call_id"]
+    meta = {k: v for k, v in transcript.items() if k != "turns"}
+    db.execute("DELETE FROM turns WHERE call_id = ?", (call_id,))
+    db.execute(
+        "INSERT INTO calls (call_id, scenario_id, run_id, started_at, duration_seconds, "
+        "turn_count, transcript_path, meta) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT(call_id) DO UPDATE SET scenario_id = excluded.scenario_id, "
+        "run_id = COALESCE(excluded.run_id, calls.run_id), started_at = excluded.started_at, "
+        "duration_seconds = excluded.duration_seconds, turn_count = excluded.turn_count, "
+        "transcript_path = COALESCE(excluded.transcript_path, calls.transcript_path), "
+        "meta = excluded.meta",
+        (
+            call_id,
+            transcript["scenario_id"],
+            transcript.get("run_id"),
+            transcript.get("started_at"),
+            transcript.get("duration_seconds"),
+            transcript.get("turn_count", len(transcript.get("turns", []))),
+            path,
+            json.dumps(meta, default=str),
+        ),
+    )
+    db.executemany(
+        "INSERT INTO turns (call_id, turn_index, speaker, text, timestamp, data) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            (call_id, i, t["speaker"], t["text"], t.get("timestamp"), json.dumps(t, default=str))
+            for i, t in enumerate(transcript.get("turns", []))
+        ],
+    )
+
+
+def insert_report(db: sqlite3.Connection, report: dict, path: str | None = None):
+    """Insert or replace a report row and its finding rows."""
+    report_id = report["report_id"]
+    call_id = report.get("call_id")
+    run_id = report.get("run_id")
+    generated_at = _parse_generated_at(report.get("generated_at"))
+    summary = report.get("summary", {})
+    findings = report.get("findings", [])
+
+    db.execute("DELETE FROM findings WHERE report_id = ?", (report_id,))
+    db.execute(
+        "INSERT OR REPLACE INTO reports (report_id, call_id, scenario_id, run_id, generated_at, "
+        "total_bugs, critical, high, report_path, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            report_id, call_id, report["scenario_id"], run_id, generated_at,
+            summary.get("total_bugs", len(findings)), summary.get("critical", 0),
+            summary.get("high", 0), path, json.dumps(report, default=str),
+        ),
+    )
+    db.executemany(
+        "INSERT INTO findings (report_id, finding_index, call_id, scenario_id, run_id, "
+        "generated_at, severity, type, source, turn_index, reason, data) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            (
+                report_id, i, call_id, report["scenario_id"], run_id, generated_at,
+                f.get("severity"), f.get("type"), f.get("source", "rules"),
+                f.get("turn_index") if isinstance(f.get("turn_index"), int) else None,
+                f.get("reason"), json.dumps(f, default=str),
+            )
+            for i, f in enumerate(findings)
+        ],
+    )
+    if call_id and run_id:
+        db.execute(
+            "UPDATE calls SET run_id = ? WHERE call_id = ? AND run_id IS NULL", (run_id, call_id)
+        )
+
+
+class CallStore:
+    """SQLite call store with a batching background writer."""
+
+    def __init__(self, path: str, flush_interval_s: float = 0.2):
+        self.path = path
+        self.flush_interval_s = flush_interval_s
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self.connect() as db:
+            db.executescript(SCHEMA)
+
+    def connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=30)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.row_factory = sqlite3.Row
+        return db
+
+    # Writes
+
+    def save_transcript(self, transcript: dict, path: str | None = None):
+        """Queue a transcript (and its JSON file, if `path` is given) for writing."""
+        self._submit(("transcript", transcript, path))
+
+    def save_report(self, report: dict, path: str | None = None):
+        """Queue a report (and its JSON file, if `path` is given) for writing."""
+        self._submit(("report", report, path))
+
+    def _submit(self, item: tuple):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._writer, name="call-store-writer", daemon=True
+                )
+                self._thread.start()
+        self._queue.put(item)
+
+    def _writer(self):
+        db = self.connect()
+        while True:
+            batch = [self._queue.get()]
+            time.sleep(self.flush_interval_s)
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = False
+            try:
+                with db:
+                    for item in batch:
+                        if item is None:
+                            stop = True
+                            continue
+                        kind, data, path = item
+                        if path:
+                            write_json(path, data)
+                        if kind == "transcript":
+                            insert_transcript(db, data, path)
+                        else:
+                            insert_report(db, data, path)
+                logger.debug("Call store wrote %d items", len(batch))
+            except Exception as e:
+                logger.error("Call store write failed (%d items): %s", len(batch), e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                db.close()
+                return
+
+    def flush(self):
+        """Block until every queued write has been applied."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._thread = None
+
+    # Queries
+
+    def findings(
+        self,
+        scenario: str | None = None,
+        run: str | None = None,
+        severity: str | None = None,
+        finding_type: str | None = None,
+        since: float | None = None,
+        until: float | None = None,
+        limit: int | None = None,
+    ) -> list[dict]:
+        """Findings matching every given filter, newest first."""
+        where, params = [], []
+        for column, value in (
+            ("scenario_id", scenario), ("run_id", run),
+            ("severity", severity), ("type", finding_type),
+        ):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            where.append("generated_at >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("generated_at < ?")
+            params.append(until)
+
+        sql = "SELECT * FROM findings"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY generated_at DESC, report_id, finding_index"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self.connect() as db:
+            rows = db.execute(sql, params).fetchall()
+        return [{k: row[k] for k in row.keys() if k != "data"} for row in rows]
+
+    def calls(
+        self,
+        scenario: str | None = None,
+        run: str | None = None,
+        since: float | None = None,
+        limit: int | None = None,
+    ) -> list[dict]:
+        """Calls with their latest report's bug counts, newest first."""
+        where, params = [], []
+        if scenario is not None:
+            where.append("c.scenario_id = ?")
+            params.append(scenario)
+        if run is not None:
+            where.append("c.run_id = ?")
+            params.append(run)
+        if since is not None:
+            where.append("c.started_at >= ?")
+            params.append(since)
+
+        sql = (
+            "SELECT c.call_id, c.scenario_id, c.run_id, c.started_at, c.duration_seconds, "
+            "c.turn_count, c.transcript_path, r.total_bugs, r.critical, r.high "
+            "FROM calls c LEFT JOIN reports r ON r.report_id = ("
+            "SELECT report_id FROM reports WHERE call_id = c.call_id "
+            "ORDER BY generated_at DESC LIMIT 1)"
+        )
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY c.started_at DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self.connect() as db:
+            return [dict(row) for row in db.execute(sql, params).fetchall()]
+
+    def transcript(self, call_id: str) -> dict | None:
+        """Rebuild a stored transcript from its call and turn rows."""
+        with self.connect() as db:
+            row = db.execute("SELECT meta FROM calls WHERE call_id = ?", (call_id,)).fetchone()
+            if row is None:
+                return None
+            turns = db.execute(
+                "SELECT data FROM turns WHERE call_id = ? ORDER BY turn_index", (call_id,)
+            ).fetchall()
+        transcript = json.loads(row["meta"])
+        transcript["turns"] = [json.loads(t["data"]) for t in turns]
+        return transcript
+
+    def counts(self, since: float | None = None) -> dict:
+        """Finding counts grouped by scenario, severity and type."""
+        clause, params = ("WHERE generated_at >= ?", [since]) if since is not None else ("", [])
+        result = {}
+        with self.connect() as db:
+            for column in ("scenario_id", "severity", "type"):
+                rows = db.execute(
+                    f"SELECT {column}, COUNT(*) FROM findings {clause} "
+                    f"GROUP BY {column} ORDER BY COUNT(*) DESC",
+                    params,
+                ).fetchall()
+                result[column] = {r[0]: r[1] for r in rows}
+            result["calls"] = db.execute("SELECT COUNT(*) FROM calls").fetchone()[0]
+            result["reports"] = db.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+        return result
+
+
+_call_store: CallStore | None = None
+_call_store_pid: int | None = None
+
+
+def get_call_store() -> CallStore:
+    """Return the process-wide call store, flushed at interpreter exit."""
+    global _call_store, _call_store_pid
+    # SQLite connections and writer threads do not survive a fork
+    if _call_store is None or _call_store_pid != os.getpid():
+        _call_store_pid = os.getpid()
+        _call_store = CallStore(config.CALL_STORE_PATH)
+        atexit.register(_call_store.close)
+    return _call_store
@@ -0,0 +1,268 @@
+import bisect
+import threading
+
+# Pipeline stages as (name, start mark, end mark). Marks are time.monotonic()
+# values recorded per turn by the media stream handler. "response" is our
+# compute latency up to the first frame of the answer; "perceived" ends at
+# the first frame of any audio, which is a filler clip when one was played.
+# Synthesis is not streamed, so "tts" ends when the whole reply is rendered
+# and "send" covers queueing up to the first answer frame going out.
+STAGES = [
+    ("vad_to_stt", "speech_end", "stt_start"),
+    ("stt", "stt_start", "stt_end"),
+    ("llm_first_token", "llm_request", "llm_first_token"),
+    ("llm", "llm_request", "llm_end"),
+    ("tts", "llm_end", "tts_done"),
+    ("send", "tts_done", "first_frame_sent"),
+    ("response", "speech_end", "first_frame_sent"),
+    ("perceived", "speech_end", "first_audio_sent"),
+]
+
+# Histogram bucket upper bounds in milliseconds
+BUCKETS_MS = [
+    10, 25, 50, 100, 250, 500, 750, 1000, 1500, 2000,
+    3000, 5000, 7500, 10000, 15000, 30000,
+]
+
+
+def stage_durations(timings: dict) -> dict:
+    """Return per-stage durations in ms for the marks present in a turn's timings."""
+    durations = {}
+    for name, start, end in STAGES:
+        if start in timings and end in timings:
+            durations[name] = round((timings[end] - timings[start]) * 1000, 1)
+    return durations
+
+
+def has_media_clock(turn: dict) -> bool:
+    return "onset_ms" in turn or "playout_start_ms" in turn
+
+
+def response_gap_s(prev_turn: dict, turn: dict) -> float | None:
+    """Seconds between the end of one turn and the start of the next.
+
+    Turns recorded with media-stream times measure from the end of the
+    previous speaker's audio to the onset of this speaker's audio. An agent
+    turn is measured from the end of our playout, and a patient turn from the
+    end of the agent's speech. None if the needed marks are missing. Older
+    transcripts fall back to the wall-clock difference of the turn
+    timestamps, which also includes our own STT and LLM time.
+    """
+    if has_media_clock(turn) or has_media_clock(prev_turn):
+        if turn["speaker"] == "agent":
+            start, end = turn.get("onset_ms"), prev_turn.get("playout_end_ms")
+        else:
+            start, end = turn.get("playout_start_ms"), prev_turn.get("offset_ms")
+        if start is None or end is None:
+            return None
+        return (start - end) / 1000
+    return turn["timestamp"] - prev_turn["timestamp"]
+
+
+def response_gap_summary(turns: list[dict]) -> dict:
+    """Agent and patient (our) response gaps for a call on the media clock."""
+    gaps: dict[str, list[float]] = {"agent": [], "patient": []}
+    for prev_turn, turn in zip(turns, turns[1:]):
+        if prev_turn["speaker"] == turn["speaker"] or not has_media_clock(turn):
+            continue
+        gap = response_gap_s(prev_turn, turn)
+        if gap is not None:
+            gaps[turn["speaker"]].append(gap * 1000)
+
+    summary = {}
+    for speaker, values in gaps.items():
+        values.sort()
+        summary[speaker] = {
+            "count": len(values),
+            "mean_ms": round(sum(values) / len(values), 1) if values else None,
+            "p50_ms": round(values[len(values) // 2], 1) if values else None,
+            "max_ms": round(values[-1], 1) if values else None,
+        }
+    return summary
+
+
+def patient_latency_summary(turns: list[dict]) -> dict:
+    """Our compute vs perceived response latency per call, and how often fillers played."""
+    compute, perceived = [], []
+    fillers = 0
+    for turn in turns:
+        latency = turn.get("latency_ms") or {}
+        if turn["speaker"] != "patient" or "response" not in latency:
+            continue
+        compute.append(latency["response"])
+        perceived.append(latency.get("perceived", latency["response"]))
+        fillers += "filler" in turn
+
+    summary = {"turns": len(compute), "filler_turns": fillers}
+    for name, values in (("compute", compute), ("perceived", perceived)):
+        values.sort()
+        summary[name] = {
+            "mean_ms": round(sum(values) / len(values), 1) if values else None,
+            "p50_ms": round(values[len(values) // 2], 1) if values else None,
+            "max_ms": round(values[-1], 1) if values else None,
+        }
+    return summary
+
+
+def stt_tier_summary(turns: list[dict]) -> dict:
+    """How often the STT cascade escalated, why, and the decode time per tier."""
+    tier_ms: dict[str, list[float]] = {}
+    reasons: dict[str, int] = {}
+    models: dict[str, str] = {}
+    count = 0
+    for turn in turns:
+        stt = turn.get("stt")
+        if turn["speaker"] != "agent" or not stt:
+            continue
+        count += 1
+        models.update(stt["models"])
+        if stt["escalated"]:
+            reasons[stt["escalated"]] = reasons.get(stt["escalated"], 0) + 1
+        for tier, ms in stt["tier_ms"].items():
+            tier_ms.setdefault(tier, []).append(ms)
+
+    escalated = sum(reasons.values())
+    summary = {
+        "cascade": "fast" in models,
+        "turns": count,
+        "escalated": escalated,
+        "escalation_rate": round(escalated / count, 3) if count else None,
+        "reasons": reasons,
+        "tiers": {},
+    }
+    for tier, values in tier_ms.items():
+        values.sort()
+        summary["tiers"][tier] = {
+            "model": models.get(tier),
+            "count": len(values),
+            "p50_ms": round(values[len(values) // 2], 1),
+            "max_ms": round(values[-1], 1),
+        }
+    return summary
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with percentile estimates."""
+
+    def __init__(self, buckets_ms: list[float] = BUCKETS_MS):
+        self.buckets_ms = list(buckets_ms)
+        self.counts = [0] * (len(self.buckets_ms) + 1)  # Last bucket is +Inf
+        self.count = 0
+        self.sum_ms = 0.0
+
+    def observe(self, value_ms: float):
+        self.counts[bisect.bisect_left(self.buckets_ms, value_ms)] += 1
+        self.count += 1
+        self.sum_ms += value_ms
+
+    def percentile(self, p: float) -> float:
+        """Estimate the p-th percentile (0-100) by interpolating within buckets."""
+        if self.count == 0:
+            return 0.0
+        rank = p / 100.0 * self.count
+        cumulative = 0
+        for i, c in enumerate(self.counts):
+            if c and cumulative + c >= rank:
+                lower = self.buckets_ms[i - 1] if i > 0 else 0.0
+                if i >= len(self.buckets_ms):
+                    return float(lower)
+                upper = self.buckets_ms[i]
+                return lower + (upper - lower) * (rank - cumulative) / c
+            cumulative += c
+        return float(self.buckets_ms[-1])
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.sum_ms / self.count, 1) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50), 1),
+            "p90_ms": round(self.percentile(90), 1),
+            "p95_ms": round(self.percentile(95), 1),
+            "p99_ms": round(self.percentile(99), 1),
+        }
+
+
+class LatencyRegistry:
+    """Process-wide per-stage latency histograms, fed once per turn."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {name: LatencyHistogram() for name, _, _ in STAGES}
+        self.turns = 0
+
+    def record_turn(self, timings: dict) -> dict:
+        """Add one turn's timings to the histograms. Returns the stage durations."""
+        durations = stage_durations(timings)
+        with self.lock:
+            self.turns += 1
+            for name, value in durations.items():
+                self.histograms[name].observe(value)
+        return durations
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                "turns": self.turns,
+                "stages": {name: h.to_dict() for name, h in self.histograms.items()},
+            }
+
+    def state(self) -> dict:
+        """Raw bucket counts, as published with the worker heartbeat."""
+        with self.lock:
+            return {
+                "turns": self.turns,
+                "stages": {
+                    name: {"counts": list(h.counts), "sum_ms": h.sum_ms}
+                    for name, h in self.histograms.items()
+                },
+            }
+
+    def add(self, state: dict) -> "LatencyRegistry":
+        """Add another registry's state() to this one. Returns self."""
+        with self.lock:
+            self.turns += state["turns"]
+            for name, stage in state["stages"].items():
+                h = self.histograms.get(name)
+                # Skip stages or buckets from a worker running other code
+                if h is None or len(stage["counts"]) != len(h.counts):
+                    continue
+                h.counts = [a + b for a, b in zip(h.counts, stage["counts"])]
+                h.count = sum(h.counts)
+                h.sum_ms += stage["sum_ms"]
+        return self
+
+
+def prometheus_text(registries: dict[str, LatencyRegistry]) -> str:
+    """Render histograms in the Prometheus text exposition format.
+
+    `registries` maps worker ids to their registries; every series carries a
+    worker_id label, so each worker's counters stay monotonic whichever
+    worker serves the scrape.
+    """
+    states = {worker: r.state() for worker, r in sorted(registries.items())}
+    lines = [
+        "# HELP voicebot_turns_total Patient turns recorded",
+        "# TYPE voicebot_turns_total counter",
+    ]
+    for worker, state in states.items():
+        lines.append(f'voicebot_turns_total{{worker_id="{worker}"}} {state["turns"]}')
+    lines += [
+        "# HELP voicebot_stage_latency_ms Per-turn pipeline stage latency",
+        "# TYPE voicebot_stage_latency_ms histogram",
+    ]
+    for name, _, _ in STAGES:
+        for worker, state in states.items():
+            stage = state["stages"][name]
+            labels = f'worker_id="{worker}",stage="{name}"'
+            cumulative = 0
+            for bound, c in zip(BUCKETS_MS, stage["counts"]):
+                cumulative += c
+                lines.append(f'voicebot_stage_latency_ms_bucket{{{labels},le="{bound}"}} {cumulative}')
+            count = sum(stage["counts"])
+            lines.append(f'voicebot_stage_latency_ms_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'voicebot_stage_latency_ms_sum{{{labels}}} {stage["sum_ms"]:.1f}')
+            lines.append(f'voicebot_stage_latency_ms_count{{{labels}}} {count}')
+    return "\n".join(lines) + "\n"
+
+
+latency_registry = LatencyRegistry()
@@ -0,0 +1,131 @@
+"""Patient-to-agent relevance scoring for the non-sequitur detector.
+
+Every turn is tokenized and normalized once, turned into a row of a sparse
+hashed TF-IDF matrix, and all agent replies are scored against the patient
+turn they follow with one sparse row-wise product. IDF comes from the
+transcript's own turns, so a transcript's findings do not depend on what
+else was analyzed with it.
+"""
+import re
+import zlib
+from collections import Counter
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from app import config
+
+STOP_WORDS = {
+    "i", "me", "my", "we", "you", "your", "the", "a", "an", "is", "are",
+    "was", "were", "be", "been", "being", "have", "has", "had", "do", "does",
+    "did", "will", "would", "could", "should", "may", "might", "can", "shall",
+    "to", "of", "in", "for", "on", "with", "at", "by", "from", "as", "into",
+    "about", "than", "that", "this", "it", "its", "and", "but", "or", "not",
+    "no", "so", "if", "then", "what", "which", "who", "how", "when", "where",
+    "there", "here", "all", "each", "any", "some", "just", "also", "very",
+    "yes", "okay", "ok", "um", "uh", "well", "hi", "hello", "please", "thank",
+}
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+N_FEATURES = 1 << 18
+
+
+def normalize_tokens(text: str) -> list[str]:
+    """Lowercase, strip punctuation and possessives, drop stop words, fold plurals."""
+    tokens = []
+    for token in TOKEN_RE.findall(text.lower()):
+        if token.endswith("'s"):
+            token = token[:-2]
+        if token in STOP_WORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def hashed_tfidf(token_lists: list[list[str]], n_features: int = N_FEATURES) -> csr_matrix:
+    """Build an L2-normalized hashed TF-IDF matrix with one row per token list."""
+    indptr = [0]
+    indices: list[int] = []
+    data: list[int] = []
+    for tokens in token_lists:
+        counts = Counter(zlib.crc32(t.encode()) % n_features for t in tokens)
+        indices.extend(counts.keys())
+        data.extend(counts.values())
+        indptr.append(len(indices))
+
+    matrix = csr_matrix(
+        (np.asarray(data, dtype=np.float64), np.asarray(indices, dtype=np.int64), np.asarray(indptr)),
+        shape=(len(token_lists), n_features),
+    )
+    doc_freq = np.bincount(matrix.indices, minlength=n_features)
+    idf = np.log((1 + len(token_lists)) / (1 + doc_freq)) + 1.0
+    matrix.data *= idf[matrix.indices]
+
+    row_norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    row_norms[row_norms == 0] = 1.0
+    matrix.data /= np.repeat(row_norms, np.diff(matrix.indptr))
+    return matrix
+
+
+def reply_pairs(turns: list[dict]) -> tuple[np.ndarray, np.ndarray]:
+    """Return (agent_rows, patient_rows): each agent turn and the latest patient turn before it."""
+    speakers = np.array([t["speaker"] for t in turns])
+    positions = np.arange(len(turns))
+    patient_at = np.where(speakers == "patient", positions, -1)
+    latest_patient = np.maximum.accumulate(patient_at) if len(turns) else patient_at
+    previous_patient = np.concatenate([[-1], latest_patient[:-1]]) if len(turns) else patient_at
+    agent_rows = np.flatnonzero((speakers == "agent") & (previous_patient >= 0))
+    return agent_rows, previous_patient[agent_rows]
+
+
+class RelevanceScorer:
+    """Flags agent replies with too little lexical relevance to the patient turn.
+
+    A reply is flagged when the patient turn has at least `min_patient_terms`
+    distinct content terms and the TF-IDF cosine similarity is at or below
+    `threshold`. With the default threshold of 0 this means no shared terms.
+    """
+
+    def __init__(self, threshold: float | None = None, min_patient_terms: int | None = None):
+        self.threshold = config.NON_SEQUITUR_THRESHOLD if threshold is None else threshold
+        self.min_patient_terms = (
+            config.NON_SEQUITUR_MIN_TERMS if min_patient_terms is None else min_patient_terms
+        )
+
+    def score_transcript(self, transcript: dict) -> list[dict]:
+        """Return a finding for each agent reply flagged as a non-sequitur."""
+        turns = transcript["turns"]
+        token_lists = [normalize_tokens(turn["text"]) for turn in turns]
+        agents, patients = reply_pairs(turns)
+        if not len(agents):
+            return []
+
+        matrix = hashed_tfidf(token_lists)
+        similarity = np.asarray(matrix[patients].multiply(matrix[agents]).sum(axis=1)).ravel()
+        patient_terms = np.array([len(set(token_lists[p])) for p in patients])
+
+        flagged = np.flatnonzero(
+            (patient_terms >= self.min_patient_terms) & (similarity <= self.threshold + 1e-9)
+        )
+        findings = []
+        for k in flagged:
+            agent_i = int(agents[k])
+            patient_i = int(patients[k])
+            sim = float(similarity[k])
+            reason = (
+                "Zero keyword overlap between patient question and agent response"
+                if sim <= 1e-9 else
+                f"Low relevance ({sim:.2f}) between patient question and agent response"
+            )
+            findings.append({
+                "type": "potential_non_sequitur",
+                "severity": "medium",
+                "turn_index": agent_i,
+                "patient_said": turns[patient_i]["text"],
+                "agent_said": turns[agent_i]["text"],
+                "similarity": round(sim, 3),
+                "reason": reason,
+            })
+        return findings
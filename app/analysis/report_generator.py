@@ -1,9 +1,14 @@
-import json
 import os
 import time
 import logging
 
 from app import config
+from app.analysis.call_store import get_call_store, new_call_id
+from app.analysis.latency_metrics import (
+    patient_latency_summary,
+    response_gap_summary,
+    stt_tier_summary,
+)
 from app.analysis.transcript_logger import format_transcript_text
 
 logger = logging.getLogger(__name__)
@@ -11,7 +16,11 @@ logger = logging.getLogger(__name__)
 
 def generate_report(transcript: dict, findings: list[dict], scenario: dict) -> dict:
     """Generate a structured analysis report for a single call."""
+    call_id = transcript.get("call_id")
     report = {
+        "report_id": call_id or new_call_id(scenario["id"]),
+        "call_id": call_id,
+        "run_id": transcript.get("run_id"),
         "scenario_id": scenario["id"],
         "scenario_name": scenario["name"],
         "patient_name": scenario["patient_name"],
@@ -27,19 +36,27 @@ def generate_report(transcript: dict, findings: list[dict], scenario: dict) -> d
             "low": sum(1 for f in findings if f.get("severity") == "low"),
         },
         "transcript_text": format_transcript_text(transcript),
+        "response_gaps": response_gap_summary(transcript.get("turns", [])),
+        "patient_latency": patient_latency_summary(transcript.get("turns", [])),
+        "stt_tiers": stt_tier_summary(transcript.get("turns", [])),
     }
+    if "loop_stalls" in transcript:
+        report["loop_stalls"] = transcript["loop_stalls"]
+    if "recording" in transcript:
+        report["recording"] = transcript["recording"]
+    if "live_detection" in transcript:
+        report["live_detection"] = transcript["live_detection"]
+    if "call_lifecycle" in transcript:
+        report["call_lifecycle"] = transcript["call_lifecycle"]
     return report
 
 
 def save_report(report: dict, scenario_id: str) -> str:
-    """Save a report as JSON. Returns the file path."""
-    os.makedirs(config.REPORTS_DIR, exist_ok=True)
-    timestamp = time.strftime("%Y%m%d_%H%M%S")
-    filename = f"report_{scenario_id}_{timestamp}.json"
-    filepath = os.path.join(config.REPORTS_DIR, filename)
-
-    with open(filepath, "w") as f:
-        json.dump(report, f, indent=2, default=str)
+    """Save a report to the call store and as JSON. Returns the file path."""
+    report.setdefault("report_id", new_call_id(scenario_id))
+    filepath = os.path.join(config.REPORTS_DIR, f"report_{report['report_id']}.json")
+    report["report_path"] = filepath
+    get_call_store().save_report(report, filepath)
 
     logger.info("Report saved: %s", filepath)
     return filepath
@@ -71,6 +88,44 @@ def format_bug_report(reports: list[dict]) -> str:
         lines.append(f"- Patient: {report['patient_name']}")
         lines.append(f"- Duration: {report['call_duration_seconds']:.1f}s")
         lines.append(f"- Issues: {len(findings)}")
+        lifecycle = report.get("call_lifecycle")
+        if lifecycle and lifecycle.get("answer_latency_s") is not None:
+            ring = lifecycle.get("ring_time_s")
+            lines.append(
+                f"- Answered after {lifecycle['answer_latency_s']:.1f}s"
+                + (f" ({ring:.1f}s ringing)" if ring is not None else "")
+            )
+        stalls = report.get("loop_stalls")
+        if stalls and stalls.get("stall_count"):
+            lines.append(
+                f"- Event-loop stalls: {stalls['stall_count']} "
+                f"(worst {stalls['max_stall_ms']:.0f}ms)"
+            )
+        gaps = (report.get("response_gaps") or {}).get("agent", {})
+        if gaps.get("count"):
+            lines.append(
+                f"- Agent response time: median {gaps['p50_ms'] / 1000:.1f}s, "
+                f"worst {gaps['max_ms'] / 1000:.1f}s"
+            )
+        ours = report.get("patient_latency")
+        if ours and ours.get("turns"):
+            lines.append(
+                f"- Our response time: median {ours['compute']['p50_ms'] / 1000:.1f}s compute, "
+                f"{ours['perceived']['p50_ms'] / 1000:.1f}s perceived "
+                f"(filler on {ours['filler_turns']} of {ours['turns']} turns)"
+            )
+        stt = report.get("stt_tiers")
+        if stt and stt["cascade"]:
+            tiers = ", ".join(
+                f"{t['model']} median {t['p50_ms']:.0f}ms" for t in stt["tiers"].values()
+            )
+            lines.append(
+                f"- STT cascade: {stt['escalated']} of {stt['turns']} turns escalated "
+                f"({stt['escalation_rate']:.0%}); {tiers}"
+            )
+        live = report.get("live_detection")
+        if live and live.get("stopped_early"):
+            lines.append(f"- Ended early on: {live['stop_reason']['type']}")
         lines.append("")
 
         if not findings:
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from app import config
+
+logger = logging.getLogger(__name__)
+
+
+def review_key(transcript: dict, scenario: dict, prompt_template: str, model: str) -> str:
+    """Hash everything that determines an LLM review's output."""
+    payload = {
+        "turns": [[t["speaker"], t["text"]] for t in transcript["turns"]],
+        "scenario_name": scenario.get("name"),
+        "expected": scenario.get("expected_agent_actions", []),
+        "triggers": scenario.get("bug_triggers", []),
+        "prompt": prompt_template,
+        "model": model,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+class ReviewCache:
+    """Disk-backed LRU cache of LLM review findings, shared across processes.
+
+    Entries live in a SQLite file and are evicted least-recently-used first
+    once their total size passes `max_bytes`. Hit/miss/eviction counters are
+    stored alongside so batch runs in several processes report one total.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS reviews (
+                key TEXT PRIMARY KEY,
+                findings TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS reviews_last_used ON reviews (last_used);
+            CREATE TABLE IF NOT EXISTS stats (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+        """)
+        self._db.commit()
+
+    def _bump(self, name: str, amount: int = 1):
+        self._db.execute(
+            "INSERT INTO stats (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, amount),
+        )
+
+    def get(self, key: str) -> list[dict] | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT findings FROM reviews WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._bump("misses")
+                self._db.commit()
+                return None
+            self._db.execute(
+                "UPDATE reviews SET last_used = ? WHERE key = ?", (time.time(), key)
+            )
+            self._bump("hits")
+            self._db.commit()
+        return json.loads(row[0])
+
+    def put(self, key: str, findings: list[dict]):
+        data = json.dumps(findings)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO reviews (key, findings, size, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data), now, now),
+            )
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM reviews").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        rows = self._db.execute("SELECT key, size FROM reviews ORDER BY last_used").fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM reviews WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        self._bump("evictions", evicted)
+        logger.info("Review cache evicted %d entries", evicted)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._db.execute("SELECT name, value FROM stats").fetchall())
+            entries, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM reviews"
+            ).fetchone()
+        hits = counters.get("hits", 0)
+        misses = counters.get("misses", 0)
+        return {
+            "entries": entries,
+            "bytes": size,
+            "hits": hits,
+            "misses": misses,
+            "evictions": counters.get("evictions", 0),
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+        }
+
+
+def stats_since(before: dict, after: dict) -> dict:
+    """Counters accumulated between two stats() snapshots."""
+    hits = after["hits"] - before["hits"]
+    misses = after["misses"] - before["misses"]
+    return {
+        "hits": hits,
+        "misses": misses,
+        "evictions": after["evictions"] - before["evictions"],
+        "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+        "entries": after["entries"],
+        "bytes": after["bytes"],
+    }
+
+
+_review_cache: ReviewCache | None = None
+_review_cache_pid: int | None = None
+
+
+def get_review_cache() -> ReviewCache | None:
+    """Return the process-wide review cache, or None if disabled."""
+    global _review_cache, _review_cache_pid
+    if config.REVIEW_CACHE_MAX_MB <= 0:
+        return None
+    # SQLite connections must not be shared across a fork
+    if _review_cache is None or _review_cache_pid != os.getpid():
+        _review_cache_pid = os.getpid()
+        _review_cache = ReviewCache(
+            config.REVIEW_CACHE_PATH,
+            max_bytes=config.REVIEW_CACHE_MAX_MB * 1024 * 1024,
+        )
+    return _review_cache
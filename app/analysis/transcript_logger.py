@@ -1,22 +1,21 @@
-import json
 import os
-import time
 import logging
 
 from app import config
+from app.analysis.call_store import get_call_store, new_call_id
 
 logger = logging.getLogger(__name__)
 
 
 def save_transcript(transcript: dict, scenario_id: str) -> str:
-    """Save a call transcript as a JSON file. Returns the file path."""
-    os.makedirs(config.TRANSCRIPTS_DIR, exist_ok=True)
-    timestamp = time.strftime("%Y%m%d_%H%M%S")
-    filename = f"{scenario_id}_{timestamp}.json"
-    filepath = os.path.join(config.TRANSCRIPTS_DIR, filename)
-
-    with open(filepath, "w") as f:
-        json.dump(transcript, f, indent=2, default=str)
+    """Save a call transcript to the call store and as a JSON file.
+
+    The write happens on the store's background thread. Assigns
+    `transcript["call_id"]` if missing. Returns the file path.
+    """
+    call_id = transcript.setdefault("call_id", new_call_id(scenario_id))
+    filepath = os.path.join(config.TRANSCRIPTS_DIR, f"{call_id}.json")
+    get_call_store().save_transcript(transcript, filepath)
 
     logger.info("Transcript saved: %s", filepath)
     return filepath
@@ -0,0 +1,204 @@
+import json
+import logging
+import os
+import threading
+import time
+import wave
+
+import numpy as np
+
+from app import config
+from app.audio.mulaw_converter import mulaw_decode
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 8000
+MULAW_SILENCE = b"\xff"
+
+# Channel indexes in the stereo recording
+AGENT = 0  # Inbound audio from the AI agent under test
+PATIENT = 1  # Outbound audio from our simulated patient
+CHANNEL_NAMES = ["agent", "patient"]
+
+
+class CallRecorder:
+    """Records inbound and outbound mu-law audio for one call without blocking the media loop.
+
+    Frames are copied into a preallocated ring of fixed-size slots. A
+    background thread drains the ring every `flush_interval_s`, lays each
+    channel out on the call timeline and, when the call ends, writes a stereo
+    16-bit WAV (left = agent, right = patient) plus an events sidecar with
+    turn boundaries and VAD decisions. If the writer falls behind, frames are
+    dropped and counted rather than making the caller wait.
+    """
+
+    def __init__(
+        self,
+        base_path: str,
+        capacity_seconds: float = 10.0,
+        slot_bytes: int = 160,
+        flush_interval_s: float = 0.2,
+    ):
+        self.base_path = base_path
+        self.slot_bytes = slot_bytes
+        self.flush_interval_s = flush_interval_s
+        # Two channels at 50 frames/s each
+        self.slots = max(16, int(capacity_seconds * 2 * SAMPLE_RATE / slot_bytes))
+
+        self._buffer = bytearray(self.slots * slot_bytes)
+        self._view = memoryview(self._buffer)
+        self._slot_channel = [0] * self.slots
+        self._slot_time = [0.0] * self.slots
+        self._slot_len = [0] * self.slots
+        self._head = 0  # Written only by the media loop
+        self._tail = 0  # Written only by the writer thread
+
+        self._events: list[dict] = []
+        self.started_at = time.monotonic()
+        self.frames = 0
+        self.dropped_frames = 0
+        self.loop_overhead_s = 0.0
+        self.writer_busy_s = 0.0
+
+        self._raw_paths = [f"{base_path}.{name}.ulaw" for name in CHANNEL_NAMES]
+        self._raw_files = []
+        self._events_file = None
+        self._written = [0, 0]  # Samples written per channel
+        self._wall_started_at = time.time()
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="call-recorder", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def for_call(cls, call_id: str) -> "CallRecorder":
+        """Recorder for a call, named after the call_id its transcript is saved under."""
+        os.makedirs(config.RECORDINGS_DIR, exist_ok=True)
+        return cls(os.path.join(config.RECORDINGS_DIR, call_id))
+
+    @property
+    def wav_path(self) -> str:
+        return f"{self.base_path}.wav"
+
+    def write(self, channel: int, mulaw_bytes: bytes, timestamp: float | None = None):
+        """Copy a mu-law frame into the ring. Never blocks; drops if the ring is full."""
+        started = time.perf_counter()
+        t = timestamp if timestamp is not None else time.monotonic()
+        for offset in range(0, len(mulaw_bytes), self.slot_bytes):
+            if self._head - self._tail >= self.slots:
+                self.dropped_frames += 1
+                continue
+            piece = mulaw_bytes[offset:offset + self.slot_bytes]
+            slot = self._head % self.slots
+            start = slot * self.slot_bytes
+            self._view[start:start + len(piece)] = piece
+            self._slot_channel[slot] = channel
+            self._slot_time[slot] = t + offset / SAMPLE_RATE
+            self._slot_len[slot] = len(piece)
+            self._head += 1
+            self.frames += 1
+        self.loop_overhead_s += time.perf_counter() - started
+
+    def event(self, event_type: str, **fields):
+        """Record a turn boundary, VAD decision or other timeline event."""
+        self._events.append({
+            "t": round(time.monotonic() - self.started_at, 3),
+            "type": event_type,
+            **fields,
+        })
+
+    def close(self) -> dict:
+        """Stop recording and wait for the writer to finish the WAV.
+
+        Blocks while the WAV is written; call it off the event loop.
+        """
+        self._stop.set()
+        self._thread.join()
+        return self.stats()
+
+    def stats(self) -> dict:
+        frames = max(self.frames, 1)
+        return {
+            "path": self.wav_path,
+            "frames": self.frames,
+            "dropped_frames": self.dropped_frames,
+            "loop_overhead_ms": round(self.loop_overhead_s * 1000, 2),
+            "loop_overhead_us_per_frame": round(self.loop_overhead_s * 1e6 / frames, 2),
+            "writer_busy_ms": round(self.writer_busy_s * 1000, 2),
+        }
+
+    def _open(self):
+        # Opened on the writer thread so the media loop never touches the disk
+        self._raw_files = [open(p, "wb") for p in self._raw_paths]
+        self._events_file = open(f"{self.base_path}.events.jsonl", "w")
+        self._events_file.write(json.dumps({
+            "type": "header",
+            "sample_rate": SAMPLE_RATE,
+            "channels": CHANNEL_NAMES,
+            "started_at": self._wall_started_at,
+        }) + "\n")
+
+    def _run(self):
+        try:
+            self._open()
+            while True:
+                stopping = self._stop.wait(self.flush_interval_s)
+                self._flush()
+                if stopping:
+                    break
+            self._finalize()
+        except Exception as e:
+            logger.error("Call recording failed for %s: %s", self.base_path, e)
+
+    def _flush(self):
+        started = time.perf_counter()
+        head = self._head
+        max_lag = 3 * self.slot_bytes  # Tolerate ~60ms of arrival jitter before padding
+        while self._tail < head:
+            slot = self._tail % self.slots
+            channel = self._slot_channel[slot]
+            start = slot * self.slot_bytes
+            data = bytes(self._view[start:start + self._slot_len[slot]])
+
+            position = int((self._slot_time[slot] - self.started_at) * SAMPLE_RATE)
+            gap = position - self._written[channel]
+            if gap > max_lag:
+                self._raw_files[channel].write(MULAW_SILENCE * gap)
+                self._written[channel] += gap
+            self._raw_files[channel].write(data)
+            self._written[channel] += len(data)
+            self._tail += 1
+
+        events, self._events = self._events, []
+        for e in events:
+            self._events_file.write(json.dumps(e) + "\n")
+        for f in (*self._raw_files, self._events_file):
+            f.flush()
+        self.writer_busy_s += time.perf_counter() - started
+
+    def _finalize(self):
+        started = time.perf_counter()
+        for f in self._raw_files:
+            f.close()
+
+        channels = []
+        for path in self._raw_paths:
+            with open(path, "rb") as f:
+                channels.append(mulaw_decode(f.read()))
+        length = max(len(c) for c in channels)
+        stereo = np.zeros((length, 2), dtype=np.int16)
+        for i, pcm in enumerate(channels):
+            stereo[:len(pcm), i] = pcm
+
+        with wave.open(self.wav_path, "wb") as wf:
+            wf.setnchannels(2)
+            wf.setsampwidth(2)
+            wf.setframerate(SAMPLE_RATE)
+            wf.writeframes(stereo.tobytes())
+        for path in self._raw_paths:
+            os.remove(path)
+
+        self.writer_busy_s += time.perf_counter() - started
+        self._events_file.write(json.dumps({"type": "summary", **self.stats()}) + "\n")
+        self._events_file.close()
+        logger.info("Call recording saved: %s", self.wav_path)
@@ -0,0 +1,107 @@
+"""Pre-rendered filler clips played while the patient's reply is being generated.
+
+Each phrase is rendered once with the TTS voice and cached on disk as raw
+mu-law, so a filler can start on the very next 20ms frame without a TTS
+round trip. Clips are kept as 160-byte frames ready for the outbound queue.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import random
+
+import numpy as np
+
+from app import config
+from app.audio.mulaw_converter import mulaw_decode, mulaw_encode
+from app.audio.tts_engine import VOICE, text_to_mulaw_chunks
+
+logger = logging.getLogger(__name__)
+
+FILLER_PHRASES = [
+    "Um...",
+    "Uh, let me see.",
+    "Hmm, okay.",
+    "Well, um...",
+    "Let me think.",
+]
+
+FRAME_BYTES = 160
+# Part of the cache key; bump it when the rendered audio changes (2: clips
+# encoded before the mu-law encoder was made G.711 are re-rendered)
+CLIP_FORMAT = 2
+# Frames faded out when a filler is cut, so it stops without a click
+FADE_FRAMES = 3
+
+
+def fade_out(frames: list[bytes]) -> list[bytes]:
+    """Ramp mu-law frames linearly down to silence."""
+    if not frames:
+        return []
+    pcm = mulaw_decode(b"".join(frames)).astype(np.float32)
+    pcm *= np.linspace(1.0, 0.0, len(pcm), dtype=np.float32)
+    faded = mulaw_encode(pcm.astype(np.int16))
+    return [faded[i : i + FRAME_BYTES] for i in range(0, len(faded), FRAME_BYTES)]
+
+
+class FillerClips:
+    """Filler phrases rendered to mu-law frames, cached in memory and on disk."""
+
+    def __init__(self, cache_dir: str, phrases: list[str] = FILLER_PHRASES, voice: str = VOICE):
+        self.cache_dir = cache_dir
+        self.phrases = list(phrases)
+        self.voice = voice
+        self.clips: dict[str, list[bytes]] = {}
+        self._loaded = False
+        self._lock = asyncio.Lock()
+        self._last: str | None = None
+
+    def _path(self, phrase: str) -> str:
+        key = hashlib.sha1(f"{CLIP_FORMAT}|{self.voice}|{phrase}".encode()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{key}.ulaw")
+
+    async def load(self):
+        """Read cached clips, rendering any that are missing. Safe to call repeatedly."""
+        async with self._lock:
+            if self._loaded:
+                return
+            os.makedirs(self.cache_dir, exist_ok=True)
+            for phrase in self.phrases:
+                path = self._path(phrase)
+                if os.path.exists(path):
+                    with open(path, "rb") as f:
+                        data = f.read()
+                    frames = [data[i : i + FRAME_BYTES] for i in range(0, len(data), FRAME_BYTES)]
+                else:
+                    try:
+                        frames = await text_to_mulaw_chunks(phrase, self.voice)
+                    except Exception as e:
+                        logger.warning("Could not render filler %r: %s", phrase, e)
+                        continue
+                    if not frames:
+                        continue
+                    with open(path, "wb") as f:
+                        f.write(b"".join(frames))
+                self.clips[phrase] = frames
+            self._loaded = True
+            logger.info("Loaded %d/%d filler clips", len(self.clips), len(self.phrases))
+
+    def pick(self) -> tuple[str, list[bytes]] | None:
+        """A random clip, not the same phrase twice in a row. None if none loaded."""
+        choices = [p for p in self.clips if p != self._last] or list(self.clips)
+        if not choices:
+            return None
+        phrase = random.choice(choices)
+        self._last = phrase
+        return phrase, self.clips[phrase]
+
+
+_fillers: FillerClips | None = None
+
+
+def get_filler_clips() -> FillerClips:
+    """Return the process-wide filler clips."""
+    global _fillers
+    if _fillers is None:
+        _fillers = FillerClips(config.FILLER_CACHE_DIR)
+    return _fillers
@@ -0,0 +1,40 @@
+import numpy as np
+
+
+class FrameAssembler:
+    """Regroup incoming PCM chunks into fixed-size frames without reallocating.
+
+    Media arrives in 20ms chunks (160 samples at 8kHz) but silero VAD wants
+    32ms frames (256 samples at 8kHz). Samples are copied into one
+    preallocated frame instead of concatenating onto a growing array.
+    """
+
+    def __init__(self, frame_size: int, sample_rate: int = 8000):
+        self.frame_size = frame_size
+        self.frame_ms = frame_size * 1000 / sample_rate
+        self._ms_per_sample = 1000 / sample_rate
+        self._frame = np.zeros(frame_size, dtype=np.int16)
+        self._filled = 0
+        self._frame_start_ms = 0.0
+
+    def push(self, samples: np.ndarray, start_ms: float):
+        """Add samples that start at media time start_ms.
+
+        Yields (frame, frame_start_ms) for each frame completed. The frame is
+        a view of the internal buffer, only valid until the generator resumes.
+        """
+        offset = 0
+        while offset < len(samples):
+            if self._filled == 0:
+                self._frame_start_ms = start_ms + offset * self._ms_per_sample
+            n = min(self.frame_size - self._filled, len(samples) - offset)
+            self._frame[self._filled:self._filled + n] = samples[offset:offset + n]
+            self._filled += n
+            offset += n
+            if self._filled == self.frame_size:
+                self._filled = 0
+                yield self._frame, self._frame_start_ms
+
+    def reset(self):
+        """Drop a partly filled frame."""
+        self._filled = 0
@@ -14,8 +14,8 @@ def mulaw_decode(mulaw_bytes: bytes) -> np.ndarray:
     exponent = (mulaw >> 4) & 0x07
     mantissa = mulaw & 0x0F
 
-    magnitude = ((mantissa << 1) | 0x21) << (exponent + 2)
-    magnitude = magnitude - 0x21  # Remove bias
+    magnitude = ((mantissa << 3) + 0x84) << exponent
+    magnitude = magnitude - 0x84  # Remove bias
 
     pcm = np.where(sign != 0, -magnitude, magnitude).astype(np.int16)
     return pcm
@@ -34,9 +34,10 @@ def mulaw_encode(pcm_array: np.ndarray) -> bytes:
     magnitude = np.abs(pcm)
     magnitude = np.clip(magnitude + BIAS, 0, CLIP)
 
+    # Segment i covers biased magnitudes [2**(i + 7), 2**(i + 8))
     exponent = np.zeros(len(magnitude), dtype=np.int32)
     for i in range(7, 0, -1):
-        mask = 1 << (i + 3)
+        mask = 1 << (i + 7)
         exponent = np.where((magnitude >= mask) & (exponent == 0), i, exponent)
 
     mantissa = (magnitude >> (exponent + 3)) & 0x0F
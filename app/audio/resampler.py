@@ -1,5 +1,6 @@
+from math import gcd
+
 import numpy as np
-from scipy.signal import resample_poly
 
 
 def resample_audio(audio: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
@@ -7,7 +8,8 @@ def resample_audio(audio: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarra
     if orig_sr == target_sr:
         return audio
 
-    from math import gcd
+    from scipy.signal import resample_poly  # Deferred: scipy is slow to import
+
     g = gcd(orig_sr, target_sr)
     up = target_sr // g
     down = orig_sr // g
@@ -3,7 +3,6 @@ import subprocess
 import logging
 
 import numpy as np
-import edge_tts
 
 from app.audio.mulaw_converter import mulaw_encode
 
@@ -12,12 +11,10 @@ logger = logging.getLogger(__name__)
 VOICE = "en-US-JennyNeural"
 
 
-async def text_to_mulaw_chunks(text: str, voice: str = VOICE) -> list[bytes]:
-    """Convert text to a list of 160-byte mu-law chunks for Twilio Media Streams.
+async def synthesize(text: str, voice: str = VOICE) -> bytes:
+    """Speak text with edge-tts. Returns MP3 bytes, empty if no audio came back."""
+    import edge_tts  # Only needed once speech is synthesized
 
-    Pipeline: text -> edge-tts (MP3) -> ffmpeg (PCM 8kHz) -> mu-law encode -> chunk
-    """
-    # Step 1: Generate MP3 with edge-tts
     communicate = edge_tts.Communicate(text, voice, rate="+0%")
     mp3_buffer = io.BytesIO()
     async for chunk in communicate.stream():
@@ -26,17 +23,34 @@ async def text_to_mulaw_chunks(text: str, voice: str = VOICE) -> list[bytes]:
 
     if mp3_buffer.tell() == 0:
         logger.warning("edge-tts returned no audio for: %s", text[:50])
+    return mp3_buffer.getvalue()
+
+
+async def text_to_mulaw_chunks(text: str, voice: str = VOICE) -> list[bytes]:
+    """Convert text to a list of 160-byte mu-law chunks for Twilio Media Streams.
+
+    Pipeline: text -> edge-tts (MP3) -> ffmpeg (PCM 8kHz) -> mu-law encode -> chunk
+    """
+    # Step 1: Generate MP3 with edge-tts
+    mp3 = await synthesize(text, voice)
+    if not mp3:
         return []
+    return decode_to_mulaw_chunks(mp3)
+
 
+def decode_to_mulaw_chunks(audio_bytes: bytes) -> list[bytes]:
+    """Decode compressed TTS audio into 160-byte mu-law chunks.
+
+    Pipeline: MP3 (or any ffmpeg-readable input) -> ffmpeg (PCM 8kHz) -> mu-law encode -> chunk
+    """
     # Step 2: Decode MP3 to raw PCM 8kHz mono via ffmpeg
-    mp3_buffer.seek(0)
     process = subprocess.run(
         [
             "ffmpeg", "-i", "pipe:0",
             "-f", "s16le", "-ar", "8000", "-ac", "1",
             "-acodec", "pcm_s16le", "pipe:1",
         ],
-        input=mp3_buffer.read(),
+        input=audio_bytes,
         capture_output=True,
     )
 
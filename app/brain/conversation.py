@@ -10,25 +10,35 @@ class Conversation:
         self.messages: list[dict] = []  # Ollama message format
         self.started_at = time.time()
 
-    def add_agent_utterance(self, text: str, timestamp: float | None = None):
+    def add_agent_utterance(self, text: str, timestamp: float | None = None) -> dict:
         ts = timestamp or time.time()
-        self.turns.append({
+        turn = {
             "speaker": "agent",
             "text": text,
             "timestamp": ts,
             "elapsed": round(ts - self.started_at, 2),
-        })
+        }
+        self.turns.append(turn)
         self.messages.append({"role": "user", "content": text})
+        return turn
 
-    def add_patient_utterance(self, text: str, timestamp: float | None = None):
+    def add_patient_utterance(
+        self, text: str, timestamp: float | None = None, timings: dict | None = None
+    ) -> dict:
+        """Record a patient turn. `timings` holds the per-stage monotonic marks
+        for the pipeline that produced it and may still be filled in later."""
         ts = timestamp or time.time()
-        self.turns.append({
+        turn = {
             "speaker": "patient",
             "text": text,
             "timestamp": ts,
             "elapsed": round(ts - self.started_at, 2),
-        })
+        }
+        if timings is not None:
+            turn["timings"] = timings
+        self.turns.append(turn)
         self.messages.append({"role": "assistant", "content": text})
+        return turn
 
     def get_recent_messages(self, max_turns: int = 10) -> list[dict]:
         return self.messages[-max_turns:]
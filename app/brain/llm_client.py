@@ -58,6 +58,7 @@ class OllamaClient:
         async with self.client.stream(
             "POST", f"{self.base_url}/api/chat", json=payload
         ) as response:
+            response.raise_for_status()
             async for line in response.aiter_lines():
                 if not line.strip():
                     continue
@@ -1,9 +1,10 @@
 import asyncio
 import logging
 import random
+import time
 
 from app.brain.llm_client import OllamaClient
-from app.brain.patient_persona import build_system_prompt
+from app.scenarios.registry import get_registry
 
 logger = logging.getLogger(__name__)
 
@@ -19,11 +20,26 @@ class ResponseGenerator:
 
     def __init__(self, scenario: dict):
         self.scenario = scenario
-        self.system_prompt = build_system_prompt(scenario)
+        self.system_prompt = get_registry().system_prompt(scenario)
         self.llm = OllamaClient()
         self.opening_delivered = False
 
-    async def get_opening_line(self) -> str:
+    async def _generate(self, messages: list[dict], timings: dict | None = None) -> str:
+        """Stream a completion, recording llm_request/llm_first_token/llm_end marks."""
+        if timings is None:
+            timings = {}
+        timings["llm_request"] = time.monotonic()
+        tokens = []
+        try:
+            async for token in self.llm.generate_streaming(self.system_prompt, messages):
+                if not tokens:
+                    timings["llm_first_token"] = time.monotonic()
+                tokens.append(token)
+        finally:
+            timings["llm_end"] = time.monotonic()
+        return "".join(tokens)
+
+    async def get_opening_line(self, timings: dict | None = None) -> str:
         """Generate the first thing the patient says after the agent greets."""
         if not self.opening_delivered:
             self.opening_delivered = True
@@ -38,18 +54,23 @@ class ResponseGenerator:
             ]
             try:
                 return await asyncio.wait_for(
-                    self.llm.generate(self.system_prompt, messages),
+                    self._generate(messages, timings),
                     timeout=10.0,
                 )
             except (asyncio.TimeoutError, Exception) as e:
                 logger.warning("Opening line generation failed: %s", e)
                 return f"Hi, my name is {self.scenario['patient_name']}. {self.scenario['goal']}."
 
-    async def generate_response(self, conversation_messages: list[dict]) -> str:
-        """Generate a patient response given conversation history."""
+    async def generate_response(
+        self, conversation_messages: list[dict], timings: dict | None = None
+    ) -> str:
+        """Generate a patient response given conversation history.
+
+        If a timings dict is passed, LLM stage marks are recorded into it.
+        """
         try:
             response = await asyncio.wait_for(
-                self.llm.generate(self.system_prompt, conversation_messages),
+                self._generate(conversation_messages, timings),
                 timeout=10.0,
             )
             return response.strip()
@@ -8,6 +8,20 @@ SIGNALWIRE_PROJECT_ID = os.getenv("SIGNALWIRE_PROJECT_ID", "")
 SIGNALWIRE_API_TOKEN = os.getenv("SIGNALWIRE_API_TOKEN", "")
 SIGNALWIRE_SPACE_URL = os.getenv("SIGNALWIRE_SPACE_URL", "")
 SIGNALWIRE_FROM_NUMBER = os.getenv("SIGNALWIRE_FROM_NUMBER", "")
+# REST API root; point it at a stand-in server (app.telephony.laml_stub) for testing
+SIGNALWIRE_API_BASE_URL = os.getenv("SIGNALWIRE_API_BASE_URL") or f"https://{SIGNALWIRE_SPACE_URL}"
+
+# Call placement: creations are spaced to CALLS_PER_SECOND, at most
+# MAX_CONCURRENT_CALLS are open at once, and transient REST errors are
+# retried CALL_CREATE_RETRIES times with exponential backoff
+CALLS_PER_SECOND = float(os.getenv("CALLS_PER_SECOND", "1"))
+MAX_CONCURRENT_CALLS = int(os.getenv("MAX_CONCURRENT_CALLS", "4"))
+CALL_CREATE_RETRIES = int(os.getenv("CALL_CREATE_RETRIES", "3"))
+CALL_CREATE_BACKOFF_S = float(os.getenv("CALL_CREATE_BACKOFF_S", "0.5"))
+# Status callbacks: how often place_call checks a call's session, and how long
+# it waits for the media stream to finish after the call is reported completed
+CALL_STATUS_POLL_S = float(os.getenv("CALL_STATUS_POLL_S", "0.5"))
+CALL_END_GRACE_S = float(os.getenv("CALL_END_GRACE_S", "10"))
 
 # Target
 TARGET_PHONE_NUMBER = os.getenv("TARGET_PHONE_NUMBER", "+18054398008")
@@ -21,15 +35,80 @@ OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3")
 
 # Whisper
 WHISPER_MODEL_SIZE = os.getenv("WHISPER_MODEL_SIZE", "base")
+# Decoding settings; python -m app.pipeline.tune_stt measures these on this
+# host and writes out the fastest combination that stays accurate enough
+WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "int8")
+WHISPER_CPU_THREADS = int(os.getenv("WHISPER_CPU_THREADS", "0"))  # 0: library default
+WHISPER_NUM_WORKERS = int(os.getenv("WHISPER_NUM_WORKERS", "1"))
+WHISPER_BEAM_SIZE = int(os.getenv("WHISPER_BEAM_SIZE", "1"))
+# Cascade: decode with this smaller model first (e.g. tiny) and re-decode with
+# WHISPER_MODEL_SIZE only when the result's average log probability is below
+# STT_ESCALATE_LOGPROB, it contains numbers, or the utterance is longer than
+# STT_ESCALATE_AFTER_S. Empty: every utterance uses WHISPER_MODEL_SIZE
+STT_CASCADE_MODEL = os.getenv("STT_CASCADE_MODEL", "")
+STT_ESCALATE_LOGPROB = float(os.getenv("STT_ESCALATE_LOGPROB", "-0.6"))
+STT_ESCALATE_AFTER_S = float(os.getenv("STT_ESCALATE_AFTER_S", "6"))
 
 # Call settings
 SILENCE_THRESHOLD_MS = int(os.getenv("SILENCE_THRESHOLD_MS", "700"))
 TRIAL_MESSAGE_DURATION_S = int(os.getenv("TRIAL_MESSAGE_DURATION_S", "0"))
 MAX_CALL_DURATION_S = int(os.getenv("MAX_CALL_DURATION_S", "180"))
+# Play a short filler clip ("um, let me see") once our reply has taken
+# FILLER_AFTER_MS since the agent stopped talking; 0 (the default) disables fillers
+FILLER_AFTER_MS = int(os.getenv("FILLER_AFTER_MS", "0"))
+
+# Server worker processes (uvicorn --workers). Each loads the models once
+# (at startup unless PRELOAD_MODELS=0) and heartbeats for /workers
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "1"))
+PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "1").lower() in ("1", "true", "yes")
+WORKER_HEARTBEAT_S = float(os.getenv("WORKER_HEARTBEAT_S", "5"))
+
+# Voice bot server the suite CLI submits runs to (control API, /runs)
+CONTROL_API_URL = os.getenv("CONTROL_API_URL", "http://127.0.0.1:8000")
+# Shared secret for the control API. The server port is public through
+# ngrok, so /runs answers 503 until this is set; run.sh generates one
+RUN_API_TOKEN = os.getenv("RUN_API_TOKEN", "")
+
+# Recording (dual-channel call audio + turn/VAD events sidecar)
+RECORD_CALLS = os.getenv("RECORD_CALLS", "0").lower() in ("1", "true", "yes")
+
+# Analysis
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "1"))
+REVIEW_CACHE_MAX_MB = int(os.getenv("REVIEW_CACHE_MAX_MB", "64"))  # 0 disables the cache
+# Non-sequitur: flag replies whose TF-IDF similarity to a patient turn with
+# at least NON_SEQUITUR_MIN_TERMS content words is at or below the threshold
+NON_SEQUITUR_THRESHOLD = float(os.getenv("NON_SEQUITUR_THRESHOLD", "0.0"))
+NON_SEQUITUR_MIN_TERMS = int(os.getenv("NON_SEQUITUR_MIN_TERMS", "4"))
+# In-call detection: end the call early once a finding of one of these types
+# is reported (comma-separated, empty disables). Findings for behavior the
+# agent never showed count after EARLY_STOP_CONFIRM_TURNS agent turns.
+EARLY_STOP_ON = [t.strip() for t in os.getenv("EARLY_STOP_ON", "").split(",") if t.strip()]
+EARLY_STOP_CONFIRM_TURNS = int(os.getenv("EARLY_STOP_CONFIRM_TURNS", "4"))
+
+# Distributed runs: JOB_QUEUE_URL (below) is shared by the coordinator and worker nodes.
+# A worker renews its lease every JOB_LEASE_S / 3 seconds; a job whose lease
+# runs out goes back to the queue, up to JOB_MAX_ATTEMPTS attempts.
+JOB_LEASE_S = float(os.getenv("JOB_LEASE_S", "60"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "2"))
+JOB_POLL_S = float(os.getenv("JOB_POLL_S", "2"))
+
+# Event-loop stall monitor
+LOOP_MONITOR_INTERVAL_MS = int(os.getenv("LOOP_MONITOR_INTERVAL_MS", "20"))
+LOOP_STALL_THRESHOLD_MS = int(os.getenv("LOOP_STALL_THRESHOLD_MS", "100"))
 
 # Paths
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 OUTPUT_DIR = os.path.join(BASE_DIR, "output")
 TRANSCRIPTS_DIR = os.path.join(OUTPUT_DIR, "transcripts")
 REPORTS_DIR = os.path.join(OUTPUT_DIR, "reports")
+RECORDINGS_DIR = os.path.join(OUTPUT_DIR, "recordings")
+REPLAYS_DIR = os.path.join(OUTPUT_DIR, "replays")
+FILLER_CACHE_DIR = os.path.join(OUTPUT_DIR, "cache", "fillers")
+STT_TUNING_DIR = os.path.join(OUTPUT_DIR, "stt_tuning")
+TUNING_UTTERANCES_CACHE_DIR = os.path.join(OUTPUT_DIR, "cache", "tuning_utterances")
+RUNS_DIR = os.path.join(OUTPUT_DIR, "runs")
+CALL_STORE_PATH = os.path.join(OUTPUT_DIR, "calls.sqlite")
+CALL_SESSIONS_PATH = os.path.join(OUTPUT_DIR, "call_sessions.sqlite")
+JOB_QUEUE_URL = os.getenv("JOB_QUEUE_URL") or "sqlite://" + os.path.join(OUTPUT_DIR, "jobs.sqlite")
+REVIEW_CACHE_PATH = os.path.join(OUTPUT_DIR, "cache", "llm_reviews.sqlite")
 SCENARIOS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenarios", "definitions")
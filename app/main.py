@@ -1,10 +1,20 @@
 import asyncio
 import logging
+import time
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, WebSocket
+from fastapi.responses import PlainTextResponse
 
 from app.telephony.twilio_webhook import router as webhook_router
+from app.pipeline.run_api import router as run_router
 from app.telephony.media_stream import handle_media_stream
+from app.audio.filler_audio import get_filler_clips
+from app.analysis.latency_metrics import LatencyRegistry, latency_registry, prometheus_text
+from app.pipeline.loop_monitor import loop_monitor
+from app.scenarios.registry import get_registry
+from app.telephony.call_sessions import get_call_sessions, worker_id
+from app import config
 
 logging.basicConfig(
     level=logging.INFO,
@@ -12,10 +22,78 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="VoiceBot - AI Agent Tester")
 
-# Mount SignalWire HTTP routes
+def load_models():
+    """Load the Whisper and silero-vad weights into this worker process.
+
+    Also imports the live analysis dependencies, so the first call does not
+    pay for them on the event loop.
+    """
+    from app.speech.stt_engine import get_stt_engine
+    from app.speech.vad import acquire_vad, release_vad
+    import app.analysis.relevance  # noqa: F401
+
+    get_stt_engine()
+    release_vad(acquire_vad())
+
+
+async def warm_up(info: dict):
+    """Preload models and filler clips in the background of a started worker."""
+    if config.PRELOAD_MODELS:
+        try:
+            await asyncio.to_thread(load_models)
+        except Exception as e:
+            logger.error("Worker %s could not preload models: %s", worker_id(), e)
+        else:
+            info["models_loaded"] = True
+            logger.info("Worker %s loaded models", worker_id())
+    if config.FILLER_AFTER_MS > 0:
+        await get_filler_clips().load()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start up and shut down one server worker.
+
+    Scenarios are validated first, so a malformed file stops startup. The
+    worker then reports its liveness to the session store and preloads in
+    the background, so it serves /health right away. With `uvicorn
+    --workers N` this runs in every worker, so each process loads the
+    models once and shows up in /workers. The loop monitor watches the
+    event loop that paces media for blocking calls.
+    """
+    get_registry().refresh()
+
+    started_at = time.time()
+    info = {"models_loaded": False}
+    sessions = get_call_sessions()
+
+    async def heartbeat():
+        while True:
+            try:
+                await asyncio.to_thread(
+                    sessions.heartbeat, worker_id(), started_at, info, latency_registry.state()
+                )
+            except Exception as e:
+                logger.warning("Worker heartbeat failed: %s", e)
+            await asyncio.sleep(config.WORKER_HEARTBEAT_S)
+
+    app.state.worker_info = info
+    tasks = [asyncio.create_task(heartbeat()), asyncio.create_task(warm_up(info))]
+    loop_monitor.start()
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+app = FastAPI(title="VoiceBot - AI Agent Tester", lifespan=lifespan)
+
+# Mount SignalWire HTTP routes and the run control API
 app.include_router(webhook_router)
+app.include_router(run_router)
 
 
 @app.websocket("/ws")
@@ -26,10 +104,52 @@ async def websocket_endpoint(websocket: WebSocket):
 
 @app.get("/health")
 async def health_check():
-    """Verify the server is running."""
-    return {"status": "ok", "service": "voicebot"}
+    """Verify the server is running, and whether this worker has its models loaded."""
+    info = getattr(app.state, "worker_info", {})
+    return {"status": "ok", "service": "voicebot", "models_loaded": info.get("models_loaded", False)}
+
+
+@app.get("/workers")
+async def workers():
+    """Live server worker processes and their active calls.
+
+    Read from the shared session store, so any worker gives the same answer.
+    """
+    rows = await asyncio.to_thread(get_call_sessions().workers, config.WORKER_HEARTBEAT_S * 3)
+    return {
+        "served_by": worker_id(),
+        "active_calls": sum(w["active_calls"] for w in rows),
+        "workers": rows,
+    }
+
+
+@app.get("/metrics")
+async def metrics(format: str = "prometheus"):
+    """Per-stage turn latency histograms of every live worker.
+
+    Each worker publishes its histograms with its heartbeat, so any worker
+    answers for all of them: Prometheus text with a worker_id label on every
+    series, or ?format=json for percentiles per worker and over all workers.
+    Other workers' figures are up to WORKER_HEARTBEAT_S old.
+    """
+    states = await asyncio.to_thread(get_call_sessions().worker_metrics, config.WORKER_HEARTBEAT_S * 3)
+    registries = {worker: LatencyRegistry().add(state) for worker, state in states.items()}
+    registries[worker_id()] = latency_registry  # This worker's own, current figures
+    if format == "json":
+        combined = LatencyRegistry()
+        for registry in registries.values():
+            combined.add(registry.state())
+        return {
+            "served_by": worker_id(),
+            "all": combined.snapshot(),
+            "workers": {worker: r.snapshot() for worker, r in sorted(registries.items())},
+        }
+    return PlainTextResponse(
+        prometheus_text(registries),
+        media_type="text/plain; version=0.0.4",
+    )
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, workers=config.SERVER_WORKERS)
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import time
+
+from app.analysis.bug_detector import BugDetector
+from app.analysis.report_generator import generate_report, save_report
+
+logger = logging.getLogger(__name__)
+
+
+async def analyze_transcript(transcript: dict, scenario: dict) -> dict:
+    """Run rule-based and LLM analysis on a transcript and save the report.
+
+    Returns the analysis report dict.
+    """
+    logger.info("Analyzing transcript for bugs (%s)...", scenario["id"])
+    detector = BugDetector()
+    findings = detector.analyze(transcript, scenario)
+
+    # LLM-based review
+    try:
+        llm_findings = await detector.llm_review(transcript, scenario)
+        findings.extend(llm_findings)
+    except Exception as e:
+        logger.warning("LLM review failed: %s", e)
+
+    # Generate report
+    report = generate_report(transcript, findings, scenario)
+    save_report(report, scenario["id"])
+
+    bug_count = len(findings)
+    critical = sum(1 for f in findings if f.get("severity") == "critical")
+    logger.info(
+        "Scenario %s complete: %d bugs found (%d critical)",
+        scenario["id"], bug_count, critical,
+    )
+    return report
+
+
+class AnalysisWorker:
+    """Background pipeline stage that analyzes transcripts while the next call runs.
+
+    Transcripts are submitted to a queue and processed by a fixed number of
+    worker tasks. Each submission returns a future resolving to the report
+    (or None if analysis failed).
+    """
+
+    def __init__(self, num_workers: int = 1):
+        self.num_workers = max(1, num_workers)
+        self.queue: asyncio.Queue[tuple[dict, dict, asyncio.Future] | None] = asyncio.Queue()
+        self.tasks: list[asyncio.Task] = []
+        self.busy_seconds = 0.0  # Summed over workers
+        self.active_seconds = 0.0  # Wall-clock time with any analysis running
+        self.drain_wait_seconds = 0.0
+        self._running = 0
+        self._active_since = 0.0
+
+    def start(self):
+        if self.tasks:
+            return
+        for i in range(self.num_workers):
+            self.tasks.append(asyncio.create_task(self._worker(i)))
+
+    def submit(self, transcript: dict, scenario: dict) -> asyncio.Future:
+        """Queue a transcript for analysis. Returns a future for the report."""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((transcript, scenario, future))
+        logger.info(
+            "Queued analysis for %s (%d pending)", scenario["id"], self.queue.qsize()
+        )
+        return future
+
+    async def _worker(self, worker_id: int):
+        while True:
+            item = await self.queue.get()
+            try:
+                if item is None:
+                    return
+                transcript, scenario, future = item
+                started = time.monotonic()
+                if self._running == 0:
+                    self._active_since = started
+                self._running += 1
+                try:
+                    report = await analyze_transcript(transcript, scenario)
+                    if not future.done():
+                        future.set_result(report)
+                except Exception as e:
+                    logger.error("Analysis failed for %s: %s", scenario["id"], e)
+                    if not future.done():
+                        future.set_result(None)
+                finally:
+                    ended = time.monotonic()
+                    self.busy_seconds += ended - started
+                    self._running -= 1
+                    if self._running == 0:
+                        self.active_seconds += ended - self._active_since
+            finally:
+                self.queue.task_done()
+
+    async def drain(self):
+        """Wait for all pending analyses to finish and stop the workers."""
+        started = time.monotonic()
+        for _ in self.tasks:
+            await self.queue.put(None)
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks.clear()
+        self.drain_wait_seconds = time.monotonic() - started
+
+    def cancel(self):
+        """Stop the workers without waiting; unfinished analyses are dropped."""
+        for task in self.tasks:
+            task.cancel()
+        self.tasks.clear()
+
+    @property
+    def overlap_saved_seconds(self) -> float:
+        """Analysis time that ran concurrently with calls instead of blocking them.
+
+        Measured in wall-clock time, so analyses running side by side on
+        several workers are not counted twice.
+        """
+        return max(0.0, self.active_seconds - self.drain_wait_seconds)
@@ -0,0 +1,233 @@
+"""Re-run bug detection over every stored transcript.
+
+Transcripts in output/transcripts/ are split across a process pool and
+analyzed with BugDetector (and optionally the LLM review). A transcript is
+skipped when its content, its scenario definition, the detector version and
+the detector settings (non-sequitur threshold and minimum terms) are
+unchanged since the last run, so only new or affected files are
+reprocessed.
+
+    python -m app.pipeline.batch_analysis              # Rules only
+    python -m app.pipeline.batch_analysis --llm        # Include LLM review
+    python -m app.pipeline.batch_analysis --force      # Ignore the index
+"""
+import argparse
+import asyncio
+import glob
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from app import config
+from app.analysis.bug_detector import BugDetector, DETECTOR_VERSION, detector_settings
+from app.analysis.report_generator import generate_report
+from app.analysis.review_cache import get_review_cache, stats_since
+from app.scenarios.loader import load_all_scenarios
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+BATCH_DIR = os.path.join(config.REPORTS_DIR, "batch")
+INDEX_PATH = os.path.join(BATCH_DIR, "index.json")
+
+
+def scenario_hash(scenario: dict) -> str:
+    return hashlib.sha256(json.dumps(scenario, sort_keys=True).encode()).hexdigest()
+
+
+def load_index() -> dict:
+    if not os.path.exists(INDEX_PATH):
+        return {}
+    with open(INDEX_PATH) as f:
+        return json.load(f)
+
+
+def analyze_file(path: str, scenario: dict, with_llm: bool) -> dict:
+    """Analyze one transcript file in a worker process and save its report."""
+    with open(path) as f:
+        transcript = json.load(f)
+
+    detector = BugDetector()
+    findings = detector.analyze(transcript, scenario)
+    if with_llm:
+        try:
+            findings.extend(asyncio.run(detector.llm_review(transcript, scenario)))
+        except Exception as e:
+            logger.warning("LLM review failed for %s: %s", path, e)
+
+    report = generate_report(transcript, findings, scenario)
+    report["transcript_path"] = path
+    report["detector_version"] = DETECTOR_VERSION
+    report["detector_settings"] = detector_settings()
+
+    name = os.path.splitext(os.path.basename(path))[0]
+    report_path = os.path.join(BATCH_DIR, f"report_{name}.json")
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    return {"report_path": report_path, "summary": report["summary"], "findings": findings}
+
+
+def summarize(index: dict) -> dict:
+    """Aggregate finding counts from every indexed report."""
+    by_severity: dict[str, int] = {}
+    by_type: dict[str, int] = {}
+    by_scenario: dict[str, dict] = {}
+    for entry in index.values():
+        scenario = by_scenario.setdefault(entry["scenario_id"], {"transcripts": 0, "findings": 0})
+        scenario["transcripts"] += 1
+        for finding in entry["findings"]:
+            scenario["findings"] += 1
+            severity = finding.get("severity", "unknown")
+            by_severity[severity] = by_severity.get(severity, 0) + 1
+            ftype = finding.get("type", "unknown")
+            by_type[ftype] = by_type.get(ftype, 0) + 1
+    return {
+        "detector_version": DETECTOR_VERSION,
+        "detector_settings": detector_settings(),
+        "transcripts": len(index),
+        "findings": sum(by_severity.values()),
+        "by_severity": by_severity,
+        "by_type": dict(sorted(by_type.items(), key=lambda kv: -kv[1])),
+        "by_scenario": by_scenario,
+    }
+
+
+def run_batch_analysis(
+    workers: int,
+    with_llm: bool = False,
+    force: bool = False,
+) -> dict:
+    """Analyze new or stale transcripts in parallel and rewrite the summary."""
+    os.makedirs(BATCH_DIR, exist_ok=True)
+    scenarios = {s["id"]: s for s in load_all_scenarios()}
+    index = {} if force else load_index()
+
+    paths = sorted(glob.glob(os.path.join(config.TRANSCRIPTS_DIR, "*.json")))
+    present = {os.path.basename(p) for p in paths}
+    index = {name: entry for name, entry in index.items() if name in present}
+
+    todo = []
+    skipped = 0
+    for path in paths:
+        name = os.path.basename(path)
+        with open(path, "rb") as f:
+            content = f.read()
+        content_hash = hashlib.sha256(content).hexdigest()
+
+        entry = index.get(name)
+        if entry and entry.get("content_hash") == content_hash:
+            scenario_id = entry["scenario_id"]
+        else:
+            try:
+                scenario_id = json.loads(content)["scenario_id"]
+            except (ValueError, KeyError, TypeError):
+                logger.warning("Skipping unreadable transcript: %s", name)
+                continue
+        scenario = scenarios.get(scenario_id)
+        if scenario is None:
+            logger.warning("Skipping %s: unknown scenario %s", name, scenario_id)
+            continue
+
+        key = {
+            "content_hash": content_hash,
+            "scenario_hash": scenario_hash(scenario),
+            "detector_version": DETECTOR_VERSION,
+            "detector_settings": detector_settings(),
+            "llm": with_llm,
+        }
+        if entry and all(entry.get(k) == v for k, v in key.items() if k != "llm") and (
+            entry.get("llm") or not with_llm
+        ):
+            skipped += 1
+            continue
+        todo.append((name, path, scenario, key))
+
+    logger.info(
+        "%d transcripts to analyze, %d already current (%d workers)",
+        len(todo), skipped, workers,
+    )
+
+    cache = get_review_cache() if with_llm else None
+    cache_before = cache.stats() if cache else None
+
+    started = time.perf_counter()
+    if todo:
+        with ProcessPoolExecutor(max_workers=max(1, min(workers, len(todo)))) as pool:
+            futures = {
+                pool.submit(analyze_file, path, scenario, with_llm): (name, scenario, key)
+                for name, path, scenario, key in todo
+            }
+            for future in as_completed(futures):
+                name, scenario, key = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error("Analysis failed for %s: %s", name, e)
+                    continue
+                index[name] = {
+                    **key,
+                    "scenario_id": scenario["id"],
+                    "report_path": result["report_path"],
+                    "summary": result["summary"],
+                    "findings": [
+                        {"type": f.get("type"), "severity": f.get("severity")}
+                        for f in result["findings"]
+                    ],
+                }
+
+    with open(INDEX_PATH, "w") as f:
+        json.dump(index, f, indent=2)
+
+    summary = summarize(index)
+    summary["analyzed"] = len(todo)
+    summary["skipped"] = skipped
+    summary["elapsed_seconds"] = round(time.perf_counter() - started, 2)
+    if cache:
+        summary["review_cache"] = stats_since(cache_before, cache.stats())
+    with open(os.path.join(BATCH_DIR, "summary.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-run bug detection over stored transcripts")
+    parser.add_argument(
+        "--workers", "-w",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes (default: CPU count)",
+    )
+    parser.add_argument(
+        "--llm",
+        action="store_true",
+        help="Also run the Ollama LLM review for each transcript",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Reanalyze every transcript even if it is current",
+    )
+    args = parser.parse_args()
+
+    summary = run_batch_analysis(workers=args.workers, with_llm=args.llm, force=args.force)
+
+    print(f"\nAnalyzed {summary['analyzed']} transcripts, {summary['skipped']} already current "
+          f"({summary['elapsed_seconds']:.1f}s)")
+    print(f"Corpus: {summary['transcripts']} transcripts, {summary['findings']} findings")
+    for severity in ("critical", "high", "medium", "low"):
+        print(f"  {severity}: {summary['by_severity'].get(severity, 0)}")
+    if "review_cache" in summary:
+        rc = summary["review_cache"]
+        print(f"LLM review cache: {rc['hits']} hits, {rc['misses']} misses "
+              f"({rc['hit_rate']:.0%} hit rate)")
+    print(f"Reports saved to: {BATCH_DIR}")
+
+
+if __name__ == "__main__":
+    main()
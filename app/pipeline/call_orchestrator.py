@@ -1,80 +1,88 @@
 import asyncio
 import logging
+import time
 
-from app.telephony.twilio_call import make_call
-from app.telephony.media_stream import (
-    set_scenario,
-    get_call_complete_event,
-    get_last_transcript,
-)
-from app.analysis.bug_detector import BugDetector
-from app.analysis.report_generator import generate_report, save_report
+from app.telephony.twilio_call import CallPlacementError, get_call_placer
+from app.telephony.call_sessions import get_call_sessions, lifecycle_summary
+from app.analysis.call_store import get_call_store
+from app.pipeline.analysis_worker import analyze_transcript
 from app import config
 
 logger = logging.getLogger(__name__)
 
 
-async def run_call(scenario: dict, webhook_url: str) -> dict | None:
-    """Execute a single test call for a given scenario.
+async def place_call(scenario: dict, webhook_url: str, lifecycle: dict | None = None) -> dict | None:
+    """Place a single test call and wait for it to finish.
 
-    1. Set the scenario for the media stream handler
+    1. Take a concurrent-call slot from the shared CallPlacer
     2. Initiate the outbound call via SignalWire
-    3. Wait for the call and media stream to complete
-    4. Analyze the transcript for bugs
-    5. Generate and save a report
+    3. Register the call's scenario in the session store, where the server
+       worker that receives the media stream looks it up by CallSid
+    4. Wait for the media stream to finish, or for a status callback
+       saying the call ended without it (busy, no-answer, failed, canceled)
+    5. Load the transcript the media stream saved to the call store
 
-    Returns the analysis report dict, or None if the call failed.
+    The server may run in this process or in other processes on the same
+    output directory. If `lifecycle` is given it is filled with the call's
+    final status, ring time and answer latency (see
+    call_sessions.lifecycle_summary); the same summary is attached to the
+    transcript as `call_lifecycle`.
+
+    Returns the call transcript, or None if the call failed.
     """
     logger.info("=" * 60)
     logger.info("Starting scenario: %s (%s)", scenario["name"], scenario["id"])
     logger.info("=" * 60)
 
-    # Set scenario for the WebSocket handler
-    set_scenario(scenario)
-
-    # Initiate the call
-    try:
-        call_sid = make_call(webhook_url)
-        logger.info("Call SID: %s", call_sid)
-    except Exception as e:
-        logger.error("Failed to initiate call: %s", e)
-        return None
-
-    # Wait for the call to complete
-    complete_event = get_call_complete_event()
-    if complete_event:
+    placer = get_call_placer()
+    sessions = get_call_sessions()
+    async with placer.slot():
+        # Initiate the call
+        created_at = time.time()
         try:
-            await asyncio.wait_for(complete_event.wait(), timeout=config.MAX_CALL_DURATION_S + 30)
-        except asyncio.TimeoutError:
-            logger.warning("Call timed out waiting for completion")
+            call_sid = await placer.create_call(webhook_url)
+            logger.info("Call SID: %s", call_sid)
+        except CallPlacementError as e:
+            logger.error("Failed to initiate call: %s", e)
+            if lifecycle is not None:
+                lifecycle.update(call_sid=None, status="not-created", answered=False, error=str(e))
+            return None
+        try:
+            await asyncio.to_thread(sessions.register, call_sid, scenario, created_at)
+            session = await sessions.wait_for_call(call_sid, timeout=config.MAX_CALL_DURATION_S + 30)
+        except BaseException:
+            # The run was cancelled or the session store failed: don't leave
+            # the call ringing or talking
+            await placer.hang_up(call_sid)
+            raise
+
+    summary = lifecycle_summary(session)
+    logger.info("Call %s %s (ring time %s s, answer latency %s s)", call_sid, summary["status"],
+                summary["ring_time_s"], summary["answer_latency_s"])
+    if lifecycle is not None:
+        lifecycle.update(summary)
 
     # Get the transcript
-    transcript = get_last_transcript()
+    transcript = None
+    if session["transcript_call_id"]:
+        transcript = await asyncio.to_thread(get_call_store().transcript, session["transcript_call_id"])
     if not transcript or transcript.get("turn_count", 0) == 0:
         logger.warning("No transcript available for scenario %s", scenario["id"])
         return None
 
-    # Analyze for bugs
-    logger.info("Analyzing transcript for bugs...")
-    detector = BugDetector()
-    findings = detector.analyze(transcript, scenario)
+    transcript["call_lifecycle"] = summary
+    return transcript
 
-    # LLM-based review
-    try:
-        llm_findings = await detector.llm_review(transcript, scenario)
-        findings.extend(llm_findings)
-    except Exception as e:
-        logger.warning("LLM review failed: %s", e)
 
-    # Generate report
-    report = generate_report(transcript, findings, scenario)
-    save_report(report, scenario["id"])
+async def run_call(scenario: dict, webhook_url: str) -> dict | None:
+    """Execute a single test call for a given scenario.
 
-    bug_count = len(findings)
-    critical = sum(1 for f in findings if f.get("severity") == "critical")
-    logger.info(
-        "Scenario %s complete: %d bugs found (%d critical)",
-        scenario["id"], bug_count, critical,
-    )
+    Places the call, then analyzes the transcript inline and saves a report.
+    Use place_call with an AnalysisWorker to overlap analysis with later calls.
 
-    return report
+    Returns the analysis report dict, or None if the call failed.
+    """
+    transcript = await place_call(scenario, webhook_url)
+    if transcript is None:
+        return None
+    return await analyze_transcript(transcript, scenario)
@@ -0,0 +1,113 @@
+"""Coordinator that runs a suite's scenarios on worker nodes through the job queue.
+
+Each scenario becomes one job. Worker nodes (app.pipeline.worker_node)
+claim jobs, place the call, analyze it and hand back the transcript and
+report. The coordinator tracks the jobs in the run manifest and writes
+every returned transcript and report to its local call store, so a run
+spread over several machines still ends up in one place.
+"""
+import asyncio
+import logging
+import os
+import time
+
+from app import config
+from app.analysis.call_store import get_call_store
+from app.pipeline.job_queue import DONE as JOB_DONE, FAILED as JOB_FAILED, LEASED, JobQueue, open_job_queue
+from app.pipeline.run_manifest import CALLING, DONE, FAILED, PENDING, RunManifest
+
+logger = logging.getLogger(__name__)
+
+
+def store_result(job: dict) -> dict:
+    """Write a finished job's transcript and report to the local call store.
+
+    Runs in a thread. Returns the fields to checkpoint in the manifest,
+    which the caller applies on the event loop.
+    """
+    result = job["result"] or {}
+    store = get_call_store()
+    transcript = result.get("transcript")
+    report = result.get("report")
+    if transcript:
+        store.save_transcript(
+            transcript, os.path.join(config.TRANSCRIPTS_DIR, f"{transcript['call_id']}.json")
+        )
+    report_path = None
+    if report:
+        report_path = os.path.join(config.REPORTS_DIR, f"report_{report['report_id']}.json")
+        report["report_path"] = report_path
+        store.save_report(report, report_path)
+
+    return dict(
+        status=DONE,
+        call_id=result.get("call_id"),
+        report_path=report_path,
+        bugs_found=len((report or {}).get("findings", [])),
+        summary=(report or {}).get("summary"),
+        lifecycle=result.get("lifecycle"),
+        node=job["lease_owner"],
+        attempts=job["attempts"],
+        finished_at=time.time(),
+        error=None,
+    )
+
+
+async def run_distributed(
+    manifest: RunManifest,
+    scenarios: list[dict],
+    queue: JobQueue | None = None,
+    poll_s: float | None = None,
+):
+    """Enqueue `scenarios` for the run and wait until every job is done or failed.
+
+    Job status changes are mirrored into the manifest as they are seen:
+    a leased job is calling, and a finished job is done or failed.
+    """
+    queue = queue or open_job_queue()
+    poll_s = config.JOB_POLL_S if poll_s is None else poll_s
+    job_ids = await asyncio.to_thread(
+        queue.enqueue, manifest.run_id, scenarios, config.JOB_MAX_ATTEMPTS
+    )
+    manifest.data["settings"].setdefault("job_ids", []).extend(job_ids)
+    for scenario in scenarios:
+        await manifest.update_async(scenario["id"], status=PENDING)
+    logger.info("Queued %d jobs for run %s on %s", len(job_ids), manifest.run_id, config.JOB_QUEUE_URL)
+
+    seen: dict[str, tuple] = {}
+    pending = set(job_ids)
+    try:
+        while pending:
+            for job in await asyncio.to_thread(queue.jobs, list(pending)):
+                key = (job["status"], job["attempts"], job["lease_owner"])
+                if seen.get(job["job_id"]) == key:
+                    continue
+                seen[job["job_id"]] = key
+                sid = job["scenario_id"]
+
+                if job["status"] == LEASED:
+                    logger.info("[%s] attempt %d on %s", sid, job["attempts"], job["lease_owner"])
+                    await manifest.update_async(sid, status=CALLING, node=job["lease_owner"],
+                                                attempts=job["attempts"])
+                elif job["status"] == JOB_DONE:
+                    pending.discard(job["job_id"])
+                    bugs = len(((job["result"] or {}).get("report") or {}).get("findings", []))
+                    logger.info("[%s] done on %s: %d bugs", sid, job["lease_owner"], bugs)
+                    fields = await asyncio.to_thread(store_result, job)
+                    await manifest.update_async(sid, **fields)
+                elif job["status"] == JOB_FAILED:
+                    pending.discard(job["job_id"])
+                    logger.warning("[%s] failed after %d attempts: %s", sid, job["attempts"], job["error"])
+                    await manifest.update_async(
+                        sid, status=FAILED, error=job["error"], attempts=job["attempts"],
+                        lifecycle=(job["result"] or {}).get("lifecycle"),
+                    )
+                elif job["error"]:
+                    logger.warning("[%s] attempt %d failed (%s); requeued", sid, job["attempts"], job["error"])
+            if pending:
+                await asyncio.sleep(poll_s)
+    except (asyncio.CancelledError, KeyboardInterrupt):
+        # Keep unfinished jobs from being picked up after the coordinator is gone
+        await asyncio.to_thread(queue.cancel, list(pending))
+        raise
+    await asyncio.to_thread(get_call_store().flush)
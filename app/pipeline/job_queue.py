@@ -0,0 +1,236 @@
+"""Leased job queue that shards suite scenarios over worker nodes.
+
+A coordinator enqueues one job per scenario. Workers claim a job, which
+leases it to them for `lease_s` seconds, and renew the lease while the call
+runs. If a worker dies, its lease runs out and the job goes back to the
+queue. A job that fails is retried until it has used `max_attempts`.
+
+Job status moves queued -> leased -> done, or to failed once its attempts
+are used up. The SQLite backend covers workers on one machine or on a
+shared filesystem. Other backends are registered in QUEUE_BACKENDS by URL
+scheme.
+"""
+import json
+import logging
+import os
+import sqlite3
+import time
+import uuid
+from abc import ABC, abstractmethod
+
+from app import config
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    scenario_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, lease_expires, created_at);
+CREATE INDEX IF NOT EXISTS jobs_run ON jobs (run_id);
+"""
+
+
+class JobQueue(ABC):
+    """Interface of a job queue backend."""
+
+    @abstractmethod
+    def enqueue(self, run_id: str, scenarios: list[dict], max_attempts: int) -> list[str]:
+        """Add one job per scenario. Returns the job ids in order."""
+
+    @abstractmethod
+    def claim(self, worker_id: str, lease_s: float) -> dict | None:
+        """Lease the oldest runnable job to a worker, or return None."""
+
+    @abstractmethod
+    def renew(self, job_id: str, worker_id: str, lease_s: float) -> bool:
+        """Extend a lease. Returns False if the worker no longer holds it."""
+
+    @abstractmethod
+    def complete(self, job_id: str, worker_id: str, result: dict) -> bool:
+        """Mark a job done with its result. Returns False if the worker no longer holds it."""
+
+    @abstractmethod
+    def fail(self, job_id: str, worker_id: str, error: str, result: dict | None = None) -> bool:
+        """Give a job back for a retry, or mark it failed when out of attempts.
+
+        `result` keeps whatever the failed attempt learned, e.g. the call's status.
+        """
+
+    @abstractmethod
+    def cancel(self, job_ids: list[str]) -> int:
+        """Mark jobs that are not finished as failed. Returns how many changed."""
+
+    @abstractmethod
+    def jobs(self, job_ids: list[str]) -> list[dict]:
+        """The current state of the given jobs."""
+
+
+class SQLiteJobQueue(JobQueue):
+    """Job queue in a SQLite file shared by the coordinator and its workers."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        db = self.connect()
+        try:
+            db.executescript(SCHEMA)
+        finally:
+            db.close()
+
+    def connect(self) -> sqlite3.Connection:
+        # Autocommit mode, so claim() can take the write lock up front
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.row_factory = sqlite3.Row
+        return db
+
+    def enqueue(self, run_id: str, scenarios: list[dict], max_attempts: int) -> list[str]:
+        now = time.time()
+        job_ids = [uuid.uuid4().hex for _ in scenarios]
+        db = self.connect()
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            db.executemany(
+                "INSERT INTO jobs (job_id, run_id, scenario_id, payload, status, max_attempts, "
+                "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    # created_at is offset per job so claims keep the suite's order
+                    (job_id, run_id, s["id"], json.dumps(s, default=str), QUEUED, max_attempts,
+                     now + i * 1e-6, now)
+                    for i, (job_id, s) in enumerate(zip(job_ids, scenarios))
+                ],
+            )
+            db.execute("COMMIT")
+        finally:
+            db.close()
+        return job_ids
+
+    def claim(self, worker_id: str, lease_s: float) -> dict | None:
+        now = time.time()
+        db = self.connect()
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            # Jobs whose worker stopped renewing its lease are claimable again,
+            # unless that lease used up the last attempt
+            db.execute(
+                "UPDATE jobs SET status = ?, error = 'lease expired', lease_owner = NULL, "
+                "updated_at = ? WHERE status = ? AND lease_expires < ? AND attempts >= max_attempts",
+                (FAILED, now, LEASED, now),
+            )
+            row = db.execute(
+                "SELECT * FROM jobs WHERE status = ? OR (status = ? AND lease_expires < ?) "
+                "ORDER BY created_at LIMIT 1",
+                (QUEUED, LEASED, now),
+            ).fetchone()
+            if row is None:
+                db.execute("COMMIT")
+                return None
+            if row["status"] == LEASED:
+                logger.warning("Lease of job %s (%s) held by %s expired; reclaiming",
+                               row["job_id"], row["scenario_id"], row["lease_owner"])
+            db.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_owner = ?, "
+                "lease_expires = ?, updated_at = ? WHERE job_id = ?",
+                (LEASED, worker_id, now + lease_s, now, row["job_id"]),
+            )
+            db.execute("COMMIT")
+        finally:
+            db.close()
+        job = self._job(row)
+        job.update(status=LEASED, attempts=row["attempts"] + 1, lease_owner=worker_id)
+        return job
+
+    def _finish(self, sql: str, params: tuple) -> bool:
+        db = self.connect()
+        try:
+            return db.execute(sql, params).rowcount == 1
+        finally:
+            db.close()
+
+    def renew(self, job_id: str, worker_id: str, lease_s: float) -> bool:
+        now = time.time()
+        return self._finish(
+            "UPDATE jobs SET lease_expires = ?, updated_at = ? "
+            "WHERE job_id = ? AND status = ? AND lease_owner = ?",
+            (now + lease_s, now, job_id, LEASED, worker_id),
+        )
+
+    def complete(self, job_id: str, worker_id: str, result: dict) -> bool:
+        return self._finish(
+            "UPDATE jobs SET status = ?, result = ?, error = NULL, lease_expires = NULL, "
+            "updated_at = ? WHERE job_id = ? AND status = ? AND lease_owner = ?",
+            (DONE, json.dumps(result, default=str), time.time(), job_id, LEASED, worker_id),
+        )
+
+    def fail(self, job_id: str, worker_id: str, error: str, result: dict | None = None) -> bool:
+        return self._finish(
+            "UPDATE jobs SET status = CASE WHEN attempts >= max_attempts THEN ? ELSE ? END, "
+            "error = ?, result = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+            "WHERE job_id = ? AND status = ? AND lease_owner = ?",
+            (FAILED, QUEUED, error, json.dumps(result, default=str) if result else None,
+             time.time(), job_id, LEASED, worker_id),
+        )
+
+    def cancel(self, job_ids: list[str]) -> int:
+        db = self.connect()
+        try:
+            return db.executemany(
+                "UPDATE jobs SET status = ?, error = 'canceled', lease_owner = NULL, "
+                "lease_expires = NULL, updated_at = ? WHERE job_id = ? AND status IN (?, ?)",
+                [(FAILED, time.time(), job_id, QUEUED, LEASED) for job_id in job_ids],
+            ).rowcount
+        finally:
+            db.close()
+
+    def jobs(self, job_ids: list[str]) -> list[dict]:
+        db = self.connect()
+        try:
+            rows = {}
+            for job_id in job_ids:
+                row = db.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+                if row is not None:
+                    rows[job_id] = self._job(row)
+        finally:
+            db.close()
+        return [rows[job_id] for job_id in job_ids if job_id in rows]
+
+    @staticmethod
+    def _job(row: sqlite3.Row) -> dict:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+
+QUEUE_BACKENDS = {
+    "sqlite": lambda location: SQLiteJobQueue(location),
+}
+
+
+def open_job_queue(url: str | None = None) -> JobQueue:
+    """Open the queue at `url` (default config.JOB_QUEUE_URL), e.g. sqlite:///path/jobs.sqlite."""
+    url = url or config.JOB_QUEUE_URL
+    scheme, sep, location = url.partition("://")
+    if not sep:
+        scheme, location = "sqlite", url
+    if scheme not in QUEUE_BACKENDS:
+        raise ValueError(f"Unknown job queue backend '{scheme}' in {url}")
+    return QUEUE_BACKENDS[scheme](location)
@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+from app import config
+
+logger = logging.getLogger(__name__)
+
+
+class LoopMonitor:
+    """Samples asyncio event-loop lag and records stalls with the blocking stack.
+
+    A heartbeat coroutine sleeps for `interval_ms` and measures how late it
+    wakes up. A watchdog thread notices when the heartbeat is overdue by more
+    than `threshold_ms` and captures the loop thread's stack while it is still
+    blocked, so each stall points at the offending call.
+    """
+
+    def __init__(
+        self,
+        interval_ms: int = 20,
+        threshold_ms: int = 100,
+        max_stalls: int = 500,
+        stack_depth: int = 12,
+    ):
+        self.interval_ms = interval_ms
+        self.threshold_ms = threshold_ms
+        self.stack_depth = stack_depth
+        self.stalls: deque[dict] = deque(maxlen=max_stalls)
+        self.samples = 0
+        self.max_lag_ms = 0.0
+
+        self._lock = threading.Lock()
+        self._last_beat = time.monotonic()
+        self._pending_stack: list[str] | None = None
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Start monitoring the running event loop. Safe to call more than once."""
+        if self.running:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watchdog, name="loop-monitor", daemon=True)
+        self._thread.start()
+        logger.info(
+            "Loop monitor started (interval=%dms, threshold=%dms)",
+            self.interval_ms, self.threshold_ms,
+        )
+
+    def stop(self):
+        self._stopped.set()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _heartbeat(self):
+        interval = self.interval_ms / 1000
+        while True:
+            with self._lock:
+                self._last_beat = time.monotonic()
+            expected = self._last_beat + interval
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            lag_ms = max(0.0, (now - expected) * 1000)
+
+            with self._lock:
+                self.samples += 1
+                self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+                stack = self._pending_stack
+                self._pending_stack = None
+
+            if lag_ms >= self.threshold_ms:
+                stall = {
+                    "at": expected,
+                    "duration_ms": round(lag_ms, 1),
+                    "stack": stack or [],
+                }
+                self.stalls.append(stall)
+                logger.warning(
+                    "Event loop stalled for %.0fms%s", lag_ms,
+                    f" in {stack[-1].strip().splitlines()[0]}" if stack else "",
+                )
+
+    def _watchdog(self):
+        check_interval = max(self.threshold_ms / 4000, 0.005)
+        overdue_after = (self.interval_ms + self.threshold_ms) / 1000
+        while not self._stopped.wait(check_interval):
+            with self._lock:
+                overdue = time.monotonic() - self._last_beat >= overdue_after
+                captured = self._pending_stack is not None
+            if not overdue or captured:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = traceback.format_stack(frame)[-self.stack_depth:]
+            with self._lock:
+                if self._pending_stack is None:
+                    self._pending_stack = stack
+
+    def stats(self, since: float = 0.0, until: float | None = None, worst: int = 5) -> dict:
+        """Summarize stalls that started within [since, until] (time.monotonic())."""
+        until = until if until is not None else time.monotonic()
+        window = [s for s in list(self.stalls) if since <= s["at"] <= until]
+        window_sorted = sorted(window, key=lambda s: s["duration_ms"], reverse=True)
+        return {
+            "threshold_ms": self.threshold_ms,
+            "stall_count": len(window),
+            "total_stall_ms": round(sum(s["duration_ms"] for s in window), 1),
+            "max_stall_ms": window_sorted[0]["duration_ms"] if window_sorted else 0.0,
+            "worst_stalls": [
+                {
+                    "offset_s": round(s["at"] - since, 2) if since else None,
+                    "duration_ms": s["duration_ms"],
+                    "stack": s["stack"],
+                }
+                for s in window_sorted[:worst]
+            ],
+        }
+
+
+loop_monitor = LoopMonitor(
+    interval_ms=config.LOOP_MONITOR_INTERVAL_MS,
+    threshold_ms=config.LOOP_STALL_THRESHOLD_MS,
+)
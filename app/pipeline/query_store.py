@@ -0,0 +1,164 @@
+"""Query the call store, or import existing output directories into it.
+
+    python -m app.pipeline.query_store import
+    python -m app.pipeline.query_store findings --scenario billing --severity critical --since 2026-10-01
+    python -m app.pipeline.query_store calls --run 20261019_142500
+    python -m app.pipeline.query_store show billing_20261019_142512_3fa2c1
+    python -m app.pipeline.query_store counts --since 2026-10-01
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import time
+
+from app import config
+from app.analysis.call_store import get_call_store, insert_report, insert_transcript
+from app.analysis.transcript_logger import format_transcript_text
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+
+def parse_date(value: str) -> float:
+    """Epoch seconds for YYYY-MM-DD or YYYY-MM-DD HH:MM:SS (local time)."""
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d"):
+        try:
+            return time.mktime(time.strptime(value, fmt))
+        except ValueError:
+            continue
+    raise argparse.ArgumentTypeError(f"Not a date: {value}")
+
+
+def import_outputs(transcripts_dir: str, reports_dir: str) -> dict:
+    """Import stored transcript and report JSON files in one transaction.
+
+    Files written before the store existed are named by scenario and
+    timestamp; that file stem becomes the call id, and a report named
+    `report_<stem>.json` is linked to the transcript with the same stem.
+    """
+    store = get_call_store()
+    counts = {"transcripts": 0, "reports": 0, "skipped": 0}
+    with store.connect() as db:
+        for path in sorted(glob.glob(os.path.join(transcripts_dir, "*.json"))):
+            try:
+                with open(path) as f:
+                    transcript = json.load(f)
+                transcript.setdefault("call_id", os.path.splitext(os.path.basename(path))[0])
+                insert_transcript(db, transcript, path)
+                counts["transcripts"] += 1
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning("Skipping transcript %s: %s", path, e)
+                counts["skipped"] += 1
+
+        for path in sorted(glob.glob(os.path.join(reports_dir, "report_*.json"))):
+            try:
+                with open(path) as f:
+                    report = json.load(f)
+                stem = os.path.splitext(os.path.basename(path))[0][len("report_"):]
+                report.setdefault("report_id", stem)
+                if not report.get("call_id"):
+                    report["call_id"] = stem
+                insert_report(db, report, path)
+                counts["reports"] += 1
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning("Skipping report %s: %s", path, e)
+                counts["skipped"] += 1
+    return counts
+
+
+def _when(epoch: float | None) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(epoch)) if epoch else "-"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the call store")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    imp = sub.add_parser("import", help="Import existing transcript and report files")
+    imp.add_argument("--transcripts", default=config.TRANSCRIPTS_DIR)
+    imp.add_argument("--reports", default=config.REPORTS_DIR)
+
+    fnd = sub.add_parser("findings", help="List findings")
+    fnd.add_argument("--scenario", "-s")
+    fnd.add_argument("--run", "-r")
+    fnd.add_argument("--severity")
+    fnd.add_argument("--type", "-t", dest="finding_type")
+    fnd.add_argument("--since", type=parse_date, help="YYYY-MM-DD[ HH:MM:SS]")
+    fnd.add_argument("--until", type=parse_date, help="YYYY-MM-DD[ HH:MM:SS]")
+    fnd.add_argument("--limit", "-n", type=int, default=100)
+
+    cls = sub.add_parser("calls", help="List calls with their bug counts")
+    cls.add_argument("--scenario", "-s")
+    cls.add_argument("--run", "-r")
+    cls.add_argument("--since", type=parse_date, help="YYYY-MM-DD[ HH:MM:SS]")
+    cls.add_argument("--limit", "-n", type=int, default=50)
+
+    show = sub.add_parser("show", help="Print one call's transcript")
+    show.add_argument("call_id")
+
+    cnt = sub.add_parser("counts", help="Finding counts by scenario, severity and type")
+    cnt.add_argument("--since", type=parse_date, help="YYYY-MM-DD[ HH:MM:SS]")
+
+    args = parser.parse_args()
+    store = get_call_store()
+
+    if args.command == "import":
+        counts = import_outputs(args.transcripts, args.reports)
+        print(f"Imported {counts['transcripts']} transcripts and {counts['reports']} reports "
+              f"({counts['skipped']} skipped) into {config.CALL_STORE_PATH}")
+        return
+
+    if args.command == "findings":
+        rows = store.findings(
+            scenario=args.scenario, run=args.run, severity=args.severity,
+            finding_type=args.finding_type, since=args.since, until=args.until, limit=args.limit,
+        )
+        if args.json:
+            print(json.dumps(rows, indent=2))
+            return
+        for r in rows:
+            print(f"{_when(r['generated_at'])}  {r['scenario_id']:<18} "
+                  f"[{(r['severity'] or '?').upper():<8}] {r['type']}  ({r['call_id']})")
+            print(f"    {r['reason']}")
+        print(f"{len(rows)} findings")
+
+    elif args.command == "calls":
+        rows = store.calls(scenario=args.scenario, run=args.run, since=args.since, limit=args.limit)
+        if args.json:
+            print(json.dumps(rows, indent=2))
+            return
+        for r in rows:
+            bugs = "not analyzed" if r["total_bugs"] is None else (
+                f"{r['total_bugs']} bugs ({r['critical']} critical, {r['high']} high)"
+            )
+            print(f"{_when(r['started_at'])}  {r['call_id']:<42} {r['turn_count'] or 0:>3} turns  "
+                  f"{bugs}")
+        print(f"{len(rows)} calls")
+
+    elif args.command == "show":
+        transcript = store.transcript(args.call_id)
+        if transcript is None:
+            print(f"No call {args.call_id}")
+            return
+        print(json.dumps(transcript, indent=2) if args.json else format_transcript_text(transcript))
+
+    elif args.command == "counts":
+        counts = store.counts(since=args.since)
+        if args.json:
+            print(json.dumps(counts, indent=2))
+            return
+        print(f"{counts['calls']} calls, {counts['reports']} reports")
+        for title, column in (("Scenario", "scenario_id"), ("Severity", "severity"), ("Type", "type")):
+            print(f"\n{title}:")
+            for key, n in counts[column].items():
+                print(f"  {key}: {n}")
+
+
+if __name__ == "__main__":
+    main()
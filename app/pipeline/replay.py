@@ -0,0 +1,349 @@
+"""Replay recorded calls through the inbound speech pipeline without pacing.
+
+Feeds the agent channel of each recording (see app.audio.call_recorder)
+through the same 8kHz silero VAD, TurnDetector, AudioBuffer, per-utterance
+resample and STT engine (a CascadeSTT when STT_CASCADE_MODEL is set) used
+live, on the media-stream clock instead of wall time. The recording already
+holds the PCM the live call decoded, so its samples are fed in unchanged. Recordings are spread over a process pool, and each
+result is compared against the turns logged in the original events sidecar.
+
+    python -m app.pipeline.replay                       # All recordings
+    python -m app.pipeline.replay output/recordings/billing_*.wav --silence-ms 500
+"""
+import argparse
+import asyncio
+import glob
+import json
+import logging
+import os
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from app import config
+from app.audio.audio_buffer import AudioBuffer
+from app.audio.frame_assembler import FrameAssembler
+from app.audio.resampler import resample_audio
+from app.speech.turn_detector import TurnDetector, TurnState
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+FRAME_SAMPLES = 160  # 20ms at 8kHz, as delivered by the media stream
+FRAME_MS = 20
+
+# Per-process models, loaded once by the pool initializer
+_stt = None
+_vad = None
+
+
+def _init_worker(whisper_model: str, cascade_model: str, cpu_threads: int):
+    global _stt, _vad
+    import torch
+
+    from app.speech.stt_engine import build_stt_engine
+    from app.speech.vad import VADDetector
+
+    torch.set_num_threads(max(1, cpu_threads))
+    _stt = build_stt_engine(whisper_model, cascade_model, cpu_threads=cpu_threads)
+    _vad = VADDetector()
+
+
+def load_agent_frames(wav_path: str) -> list[np.ndarray]:
+    """Return the agent channel of a recording as 160-sample PCM frames.
+
+    The recorder stores the PCM the live call decoded from the inbound
+    mu-law, so the samples are used as they are.
+    """
+    with wave.open(wav_path, "rb") as wf:
+        channels = wf.getnchannels()
+        pcm = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+    agent = pcm.reshape(-1, channels)[:, 0]
+    return [agent[i:i + FRAME_SAMPLES] for i in range(0, len(agent), FRAME_SAMPLES)]
+
+
+def load_original_turns(wav_path: str) -> list[dict]:
+    """Return the agent turns logged live in the recording's events sidecar."""
+    events_path = wav_path[:-len(".wav")] + ".events.jsonl"
+    if not os.path.exists(events_path):
+        return []
+
+    turns = []
+    turn_end: float | None = None
+    with open(events_path) as f:
+        for line in f:
+            event = json.loads(line)
+            if event["type"] == "agent_turn_end":
+                turn_end = event["t"]
+            elif event["type"] == "agent_text" and turn_end is not None:
+                turns.append({"end_s": turn_end, "text": event["text"]})
+                turn_end = None
+    return turns
+
+
+async def _replay_frames(
+    frames: list[np.ndarray],
+    silence_threshold_ms: int,
+    min_speech_ms: int,
+    trial_duration_s: float,
+) -> list[dict]:
+    turn_detector = TurnDetector(
+        silence_threshold_ms=silence_threshold_ms,
+        min_speech_ms=min_speech_ms,
+    )
+    audio_buffer = AudioBuffer(max_duration_seconds=30, sample_rate=8000)
+    vad_frames = FrameAssembler(_vad.chunk_samples, _vad.sample_rate)
+    trial_ended = False
+    speech_start_ms: float | None = None
+    turns = []
+    _vad.reset()
+
+    for index, pcm_8k in enumerate(frames):
+        elapsed_ms = index * FRAME_MS
+
+        if elapsed_ms < trial_duration_s * 1000:
+            continue
+        if not trial_ended:
+            trial_ended = True
+            turn_detector.mark_trial_ended()
+            _vad.reset()
+
+        await audio_buffer.add_samples(pcm_8k)
+
+        for vad_chunk, frame_ms in vad_frames.push(pcm_8k, elapsed_ms):
+            is_speech = _vad.is_speech(vad_chunk)
+            prev_state = turn_detector.state
+            new_state = turn_detector.on_vad_result(is_speech, frame_ms)
+            if is_speech and speech_start_ms is None:
+                speech_start_ms = frame_ms
+
+            if new_state == TurnState.PROCESSING and prev_state != TurnState.PROCESSING:
+                audio_data = await audio_buffer.get_and_clear()
+                stt_started = time.perf_counter()
+                stt_info = None
+                if len(audio_data):
+                    text, confidence, stt_info = _stt.transcribe_detailed(
+                        resample_audio(audio_data, 8000, 16000)
+                    )
+                else:
+                    text, confidence = "", 0.0
+                stt_ms = (time.perf_counter() - stt_started) * 1000
+
+                if text.strip():
+                    turns.append({
+                        "speaker": "agent",
+                        "text": text,
+                        "confidence": round(confidence, 3),
+                        "start_s": round((speech_start_ms or elapsed_ms) / 1000, 2),
+                        "end_s": round(elapsed_ms / 1000, 2),
+                        "stt_ms": round(stt_ms, 1),
+                        "stt": stt_info,
+                    })
+                speech_start_ms = None
+                # Live, the patient reply is queued here and listening resumes
+                turn_detector.mark_listening()
+                _vad.reset()
+
+    return turns
+
+
+def diff_turns(original: list[dict], replayed: list[dict]) -> dict:
+    """Compare replayed agent turns against the original live run, in order."""
+    pairs = []
+    for i in range(max(len(original), len(replayed))):
+        orig = original[i] if i < len(original) else None
+        new = replayed[i] if i < len(replayed) else None
+        pair = {"index": i}
+        if orig and new:
+            pair["end_delta_s"] = round(new["end_s"] - orig["end_s"], 2)
+            pair["text_changed"] = orig["text"].strip().lower() != new["text"].strip().lower()
+        pair["original"] = orig["text"] if orig else None
+        pair["replayed"] = new["text"] if new else None
+        pairs.append(pair)
+
+    deltas = [p["end_delta_s"] for p in pairs if "end_delta_s" in p]
+    return {
+        "original_turns": len(original),
+        "replayed_turns": len(replayed),
+        "text_changed": sum(1 for p in pairs if p.get("text_changed")),
+        "mean_end_delta_s": round(sum(deltas) / len(deltas), 2) if deltas else None,
+        "turns": pairs,
+    }
+
+
+def replay_recording(
+    wav_path: str,
+    silence_threshold_ms: int,
+    min_speech_ms: int,
+    trial_duration_s: float,
+) -> dict:
+    """Replay one recording in a worker process. Returns its result dict."""
+    started = time.perf_counter()
+    frames = load_agent_frames(wav_path)
+    turns = asyncio.run(
+        _replay_frames(frames, silence_threshold_ms, min_speech_ms, trial_duration_s)
+    )
+    wall_s = time.perf_counter() - started
+    audio_s = len(frames) * FRAME_MS / 1000
+
+    return {
+        "recording": wav_path,
+        "audio_seconds": round(audio_s, 1),
+        "replay_seconds": round(wall_s, 2),
+        "speedup": round(audio_s / wall_s, 1) if wall_s else None,
+        "turns": turns,
+        "diff": diff_turns(load_original_turns(wav_path), turns),
+    }
+
+
+def run_replay(
+    recordings: list[str],
+    workers: int,
+    silence_threshold_ms: int,
+    min_speech_ms: int = 300,
+    whisper_model: str | None = None,
+    trial_duration_s: float | None = None,
+    cascade_model: str | None = None,
+) -> dict:
+    """Replay recordings across a process pool and write results to REPLAYS_DIR.
+
+    cascade_model defaults to STT_CASCADE_MODEL; pass "" to replay without
+    the cascade.
+    """
+    whisper_model = whisper_model or config.WHISPER_MODEL_SIZE
+    if cascade_model is None:
+        cascade_model = config.STT_CASCADE_MODEL
+    if trial_duration_s is None:
+        trial_duration_s = config.TRIAL_MESSAGE_DURATION_S
+    workers = max(1, min(workers, len(recordings)))
+    threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+
+    out_dir = os.path.join(config.REPLAYS_DIR, time.strftime("%Y%m%d_%H%M%S"))
+    os.makedirs(out_dir, exist_ok=True)
+    logger.info(
+        "Replaying %d recordings with %d workers (silence=%dms, whisper=%s, cascade=%s)",
+        len(recordings), workers, silence_threshold_ms, whisper_model, cascade_model or "off",
+    )
+
+    started = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(whisper_model, cascade_model, threads_per_worker),
+    ) as pool:
+        futures = {
+            pool.submit(
+                replay_recording, path, silence_threshold_ms, min_speech_ms, trial_duration_s
+            ): path
+            for path in recordings
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error("Replay failed for %s: %s", path, e)
+                continue
+            name = os.path.splitext(os.path.basename(path))[0]
+            with open(os.path.join(out_dir, f"{name}.json"), "w") as f:
+                json.dump(result, f, indent=2)
+            logger.info(
+                "%s: %d turns (%d originally), %.1fx real time",
+                name, len(result["turns"]), result["diff"]["original_turns"], result["speedup"] or 0,
+            )
+            results.append(result)
+
+    wall_s = time.perf_counter() - started
+    audio_s = sum(r["audio_seconds"] for r in results)
+    summary = {
+        "settings": {
+            "silence_threshold_ms": silence_threshold_ms,
+            "min_speech_ms": min_speech_ms,
+            "whisper_model": whisper_model,
+            "cascade_model": cascade_model,
+            "workers": workers,
+        },
+        "recordings": len(results),
+        "audio_seconds": round(audio_s, 1),
+        "wall_seconds": round(wall_s, 1),
+        "speedup": round(audio_s / wall_s, 1) if wall_s else None,
+        "text_changed_turns": sum(r["diff"]["text_changed"] for r in results),
+        "turn_count_changes": sum(
+            1 for r in results if r["diff"]["replayed_turns"] != r["diff"]["original_turns"]
+        ),
+        "output_dir": out_dir,
+    }
+    with open(os.path.join(out_dir, "summary.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded calls through the speech pipeline")
+    parser.add_argument(
+        "recordings",
+        nargs="*",
+        help="Recording WAV files (default: all in output/recordings/)",
+    )
+    parser.add_argument(
+        "--workers", "-w",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes (default: CPU count)",
+    )
+    parser.add_argument(
+        "--silence-ms",
+        type=int,
+        default=config.SILENCE_THRESHOLD_MS,
+        help=f"Turn-end silence threshold (default: {config.SILENCE_THRESHOLD_MS})",
+    )
+    parser.add_argument(
+        "--min-speech-ms",
+        type=int,
+        default=300,
+        help="Minimum speech before a turn can end (default: 300)",
+    )
+    parser.add_argument(
+        "--whisper-model",
+        type=str,
+        default=config.WHISPER_MODEL_SIZE,
+        help=f"Whisper model size (default: {config.WHISPER_MODEL_SIZE})",
+    )
+    parser.add_argument(
+        "--cascade-model",
+        type=str,
+        default=config.STT_CASCADE_MODEL,
+        help="Fast model tried first, as STT_CASCADE_MODEL; empty disables the cascade "
+             f"(default: {config.STT_CASCADE_MODEL or 'off'})",
+    )
+    args = parser.parse_args()
+
+    recordings = args.recordings or sorted(glob.glob(os.path.join(config.RECORDINGS_DIR, "*.wav")))
+    if not recordings:
+        logger.error("No recordings found. Record calls with RECORD_CALLS=1 first.")
+        return
+
+    summary = run_replay(
+        recordings,
+        workers=args.workers,
+        silence_threshold_ms=args.silence_ms,
+        min_speech_ms=args.min_speech_ms,
+        whisper_model=args.whisper_model,
+        cascade_model=args.cascade_model,
+    )
+    print(f"\nReplayed {summary['recordings']} recordings "
+          f"({summary['audio_seconds']:.0f}s audio) in {summary['wall_seconds']:.1f}s "
+          f"({summary['speedup']}x real time)")
+    print(f"Turns with changed text: {summary['text_changed_turns']}")
+    print(f"Recordings with a different turn count: {summary['turn_count_changes']}")
+    print(f"Results saved to: {summary['output_dir']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Control-plane HTTP API for test suite runs, mounted on the voice bot server.
+
+    POST /runs                    start a run (all scenarios, some, or a resume)
+    GET  /runs                    recent runs, newest first
+    GET  /runs/{run_id}           a run's manifest
+    POST /runs/{run_id}/cancel    stop a run
+    GET  /runs/{run_id}/events    progress as newline-delimited JSON
+
+Runs execute in the server worker that accepted the POST (see
+app.pipeline.run_service). python -m app.pipeline.run_test_suite is a
+client of these endpoints.
+
+The server port is reachable through the ngrok tunnel, and a run places
+paid calls, so every request must carry `Authorization: Bearer
+<RUN_API_TOKEN>`. Without RUN_API_TOKEN set the API is disabled.
+"""
+import asyncio
+import json
+import secrets
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from app import config
+from app.pipeline.run_manifest import RunManifest, valid_run_id
+from app.pipeline.run_service import RunNotFound, get_run_service, live_workers, run_info
+
+
+async def require_token(authorization: str = Header("")):
+    """Reject requests without the shared RUN_API_TOKEN."""
+    if not config.RUN_API_TOKEN:
+        raise HTTPException(status_code=503, detail="Run API disabled: set RUN_API_TOKEN in .env")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(
+        token.encode(), config.RUN_API_TOKEN.encode()
+    ):
+        raise HTTPException(status_code=401, detail="Missing or wrong run API token")
+
+
+def checked_run_id(run_id: str) -> str:
+    """Path parameter dependency: only generated run ids reach the filesystem."""
+    if not valid_run_id(run_id):
+        raise HTTPException(status_code=404, detail=f"No run manifest found for {run_id}")
+    return run_id
+
+
+router = APIRouter(prefix="/runs", dependencies=[Depends(require_token)])
+
+
+class RunRequest(BaseModel):
+    scenario_ids: list[str] | None = None
+    delay_between_calls: int = 10
+    resume: str | None = None
+    rerun_failed: bool = False
+    distributed: bool = False
+
+
+@router.post("", status_code=202)
+async def submit_run(request: RunRequest):
+    """Start a run in this server worker and return it without waiting."""
+    try:
+        manifest = await get_run_service().submit(
+            scenario_ids=request.scenario_ids,
+            delay_between_calls=request.delay_between_calls,
+            resume=request.resume,
+            rerun_failed=request.rerun_failed,
+            distributed=request.distributed,
+        )
+    except RunNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # The worker heartbeat query stays off the loop; the run's data stays on it
+    live = await asyncio.to_thread(live_workers)
+    return run_info(manifest.data, live)
+
+
+@router.get("")
+async def list_runs(limit: int = 20):
+    return await asyncio.to_thread(get_run_service().runs, limit)
+
+
+@router.get("/{run_id}")
+async def get_run(run_id: str = Depends(checked_run_id)):
+    manifest = await asyncio.to_thread(RunManifest.load, run_id)
+    if manifest is None:
+        raise HTTPException(status_code=404, detail=f"No run manifest found for {run_id}")
+    return manifest.data
+
+
+@router.post("/{run_id}/cancel", status_code=202)
+async def cancel_run(run_id: str = Depends(checked_run_id)):
+    try:
+        canceled = await get_run_service().cancel(run_id)
+    except RunNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if not canceled:
+        raise HTTPException(status_code=409, detail=f"Run {run_id} is not running")
+    return {"run_id": run_id, "cancel_requested": True}
+
+
+@router.get("/{run_id}/events")
+async def run_events(run_id: str = Depends(checked_run_id)):
+    """Stream a run's progress until it ends, one JSON object per line."""
+    if not await asyncio.to_thread(RunManifest.load, run_id):
+        raise HTTPException(status_code=404, detail=f"No run manifest found for {run_id}")
+
+    async def lines():
+        async for event in get_run_service().events(run_id):
+            yield json.dumps(event, default=str) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
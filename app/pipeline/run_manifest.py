@@ -0,0 +1,170 @@
+"""Per-run manifest that checkpoints each scenario's outcome as it finishes.
+
+The manifest lives at output/runs/<run_id>/manifest.json and is rewritten
+atomically on every status change, so an interrupted suite can be resumed
+with only its incomplete (or failed) scenarios.
+
+Scenario status moves pending -> calling -> analyzing -> done, or to
+failed if the call produced no transcript or its analysis failed. Runs
+started through the control API also record the run's own status
+(running, finished, canceled or error) and the server worker that owns it.
+"""
+import asyncio
+import glob
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+from app import config
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+CALLING = "calling"
+ANALYZING = "analyzing"
+DONE = "done"
+FAILED = "failed"
+
+# Status of the run as a whole, in data["status"]
+RUN_RUNNING = "running"
+RUN_FINISHED = "finished"
+RUN_CANCELED = "canceled"
+RUN_ERROR = "error"
+
+# Run ids as RunManifest.create generates them, e.g. 20261019_142500 or 20261019_142500_2
+RUN_ID_PATTERN = re.compile(r"\d{8}_\d{6}(_\d+)?")
+
+
+def valid_run_id(run_id: str) -> bool:
+    """Whether run_id has the generated form, so it is safe to use in a path."""
+    return bool(RUN_ID_PATTERN.fullmatch(run_id))
+
+
+class RunManifest:
+    """Checkpointed record of one test suite run."""
+
+    def __init__(self, path: str, data: dict):
+        self.path = path
+        self.data = data
+        # Saves may be written from worker threads; the newest snapshot wins
+        self._seq = 0
+        self._written_seq = 0
+        self._write_lock = threading.Lock()
+
+    @classmethod
+    def create(cls, scenarios: list[dict], settings: dict | None = None) -> "RunManifest":
+        # Claim the run directory, so runs started in the same second get distinct ids
+        base_id = run_id = time.strftime("%Y%m%d_%H%M%S")
+        os.makedirs(config.RUNS_DIR, exist_ok=True)
+        for n in range(2, 1000):
+            try:
+                os.mkdir(os.path.join(config.RUNS_DIR, run_id))
+                break
+            except FileExistsError:
+                run_id = f"{base_id}_{n}"
+        now = time.time()
+        data = {
+            "run_id": run_id,
+            "created_at": now,
+            "updated_at": now,
+            "settings": settings or {},
+            "scenario_ids": [s["id"] for s in scenarios],
+            "scenarios": {
+                s["id"]: {"scenario_name": s["name"], "status": PENDING, "attempts": 0}
+                for s in scenarios
+            },
+        }
+        manifest = cls(os.path.join(config.RUNS_DIR, run_id, "manifest.json"), data)
+        manifest.save()
+        return manifest
+
+    @classmethod
+    def load(cls, run_id: str) -> "RunManifest | None":
+        if not valid_run_id(run_id):
+            return None
+        path = os.path.join(config.RUNS_DIR, run_id, "manifest.json")
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return cls(path, json.load(f))
+
+    @classmethod
+    def run_ids(cls) -> list[str]:
+        """Ids of all runs with a manifest, oldest first."""
+        paths = sorted(glob.glob(os.path.join(config.RUNS_DIR, "*", "manifest.json")))
+        return [os.path.basename(os.path.dirname(p)) for p in paths]
+
+    @classmethod
+    def latest(cls) -> "RunManifest | None":
+        run_ids = cls.run_ids()
+        return cls.load(run_ids[-1]) if run_ids else None
+
+    @property
+    def run_id(self) -> str:
+        return self.data["run_id"]
+
+    @property
+    def run_dir(self) -> str:
+        return os.path.dirname(self.path)
+
+    def entry(self, scenario_id: str) -> dict:
+        return self.data["scenarios"][scenario_id]
+
+    def update(self, scenario_id: str, **fields):
+        """Update a scenario's entry and checkpoint the manifest."""
+        self._update_entry(scenario_id, fields)
+        self.save()
+
+    async def update_async(self, scenario_id: str, **fields):
+        """update(), writing the file off the event loop."""
+        self._update_entry(scenario_id, fields)
+        await self.save_async()
+
+    def _update_entry(self, scenario_id: str, fields: dict):
+        entry = self.entry(scenario_id)
+        entry.update(fields)
+        entry["updated_at"] = time.time()
+
+    def save(self):
+        self._write(*self._snapshot())
+
+    async def save_async(self):
+        """save(), writing the file off the event loop.
+
+        The data is serialized before returning to the loop, so later
+        changes cannot race with the write.
+        """
+        await asyncio.to_thread(self._write, *self._snapshot())
+
+    def _snapshot(self) -> tuple[int, str]:
+        self.data["updated_at"] = time.time()
+        self._seq += 1
+        return self._seq, json.dumps(self.data, indent=2, default=str)
+
+    def _write(self, seq: int, text: str):
+        with self._write_lock:
+            if seq < self._written_seq:
+                return  # A newer snapshot is already on disk
+            os.makedirs(self.run_dir, exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                f.write(text)
+            os.replace(tmp_path, self.path)
+            self._written_seq = seq
+
+    def todo(self, rerun_failed: bool = False) -> list[str]:
+        """Scenario ids still to run, in their original order."""
+        skip = {DONE} if rerun_failed else {DONE, FAILED}
+        return [
+            sid for sid in self.data["scenario_ids"]
+            if self.entry(sid)["status"] not in skip
+        ]
+
+    def counts(self) -> dict:
+        counts: dict[str, int] = {}
+        for entry in self.data["scenarios"].values():
+            counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+        return counts
@@ -0,0 +1,563 @@
+"""Test suite runs executed inside the long-lived server process.
+
+Runs are submitted through the control API (app.pipeline.run_api) and run
+as tasks on the server's event loop, so they use the worker's loaded models,
+its pooled call placer and its review cache. Each run is checkpointed in its
+manifest (app.pipeline.run_manifest), and that file is what the API reads
+to list runs and stream their progress. Any server worker can therefore
+answer for a run that another worker owns. Cancellation from another worker
+goes through a marker file in the run directory that the owner polls.
+"""
+import asyncio
+import json
+import logging
+import os
+import statistics
+import time
+from collections.abc import AsyncIterator
+
+from app import config
+from app.analysis.call_store import get_call_store
+from app.analysis.review_cache import get_review_cache, stats_since
+from app.pipeline.analysis_worker import AnalysisWorker
+from app.pipeline.call_orchestrator import place_call
+from app.pipeline.coordinator import run_distributed
+from app.pipeline.loop_monitor import loop_monitor
+from app.pipeline.run_manifest import (
+    ANALYZING, CALLING, DONE, FAILED, PENDING,
+    RUN_CANCELED, RUN_ERROR, RUN_FINISHED, RUN_RUNNING, RunManifest, valid_run_id,
+)
+from app.scenarios.loader import load_all_scenarios, load_scenario
+from app.telephony.call_sessions import get_call_sessions, worker_id
+
+logger = logging.getLogger(__name__)
+
+EVENTS_POLL_S = 1.0
+# Scenario entry fields sent in progress events
+EVENT_FIELDS = ("status", "attempts", "error", "bugs_found", "call_id", "node")
+
+
+class RunNotFound(LookupError):
+    """No manifest exists for the run id."""
+
+
+def load_run_results(manifest: RunManifest) -> list[dict]:
+    """Build the per-scenario results list from a run's manifest."""
+    results = []
+    for sid in manifest.data["scenario_ids"]:
+        entry = manifest.entry(sid)
+        report = None
+        if entry.get("report_path") and os.path.exists(entry["report_path"]):
+            with open(entry["report_path"]) as f:
+                report = json.load(f)
+        results.append({
+            "scenario_id": sid,
+            "scenario_name": entry["scenario_name"],
+            "status": entry["status"],
+            "success": entry["status"] == DONE,
+            "bugs_found": entry.get("bugs_found", 0),
+            "error": entry.get("error"),
+            "lifecycle": entry.get("lifecycle"),
+            "report_path": entry.get("report_path"),
+            "report": report,
+        })
+    return results
+
+
+def call_outcomes(lifecycles: list[dict]) -> dict:
+    """Final status counts and ring/answer time stats over a run's calls."""
+    statuses: dict[str, int] = {}
+    for lc in lifecycles:
+        statuses[lc["status"]] = statuses.get(lc["status"], 0) + 1
+    outcome = {"count": len(lifecycles), "statuses": statuses}
+    for key in ("answer_latency_s", "ring_time_s"):
+        values = sorted(lc[key] for lc in lifecycles if lc.get(key) is not None)
+        outcome[key] = {
+            "p50": statistics.median(values),
+            "mean": statistics.fmean(values),
+            "max": values[-1],
+        } if values else None
+    return outcome
+
+
+async def run_sequential(
+    manifest: RunManifest,
+    scenarios: list[dict],
+    webhook_url: str,
+    delay_between_calls: int,
+) -> AnalysisWorker:
+    """Place the scenarios' calls one after another from this process.
+
+    Post-call analysis runs in a background AnalysisWorker so the next call
+    does not wait for it. Returns the drained worker for its timing stats.
+    If cancelled, the call in progress goes back to pending and analyses
+    still queued are dropped; a resumed run picks both up again.
+    """
+    worker = AnalysisWorker(num_workers=config.ANALYSIS_WORKERS)
+    store = get_call_store()
+    saves: set[asyncio.Task] = set()
+
+    def checkpoint(scenario_id: str, **fields):
+        # From a done callback, which cannot await the write
+        task = asyncio.create_task(manifest.update_async(scenario_id, **fields))
+        saves.add(task)
+        task.add_done_callback(saves.discard)
+
+    def record_analysis(scenario_id: str, future: asyncio.Future):
+        if future.cancelled():
+            return
+        report = future.result()
+        if report is None:
+            checkpoint(scenario_id, status=FAILED, error="analysis failed")
+            return
+        checkpoint(
+            scenario_id,
+            status=DONE,
+            report_path=report.get("report_path"),
+            bugs_found=len(report.get("findings", [])),
+            summary=report.get("summary"),
+            finished_at=time.time(),
+            error=None,
+        )
+
+    async def submit_analysis(transcript: dict, scenario: dict):
+        transcript["run_id"] = manifest.run_id
+        await manifest.update_async(scenario["id"], status=ANALYZING, call_id=transcript.get("call_id"))
+        future = worker.submit(transcript, scenario)
+        future.add_done_callback(lambda f, sid=scenario["id"]: record_analysis(sid, f))
+
+    calls_placed = 0
+    current = None
+    try:
+        for i, scenario in enumerate(scenarios):
+            logger.info("\n[%d/%d] Scenario: %s", i + 1, len(scenarios), scenario["name"])
+            entry = manifest.entry(scenario["id"])
+
+            # Interrupted after the call but before its analysis finished:
+            # re-analyze the stored transcript instead of calling again
+            if entry["status"] == ANALYZING and entry.get("call_id"):
+                transcript = await asyncio.to_thread(store.transcript, entry["call_id"])
+                if transcript:
+                    logger.info("Re-analyzing stored call %s", entry["call_id"])
+                    await submit_analysis(transcript, scenario)
+                    continue
+
+            # Wait between calls to not overwhelm the system
+            if calls_placed:
+                logger.info("Waiting %ds before next call...", delay_between_calls)
+                await asyncio.sleep(delay_between_calls)
+
+            current = scenario["id"]
+            await manifest.update_async(current, status=CALLING, attempts=entry["attempts"] + 1)
+            lifecycle: dict = {}
+            transcript = await place_call(scenario, webhook_url, lifecycle)
+            current = None
+            calls_placed += 1
+            await manifest.update_async(scenario["id"], lifecycle=lifecycle)
+            if transcript:
+                await submit_analysis(transcript, scenario)
+            else:
+                error = "no transcript" if lifecycle.get("answered") else f"call {lifecycle.get('status')}"
+                await manifest.update_async(scenario["id"], status=FAILED, error=error)
+
+        # Wait for analyses still in flight
+        logger.info("Waiting for pending analyses...")
+        await worker.drain()
+        await asyncio.gather(*saves)
+    except asyncio.CancelledError:
+        worker.cancel()
+        if current:
+            await manifest.update_async(current, status=PENDING, error="canceled")
+        raise
+    finally:
+        await asyncio.to_thread(store.flush)
+    return worker
+
+
+def prepare_run(
+    scenario_ids: list[str] | None = None,
+    delay_between_calls: int = 10,
+    resume: str | None = None,
+    rerun_failed: bool = False,
+    distributed: bool = False,
+) -> tuple[RunManifest, list[dict]]:
+    """Create (or reopen, with `resume`/`rerun_failed`) a run's manifest.
+
+    Returns the manifest and the scenarios still to run. Raises RunNotFound
+    if there is no run to resume, and ValueError for an unknown scenario.
+    """
+    if resume or rerun_failed:
+        manifest = RunManifest.load(resume) if resume else RunManifest.latest()
+        if manifest is None:
+            raise RunNotFound(f"No run manifest found for {resume or 'the latest run'}")
+        scenarios = [load_scenario(sid) for sid in manifest.todo(rerun_failed)]
+        logger.info(
+            "Resuming run %s: %d of %d scenarios left (%s)",
+            manifest.run_id, len(scenarios), len(manifest.data["scenario_ids"]), manifest.counts(),
+        )
+    else:
+        if scenario_ids:
+            scenarios = [load_scenario(sid) for sid in scenario_ids]
+        else:
+            scenarios = load_all_scenarios()
+        manifest = RunManifest.create(
+            scenarios, {"delay_between_calls": delay_between_calls, "distributed": distributed}
+        )
+        logger.info("Run %s, manifest: %s", manifest.run_id, manifest.path)
+    return manifest, scenarios
+
+
+def summarize_run(
+    manifest: RunManifest,
+    worker: AnalysisWorker | None = None,
+    review_cache: dict | None = None,
+    loop_stalls: dict | None = None,
+) -> dict:
+    """Summary of a finished run, as shown by the CLI and stored in the manifest.
+
+    Also writes the per-scenario results to summary.json in the reports
+    directory and the run directory.
+    """
+    results = load_run_results(manifest)
+    rows = []
+    for r in results:
+        report = r["report"] or {}
+        stalls = report.get("loop_stalls", {})
+        live = report.get("live_detection", {})
+        rows.append({
+            "scenario_id": r["scenario_id"],
+            "scenario_name": r["scenario_name"],
+            "status": r["status"],
+            "success": r["success"],
+            "bugs_found": r["bugs_found"],
+            "error": r["error"],
+            "loop_stalls": stalls.get("stall_count", 0),
+            "max_stall_ms": stalls.get("max_stall_ms", 0.0),
+            "stopped_early_on": live["stop_reason"]["type"] if live.get("stopped_early") else None,
+        })
+
+    summary = {
+        "run_id": manifest.run_id,
+        "results": rows,
+        "counts": manifest.counts(),
+        "total_bugs": sum(r["bugs_found"] for r in results),
+        "call_outcomes": call_outcomes([r["lifecycle"] for r in results if r["lifecycle"]]),
+        "patient_latency": None,
+        "stt_tiers": None,
+        "analysis": None,
+        "nodes": None,
+        "review_cache": review_cache,
+        "loop_stalls": loop_stalls,
+    }
+
+    ours = [r["report"]["patient_latency"] for r in results
+            if (r["report"] or {}).get("patient_latency", {}).get("turns")]
+    if ours:
+        summary["patient_latency"] = {
+            "turns": sum(o["turns"] for o in ours),
+            "filler_turns": sum(o["filler_turns"] for o in ours),
+            "compute_p50_ms": statistics.median(o["compute"]["p50_ms"] for o in ours),
+            "perceived_p50_ms": statistics.median(o["perceived"]["p50_ms"] for o in ours),
+        }
+    stt = [r["report"]["stt_tiers"] for r in results
+           if ((r["report"] or {}).get("stt_tiers") or {}).get("cascade")]
+    if stt:
+        turns = sum(o["turns"] for o in stt)
+        escalated = sum(o["escalated"] for o in stt)
+        tiers = {}
+        for name in ("fast", "accurate"):
+            per_call = [o["tiers"][name] for o in stt if name in o["tiers"]]
+            if per_call:
+                tiers[name] = {
+                    "model": per_call[0]["model"],
+                    "count": sum(t["count"] for t in per_call),
+                    "p50_ms": statistics.median(t["p50_ms"] for t in per_call),
+                }
+        summary["stt_tiers"] = {
+            "turns": turns,
+            "escalated": escalated,
+            "escalation_rate": round(escalated / turns, 3) if turns else None,
+            "tiers": tiers,
+        }
+    if worker:
+        summary["analysis"] = {
+            "busy_s": round(worker.busy_seconds, 1),
+            "drain_wait_s": round(worker.drain_wait_seconds, 1),
+            "overlap_saved_s": round(worker.overlap_saved_seconds, 1),
+        }
+    if manifest.data["settings"].get("distributed"):
+        nodes: dict[str, int] = {}
+        for sid in manifest.data["scenario_ids"]:
+            node = manifest.entry(sid).get("node")
+            if node:
+                nodes[node] = nodes.get(node, 0) + 1
+        summary["nodes"] = dict(sorted(nodes.items()))
+
+    summary_path = os.path.join(config.REPORTS_DIR, "summary.json")
+    summary["summary_path"] = summary_path
+    os.makedirs(config.REPORTS_DIR, exist_ok=True)
+    for path in (summary_path, os.path.join(manifest.run_dir, "summary.json")):
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2, default=str)
+    return summary
+
+
+async def execute_run(
+    manifest: RunManifest,
+    scenarios: list[dict],
+    delay_between_calls: int = 10,
+    distributed: bool = False,
+) -> dict:
+    """Run the scenarios of a prepared run and return its summary.
+
+    Calls are placed one after another from this process, or with
+    `distributed` queued for worker nodes (app.pipeline.worker_node) to
+    run in parallel. The run's status and summary are saved in its manifest.
+    """
+    webhook_url = config.NGROK_URL
+    logger.info("Running %d scenarios against %s", len(scenarios), config.TARGET_PHONE_NUMBER)
+    if not distributed:
+        logger.info("Webhook URL: %s", webhook_url)
+
+    manifest.data.update(status=RUN_RUNNING, started_at=time.time(), error=None)
+    await manifest.save_async()
+    started = time.monotonic()
+    loop_monitor.start()
+    review_cache = get_review_cache()
+    cache_before = review_cache.stats() if review_cache else None
+    worker = None
+    try:
+        if distributed:
+            await run_distributed(manifest, scenarios)
+        else:
+            worker = await run_sequential(manifest, scenarios, webhook_url, delay_between_calls)
+    except asyncio.CancelledError:
+        manifest.data.update(status=RUN_CANCELED, finished_at=time.time())
+        await manifest.save_async()
+        logger.info("Run %s canceled", manifest.run_id)
+        raise
+    except Exception as e:
+        logger.exception("Run %s failed", manifest.run_id)
+        manifest.data.update(status=RUN_ERROR, error=f"{type(e).__name__}: {e}", finished_at=time.time())
+        await manifest.save_async()
+        raise
+
+    # Reads every report and writes summary.json: off the loop that paces media
+    summary = await asyncio.to_thread(
+        summarize_run,
+        manifest,
+        worker,
+        stats_since(cache_before, review_cache.stats()) if review_cache and worker else None,
+        loop_monitor.stats(since=started),
+    )
+    manifest.data.update(
+        status=RUN_FINISHED,
+        finished_at=time.time(),
+        call_outcomes=summary["call_outcomes"],
+        summary=summary,
+    )
+    await manifest.save_async()
+    return summary
+
+
+def cancel_marker(run_id: str) -> str:
+    if not valid_run_id(run_id):
+        raise RunNotFound(f"Invalid run id {run_id!r}")
+    return os.path.join(config.RUNS_DIR, run_id, "cancel")
+
+
+def remove_cancel_marker(run_id: str):
+    if os.path.exists(cancel_marker(run_id)):
+        os.remove(cancel_marker(run_id))
+
+
+def request_cancel(run_id: str) -> bool:
+    """Leave a cancel marker for a run owned by another worker. False if it is not running."""
+    manifest = RunManifest.load(run_id)
+    if manifest is None:
+        raise RunNotFound(f"No run manifest found for {run_id}")
+    if not is_active(manifest.data):
+        return False
+    with open(cancel_marker(run_id), "w") as f:
+        f.write(worker_id())
+    return True
+
+
+def live_workers() -> set[str]:
+    rows = get_call_sessions().workers(config.WORKER_HEARTBEAT_S * 3)
+    return {w["worker_id"] for w in rows}
+
+
+def is_active(data: dict, live: set[str] | None = None) -> bool:
+    """Whether a run is still running on a live server worker.
+
+    Runs executed outside the server (run_test_suite --local) have no owner
+    and are never reported active. Without `live` this queries the session
+    store, so on the event loop pass live_workers() from a thread.
+    """
+    if data.get("status") != RUN_RUNNING or not data.get("owner"):
+        return False
+    return data["owner"] in (live if live is not None else live_workers())
+
+
+class RunService:
+    """Runs owned by this server worker, each executing as an asyncio task."""
+
+    def __init__(self):
+        self.tasks: dict[str, asyncio.Task] = {}
+
+    async def submit(
+        self,
+        scenario_ids: list[str] | None = None,
+        delay_between_calls: int = 10,
+        resume: str | None = None,
+        rerun_failed: bool = False,
+        distributed: bool = False,
+    ) -> RunManifest:
+        """Start a run in this process. Returns its manifest right away.
+
+        Raises RunNotFound or ValueError like prepare_run, and
+        RuntimeError if the run to resume is still running.
+        """
+        if not config.NGROK_URL and not distributed:
+            raise ValueError("NGROK_URL not set. Start ngrok and set the URL in .env")
+        if resume or rerun_failed:
+            existing = await asyncio.to_thread(
+                lambda: RunManifest.load(resume) if resume else RunManifest.latest()
+            )
+            if existing and (
+                existing.run_id in self.tasks or await asyncio.to_thread(is_active, existing.data)
+            ):
+                raise RuntimeError(f"Run {existing.run_id} is still running")
+
+        manifest, scenarios = await asyncio.to_thread(
+            prepare_run, scenario_ids, delay_between_calls, resume, rerun_failed, distributed
+        )
+        run_id = manifest.run_id
+        if run_id in self.tasks:
+            raise RuntimeError(f"Run {run_id} is still running")
+        await asyncio.to_thread(remove_cancel_marker, run_id)
+        manifest.data.update(status=RUN_RUNNING, owner=worker_id())
+        await manifest.save_async()
+
+        task = asyncio.create_task(
+            self._run(manifest, scenarios, delay_between_calls, distributed)
+        )
+        self.tasks[run_id] = task
+        task.add_done_callback(lambda _, run_id=run_id: self.tasks.pop(run_id, None))
+        return manifest
+
+    async def _run(self, manifest: RunManifest, scenarios: list[dict], delay: int, distributed: bool):
+        run_id = manifest.run_id
+        watcher = asyncio.create_task(self._watch_cancel(run_id))
+        try:
+            await execute_run(manifest, scenarios, delay, distributed)
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            pass  # Logged and recorded in the manifest by execute_run
+        finally:
+            watcher.cancel()
+
+    async def _watch_cancel(self, run_id: str):
+        """Cancel the run once another worker has left a cancel marker for it."""
+        path = cancel_marker(run_id)
+        while not await asyncio.to_thread(os.path.exists, path):
+            await asyncio.sleep(EVENTS_POLL_S)
+        logger.info("Cancel requested for run %s", run_id)
+        task = self.tasks.get(run_id)
+        if task:
+            task.cancel()
+
+    async def cancel(self, run_id: str) -> bool:
+        """Cancel a run. Returns False if it is not running.
+
+        A run owned by another worker is asked to stop through its cancel
+        marker and stops within EVENTS_POLL_S.
+        """
+        task = self.tasks.get(run_id)
+        if task:
+            task.cancel()
+            return True
+        return await asyncio.to_thread(request_cancel, run_id)
+
+    def runs(self, limit: int = 20) -> list[dict]:
+        """The most recent runs, newest first."""
+        live = live_workers()
+        runs = []
+        for run_id in reversed(RunManifest.run_ids()[-limit:]):
+            manifest = RunManifest.load(run_id)
+            if manifest is None:
+                continue
+            runs.append(run_info(manifest.data, live))
+        return runs
+
+    async def events(self, run_id: str) -> AsyncIterator[dict]:
+        """Progress of a run: one event per scenario change, then its end.
+
+        Read from the manifest on disk, so it works for runs owned by any
+        worker. A run whose owner stopped heartbeating ends as interrupted.
+        """
+        manifest = await asyncio.to_thread(RunManifest.load, run_id)
+        if manifest is None:
+            raise RunNotFound(f"No run manifest found for {run_id}")
+        live = await asyncio.to_thread(live_workers)
+        yield {"event": "run", **run_info(manifest.data, live)}
+
+        seen: dict[str, tuple] = {}
+        while True:
+            data = manifest.data
+            for sid in data["scenario_ids"]:
+                entry = data["scenarios"][sid]
+                key = tuple(entry.get(f) for f in EVENT_FIELDS)
+                if seen.get(sid) != key:
+                    seen[sid] = key
+                    yield {
+                        "event": "scenario",
+                        "scenario_id": sid,
+                        "scenario_name": entry["scenario_name"],
+                        **{f: entry.get(f) for f in EVENT_FIELDS},
+                    }
+            if run_id not in self.tasks and not await asyncio.to_thread(is_active, data):
+                status = data.get("status")
+                yield {
+                    "event": "end",
+                    "run_id": run_id,
+                    "status": "interrupted" if status == RUN_RUNNING and data.get("owner") else status,
+                    "error": data.get("error"),
+                    "summary": data.get("summary"),
+                }
+                return
+            await asyncio.sleep(EVENTS_POLL_S)
+            manifest = await asyncio.to_thread(RunManifest.load, run_id) or manifest
+
+
+def run_info(data: dict, live: set[str] | None = None) -> dict:
+    """Short description of a run for listings. `live` as for is_active()."""
+    status = data.get("status")
+    if status == RUN_RUNNING and data.get("owner") and not is_active(data, live):
+        status = "interrupted"
+    counts: dict[str, int] = {}
+    for entry in data["scenarios"].values():
+        counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+    return {
+        "run_id": data["run_id"],
+        "status": status,
+        "owner": data.get("owner"),
+        "created_at": data["created_at"],
+        "finished_at": data.get("finished_at"),
+        "scenario_count": len(data["scenario_ids"]),
+        "counts": counts,
+        "settings": data["settings"],
+    }
+
+
+_service: RunService | None = None
+
+
+def get_run_service() -> RunService:
+    """Return the process-wide run service."""
+    global _service
+    if _service is None:
+        _service = RunService()
+    return _service
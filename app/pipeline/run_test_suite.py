@@ -1,12 +1,25 @@
-import asyncio
+"""Run the test suite on the voice bot server through its control API.
+
+Runs execute inside the server (app.pipeline.run_service), which already
+has its models loaded and serves the calls' webhooks and media streams.
+This CLI submits the run and follows its progress:
+
+    python -m app.pipeline.run_test_suite --scenario schedule_new
+    python -m app.pipeline.run_test_suite --resume 20261019_142500
+    python -m app.pipeline.run_test_suite --list
+    python -m app.pipeline.run_test_suite --cancel 20261019_142500
+
+With --local the run executes in this process instead, as it did before
+the API existed (the server must still be up to answer the calls).
+"""
 import argparse
+import asyncio
+import json
 import logging
 import sys
-import json
-import os
 
-from app.scenarios.loader import load_all_scenarios, load_scenario
-from app.pipeline.call_orchestrator import run_call
+import httpx
+
 from app import config
 
 logging.basicConfig(
@@ -16,75 +29,202 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-async def run_test_suite(
-    scenario_ids: list[str] | None = None,
-    delay_between_calls: int = 10,
-):
-    """Run multiple test call scenarios sequentially.
+def api_client(server: str) -> httpx.AsyncClient:
+    """Client for the server's control API, authenticated with RUN_API_TOKEN."""
+    return httpx.AsyncClient(
+        base_url=server,
+        timeout=30.0,
+        headers={"Authorization": f"Bearer {config.RUN_API_TOKEN}"},
+    )
+
+
+def format_summary(summary: dict) -> str:
+    """Render a run summary (run_service.summarize_run) for the terminal."""
+    run_id = summary["run_id"]
+    lines = ["", "=" * 60, "TEST SUITE SUMMARY", "=" * 60]
+
+    for r in summary["results"]:
+        if r["success"]:
+            note = ""
+            if r["loop_stalls"]:
+                note = f", {r['loop_stalls']} loop stalls (worst {r['max_stall_ms']:.0f}ms)"
+            if r["stopped_early_on"]:
+                note += f", ended early on {r['stopped_early_on']}"
+            lines.append(f"  [OK] {r['scenario_name']}: {r['bugs_found']} bugs found{note}")
+        else:
+            lines.append(f"  [{r['status'].upper()}] {r['scenario_name']}: {r['error'] or 'not run'}")
+
+    counts = summary["counts"]
+    lines.append(f"\nTotal: {len(summary['results'])} scenarios ({counts.get('done', 0)} done, "
+                 f"{counts.get('failed', 0)} failed), {summary['total_bugs']} bugs found")
+    calls = summary["call_outcomes"]
+    if calls["count"]:
+        lines.append("Calls: " + ", ".join(f"{n} {s}" for s, n in calls["statuses"].items()))
+        if calls["answer_latency_s"]:
+            lines.append(
+                f"  Answer latency: median {calls['answer_latency_s']['p50']:.1f}s, "
+                f"worst {calls['answer_latency_s']['max']:.1f}s; ring time: median "
+                f"{calls['ring_time_s']['p50']:.1f}s, worst {calls['ring_time_s']['max']:.1f}s"
+            )
+    ours = summary["patient_latency"]
+    if ours:
+        lines.append(f"Our response time: median {ours['compute_p50_ms'] / 1000:.1f}s compute, "
+                     f"{ours['perceived_p50_ms'] / 1000:.1f}s perceived; "
+                     f"filler on {ours['filler_turns']} of {ours['turns']} turns")
+    stt = summary.get("stt_tiers")
+    if stt:
+        tiers = ", ".join(f"{t['model']} median {t['p50_ms']:.0f}ms" for t in stt["tiers"].values())
+        lines.append(f"STT cascade: {stt['escalated']} of {stt['turns']} turns escalated "
+                     f"({stt['escalation_rate']:.0%}); {tiers}")
+    analysis = summary["analysis"]
+    if analysis:
+        lines.append(
+            f"Analysis: {analysis['busy_s']:.1f}s total, "
+            f"{analysis['drain_wait_s']:.1f}s waited at end, "
+            f"{analysis['overlap_saved_s']:.1f}s saved by overlapping with calls"
+        )
+    if summary["nodes"] is not None:
+        nodes = summary["nodes"]
+        lines.append("Worker nodes: " + (", ".join(f"{n} ({c})" for n, c in nodes.items()) or "none"))
+    rc = summary["review_cache"]
+    if rc:
+        lines.append(f"LLM review cache: {rc['hits']} hits, {rc['misses']} misses "
+                     f"({rc['hit_rate']:.0%} hit rate)")
+    stalls = summary["loop_stalls"]
+    if stalls:
+        lines.append(
+            f"Suite event loop: {stalls['stall_count']} stalls over "
+            f"{stalls['threshold_ms']}ms (worst {stalls['max_stall_ms']:.0f}ms)"
+        )
+    lines.append("Transcripts saved to: output/transcripts/")
+    lines.append("Reports saved to: output/reports/")
+    lines.append(f"Query this run with: python -m app.pipeline.query_store findings --run {run_id}")
+    if counts.get("failed"):
+        lines.append(f"Rerun failed scenarios with: --resume {run_id} --rerun-failed")
+    lines.append(f"Summary saved to: {summary['summary_path']}")
+    return "\n".join(lines)
+
+
+def format_event(event: dict) -> str:
+    """One progress line for a scenario event from /runs/{run_id}/events."""
+    line = f"  {event['status']:>9}  {event['scenario_name']}"
+    if event["status"] == "done":
+        line += f": {event['bugs_found'] or 0} bugs found"
+    elif event["error"]:
+        line += f": {event['error']}"
+    if event["attempts"] and event["attempts"] > 1:
+        line += f" (attempt {event['attempts']})"
+    if event["node"]:
+        line += f" on {event['node']}"
+    return line
 
-    Args:
-        scenario_ids: Specific scenario IDs to run. None = run all.
-        delay_between_calls: Seconds to wait between calls.
+
+async def follow_run(client: httpx.AsyncClient, run_id: str) -> dict:
+    """Print a run's progress until it ends. Returns the end event."""
+    async with client.stream("GET", f"/runs/{run_id}/events", timeout=None) as response:
+        if response.status_code >= 400:
+            await response.aread()
+            raise RuntimeError(f"Cannot follow run {run_id}: {response.json().get('detail', response.text)}")
+        async for line in response.aiter_lines():
+            if not line:
+                continue
+            event = json.loads(line)
+            if event["event"] == "run":
+                print(f"Run {event['run_id']} ({event['status']}, {event['scenario_count']} scenarios, "
+                      f"server worker {event['owner']})")
+            elif event["event"] == "scenario":
+                print(format_event(event))
+            elif event["event"] == "end":
+                return event
+    raise RuntimeError(f"Progress stream for run {run_id} ended early")
+
+
+async def submit_and_follow(server: str, body: dict, detach: bool, started: dict) -> int:
+    """Start a run on the server and, unless `detach`, follow it to the end.
+
+    The new run's id is put in `started` as soon as it is known.
     """
-    if scenario_ids:
-        scenarios = [load_scenario(sid) for sid in scenario_ids]
-    else:
-        scenarios = load_all_scenarios()
+    async with api_client(server) as client:
+        response = await client.post("/runs", json=body)
+        if response.status_code >= 400:
+            print(f"Could not start the run: {response.json().get('detail', response.text)}")
+            return 1
+        run = response.json()
+        run_id = started["run_id"] = run["run_id"]
+        print(f"Started run {run_id} on {server}")
+        if detach:
+            print(f"Follow it with: --follow {run_id}")
+            return 0
+        return await follow_and_summarize(client, run_id)
+
 
-    webhook_url = config.NGROK_URL
-    if not webhook_url:
+async def follow_and_summarize(client: httpx.AsyncClient, run_id: str) -> int:
+    end = await follow_run(client, run_id)
+    if end["summary"] and end["status"] == "finished":
+        print(format_summary(end["summary"]))
+        return 0
+    print(f"\nRun {run_id} {end['status']}" + (f": {end['error']}" if end["error"] else ""))
+    print(f"Resume with: --resume {run_id}")
+    return 1
+
+
+async def list_runs(server: str, limit: int) -> int:
+    async with api_client(server) as client:
+        response = await client.get("/runs", params={"limit": limit})
+    if response.status_code >= 400:
+        print(f"Could not list runs: {response.json().get('detail', response.text)}")
+        return 1
+    for run in response.json():
+        counts = ", ".join(f"{n} {s}" for s, n in sorted(run["counts"].items()))
+        print(f"{run['run_id']:20s} {run['status'] or '-':12s} {run['scenario_count']:3d} scenarios ({counts})")
+    return 0
+
+
+async def cancel_run(server: str, run_id: str) -> int:
+    async with api_client(server) as client:
+        response = await client.post(f"/runs/{run_id}/cancel")
+    if response.status_code >= 400:
+        print(f"Could not cancel run {run_id}: {response.json().get('detail', response.text)}")
+        return 1
+    print(f"Cancel requested for run {run_id}. Resume it later with: --resume {run_id}")
+    return 0
+
+
+async def follow(server: str, run_id: str) -> int:
+    async with api_client(server) as client:
+        return await follow_and_summarize(client, run_id)
+
+
+async def run_local(
+    scenario_ids: list[str] | None,
+    delay_between_calls: int,
+    resume: str | None,
+    rerun_failed: bool,
+    distributed: bool,
+) -> int:
+    """Run the suite in this process instead of on the server."""
+    # Imported here so the client commands stay light
+    from app.pipeline.run_service import RunNotFound, execute_run, prepare_run
+
+    if not config.NGROK_URL and not distributed:
         logger.error("NGROK_URL not set. Start ngrok and set the URL in .env")
-        return
-
-    logger.info("Running %d scenarios against %s", len(scenarios), config.TARGET_PHONE_NUMBER)
-    logger.info("Webhook URL: %s", webhook_url)
-
-    results = []
-
-    for i, scenario in enumerate(scenarios):
-        logger.info("\n[%d/%d] Scenario: %s", i + 1, len(scenarios), scenario["name"])
-
-        report = await run_call(scenario, webhook_url)
-        results.append({
-            "scenario_id": scenario["id"],
-            "scenario_name": scenario["name"],
-            "success": report is not None,
-            "bugs_found": len(report.get("findings", [])) if report else 0,
-            "report": report,
-        })
-
-        # Wait between calls to not overwhelm the system
-        if i < len(scenarios) - 1:
-            logger.info("Waiting %ds before next call...", delay_between_calls)
-            await asyncio.sleep(delay_between_calls)
-
-    # Print summary
-    print("\n" + "=" * 60)
-    print("TEST SUITE SUMMARY")
-    print("=" * 60)
-
-    total_bugs = 0
-    for r in results:
-        status = "OK" if r["success"] else "FAILED"
-        bugs = r["bugs_found"]
-        total_bugs += bugs
-        print(f"  [{status}] {r['scenario_name']}: {bugs} bugs found")
-
-    print(f"\nTotal: {len(results)} calls, {total_bugs} bugs found")
-    print("Transcripts saved to: output/transcripts/")
-    print("Reports saved to: output/reports/")
-
-    # Save summary
-    summary_path = os.path.join(config.REPORTS_DIR, "summary.json")
-    os.makedirs(config.REPORTS_DIR, exist_ok=True)
-    with open(summary_path, "w") as f:
-        json.dump(results, f, indent=2, default=str)
-    print(f"Summary saved to: {summary_path}")
+        return 1
+    try:
+        manifest, scenarios = prepare_run(
+            scenario_ids, delay_between_calls, resume, rerun_failed, distributed
+        )
+    except (RunNotFound, ValueError) as e:
+        logger.error("%s", e)
+        return 1
+    summary = await execute_run(manifest, scenarios, delay_between_calls, distributed)
+    print(format_summary(summary))
+    return 0
 
 
 def main():
     parser = argparse.ArgumentParser(description="Run voice bot test suite")
-    parser.add_argument(
+    selection = parser.add_mutually_exclusive_group()
+    selection.add_argument(
         "--scenario", "-s",
         type=str,
         help="Run a specific scenario by ID (e.g., schedule_new). Omit to run all.",
@@ -95,10 +235,75 @@ def main():
         default=10,
         help="Seconds between calls (default: 10)",
     )
+    selection.add_argument(
+        "--resume", "-r",
+        type=str,
+        metavar="RUN_ID",
+        help="Resume a previous run, running only its incomplete scenarios",
+    )
+    parser.add_argument(
+        "--rerun-failed",
+        action="store_true",
+        help="Also rerun failed scenarios (of --resume, or the latest run)",
+    )
+    parser.add_argument(
+        "--distributed",
+        action="store_true",
+        help="Queue scenarios for worker nodes (app.pipeline.worker_node) instead of calling locally",
+    )
+    selection.add_argument("--list", "-l", action="store_true", help="List recent runs")
+    selection.add_argument("--cancel", metavar="RUN_ID", help="Cancel a running run")
+    selection.add_argument("--follow", "-f", metavar="RUN_ID", help="Follow a run's progress")
+    parser.add_argument(
+        "--server",
+        default=config.CONTROL_API_URL,
+        help=f"Voice bot server to run on (default: {config.CONTROL_API_URL})",
+    )
+    parser.add_argument("--detach", action="store_true", help="Start the run and return right away")
+    parser.add_argument("--local", action="store_true", help="Run in this process instead of on the server")
     args = parser.parse_args()
 
     scenario_ids = [args.scenario] if args.scenario else None
-    asyncio.run(run_test_suite(scenario_ids=scenario_ids, delay_between_calls=args.delay))
+    started = {"run_id": args.follow or args.resume}
+    try:
+        if args.local:
+            code = asyncio.run(run_local(
+                scenario_ids, args.delay, args.resume, args.rerun_failed, args.distributed
+            ))
+        elif args.list:
+            code = asyncio.run(list_runs(args.server, limit=20))
+        elif args.cancel:
+            code = asyncio.run(cancel_run(args.server, args.cancel))
+        elif args.follow:
+            code = asyncio.run(follow(args.server, args.follow))
+        else:
+            body = {
+                "scenario_ids": scenario_ids,
+                "delay_between_calls": args.delay,
+                "resume": args.resume,
+                "rerun_failed": args.rerun_failed,
+                "distributed": args.distributed,
+            }
+            code = asyncio.run(submit_and_follow(args.server, body, args.detach, started))
+    except httpx.ConnectError:
+        print(f"No voice bot server at {args.server}. Start it with ./run.sh, or use --local.")
+        code = 1
+    except RuntimeError as e:
+        print(e)
+        code = 1
+    except KeyboardInterrupt:
+        if args.local:
+            from app.pipeline.run_manifest import RunManifest
+
+            manifest = RunManifest.load(args.resume) if args.resume else RunManifest.latest()
+            if manifest:
+                print(f"\nInterrupted. Resume with: --resume {manifest.run_id}")
+        else:
+            run_id = started["run_id"]
+            hint = f" --follow {run_id} or stop it with --cancel {run_id}" if run_id else " --list"
+            print(f"\nThe run continues on the server. Check on it with{hint}")
+        code = 130
+    sys.exit(code)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,334 @@
+"""Find the fastest Whisper settings for this host that stay accurate enough.
+
+Sweeps model size, compute type, cpu_threads, num_workers and beam size over
+an utterance set with known text. For each combination it measures:
+
+  - real-time factor: decode time / audio duration, one utterance at a time
+  - p95 latency with --concurrency calls transcribing at once, as the server
+    does with several calls open
+  - word error rate against the reference text
+
+and writes out the fastest combination (by p95 under concurrency) whose WER
+is within --max-wer, as WHISPER_* lines for .env:
+
+    python -m app.pipeline.tune_stt
+    python -m app.pipeline.tune_stt --models tiny,base,small --concurrency 4 --max-wer 0.1
+    python -m app.pipeline.tune_stt --utterances labelled_turns/
+
+The default utterance set is app/speech/tuning_utterances.txt spoken by the
+TTS voice, encoded once to 8kHz G.711 mu-law by ffmpeg as a carrier would,
+then decoded and resampled to 16kHz like live agent audio. It is rendered
+once and cached. --utterances takes a directory of
+WAV files, each next to a .txt with what was said, e.g. agent turns cut from
+recordings.
+"""
+import argparse
+import asyncio
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import subprocess
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from itertools import product
+
+import numpy as np
+
+from app import config
+from app.audio.mulaw_converter import mulaw_decode
+from app.audio.resampler import resample_audio
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+UTTERANCES_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "speech", "tuning_utterances.txt"
+)
+SAMPLE_RATE = 16000
+
+
+def normalize_words(text: str) -> list[str]:
+    """Lowercase words with punctuation removed, for WER scoring."""
+    return re.sub(r"[^a-z0-9' ]+", " ", text.lower().replace("-", " ")).split()
+
+
+def word_errors(reference: str, hypothesis: str) -> tuple[int, int]:
+    """Word-level edit distance between two texts, and the reference length."""
+    ref, hyp = normalize_words(reference), normalize_words(hypothesis)
+    row = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        prev, row[0] = row[0], i
+        for j, hyp_word in enumerate(hyp, 1):
+            prev, row[j] = row[j], min(
+                row[j] + 1,                      # deletion
+                row[j - 1] + 1,                  # insertion
+                prev + (ref_word != hyp_word),   # substitution or match
+            )
+    return row[-1], len(ref)
+
+
+# Part of the cache key; bump it when the rendering pipeline changes
+RENDER_FORMAT = "ffmpeg-pcm_mulaw-8k"
+
+
+def encode_g711(audio_bytes: bytes) -> bytes:
+    """Encode any ffmpeg-readable audio to 8kHz mono G.711 mu-law with ffmpeg."""
+    process = subprocess.run(
+        [
+            "ffmpeg", "-i", "pipe:0",
+            "-f", "mulaw", "-ar", "8000", "-ac", "1",
+            "-acodec", "pcm_mulaw", "pipe:1",
+        ],
+        input=audio_bytes,
+        capture_output=True,
+    )
+    if process.returncode != 0:
+        logger.error("ffmpeg failed: %s", process.stderr.decode()[:200])
+        return b""
+    return process.stdout
+
+
+async def render_utterances(lines: list[str], cache_dir: str) -> list[dict]:
+    """Speak each line with the TTS voice over the phone codec, caching the audio.
+
+    The audio goes through mu-law exactly once, as carrier audio does.
+    """
+    # Imported here so --utterances runs work without edge-tts
+    from app.audio.tts_engine import VOICE, synthesize
+
+    os.makedirs(cache_dir, exist_ok=True)
+    utterances = []
+    for text in lines:
+        key = hashlib.sha1(f"{RENDER_FORMAT}|{VOICE}|{text}".encode()).hexdigest()[:16]
+        path = os.path.join(cache_dir, f"{key}.ulaw")
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                mulaw = f.read()
+        else:
+            mp3 = await synthesize(text, VOICE)
+            mulaw = encode_g711(mp3) if mp3 else b""
+            if not mulaw:
+                logger.warning("Could not render utterance %r", text)
+                continue
+            with open(path, "wb") as f:
+                f.write(mulaw)
+        audio = resample_audio(mulaw_decode(mulaw), 8000, SAMPLE_RATE)
+        utterances.append({"name": key, "text": text, "audio": audio})
+    return utterances
+
+
+def load_wav_utterances(directory: str) -> list[dict]:
+    """Load <name>.wav + <name>.txt pairs (first channel) as 16kHz utterances."""
+    utterances = []
+    for wav_path in sorted(glob.glob(os.path.join(directory, "*.wav"))):
+        txt_path = wav_path[:-len(".wav")] + ".txt"
+        if not os.path.exists(txt_path):
+            logger.warning("Skipping %s: no %s", wav_path, os.path.basename(txt_path))
+            continue
+        with wave.open(wav_path, "rb") as wf:
+            channels, rate = wf.getnchannels(), wf.getframerate()
+            pcm = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+        audio = pcm.reshape(-1, channels)[:, 0]
+        if rate != SAMPLE_RATE:
+            audio = resample_audio(audio, rate, SAMPLE_RATE)
+        with open(txt_path) as f:
+            text = f.read().strip()
+        utterances.append({
+            "name": os.path.splitext(os.path.basename(wav_path))[0],
+            "text": text,
+            "audio": audio,
+        })
+    return utterances
+
+
+def measure(engine, utterances: list[dict], beam_size: int, concurrency: int) -> dict:
+    """Time and score one engine + beam size over the utterance set."""
+    engine.transcribe(utterances[0]["audio"], beam_size=beam_size)  # warm-up
+
+    decode_s = errors = ref_words = 0
+    for utt in utterances:
+        started = time.perf_counter()
+        text, _confidence = engine.transcribe(utt["audio"], beam_size=beam_size)
+        decode_s += time.perf_counter() - started
+        e, n = word_errors(utt["text"], text)
+        errors += e
+        ref_words += n
+    audio_s = sum(len(u["audio"]) for u in utterances) / SAMPLE_RATE
+
+    def stream(offset: int) -> list[float]:
+        # Each simulated call works through the set from a different point
+        latencies = []
+        for utt in utterances[offset:] + utterances[:offset]:
+            started = time.perf_counter()
+            engine.transcribe(utt["audio"], beam_size=beam_size)
+            latencies.append((time.perf_counter() - started) * 1000)
+        return latencies
+
+    offsets = [i * len(utterances) // concurrency for i in range(concurrency)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = [ms for result in pool.map(stream, offsets) for ms in result]
+    wall_s = time.perf_counter() - started
+
+    return {
+        "rtf": round(decode_s / audio_s, 3),
+        "wer": round(errors / ref_words, 4) if ref_words else 0.0,
+        "p50_ms": round(float(np.percentile(latencies, 50)), 1),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 1),
+        "concurrent_rtf": round(wall_s / (audio_s * concurrency), 3),
+    }
+
+
+def sweep(grid: dict, utterances: list[dict], concurrency: int) -> list[dict]:
+    """Measure every combination in `grid`, loading each model variant once."""
+    # Imported here so --help and argument errors do not load faster-whisper
+    from app.speech.stt_engine import STTEngine
+
+    results = []
+    for model, compute_type, threads, workers in product(
+        grid["models"], grid["compute_types"], grid["cpu_threads"], grid["num_workers"]
+    ):
+        settings = {
+            "model": model, "compute_type": compute_type,
+            "cpu_threads": threads, "num_workers": workers,
+        }
+        try:
+            engine = STTEngine(
+                model, cpu_threads=threads, compute_type=compute_type, num_workers=workers
+            )
+        except (ValueError, RuntimeError) as e:
+            # e.g. a compute type this CPU or CTranslate2 build does not support
+            logger.warning("Skipping %s: %s", settings, e)
+            results.append({**settings, "beam_size": None, "error": str(e)})
+            continue
+        for beam_size in grid["beam_sizes"]:
+            result = {**settings, "beam_size": beam_size}
+            result.update(measure(engine, utterances, beam_size, concurrency))
+            logger.info(
+                "%-6s %-12s threads=%-2d workers=%-2d beam=%d: RTF %.3f, p95 %.0fms, WER %.1f%%",
+                model, compute_type, threads, workers, beam_size,
+                result["rtf"], result["p95_ms"], result["wer"] * 100,
+            )
+            results.append(result)
+        del engine
+    return results
+
+
+def pick_best(results: list[dict], max_wer: float) -> dict | None:
+    """The combination with the lowest p95 under concurrency whose WER <= max_wer."""
+    accurate = [r for r in results if "error" not in r and r["wer"] <= max_wer]
+    return min(accurate, key=lambda r: (r["p95_ms"], r["rtf"]), default=None)
+
+
+def env_lines(best: dict) -> str:
+    return (
+        f"WHISPER_MODEL_SIZE={best['model']}\n"
+        f"WHISPER_COMPUTE_TYPE={best['compute_type']}\n"
+        f"WHISPER_CPU_THREADS={best['cpu_threads']}\n"
+        f"WHISPER_NUM_WORKERS={best['num_workers']}\n"
+        f"WHISPER_BEAM_SIZE={best['beam_size']}\n"
+    )
+
+
+def _csv(cast):
+    return lambda value: [cast(v) for v in value.split(",") if v]
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Tune Whisper settings for this host")
+    parser.add_argument(
+        "--utterances",
+        type=str,
+        help="Directory of <name>.wav + <name>.txt pairs (default: the bundled set, spoken by TTS)",
+    )
+    parser.add_argument("--models", type=_csv(str), default="tiny,base,small",
+                        help="Model sizes (default: tiny,base,small)")
+    parser.add_argument("--compute-types", type=_csv(str), default="int8,int8_float32,float32",
+                        help="CTranslate2 compute types (default: int8,int8_float32,float32)")
+    parser.add_argument("--cpu-threads", type=_csv(int), default=None,
+                        help="Threads per transcription (default: CPUs / concurrency, and all CPUs)")
+    parser.add_argument("--num-workers", type=_csv(int), default=None,
+                        help="Concurrent transcriptions per model (default: 1 and --concurrency)")
+    parser.add_argument("--beam-sizes", type=_csv(int), default="1,3",
+                        help="Beam sizes (default: 1,3)")
+    parser.add_argument(
+        "--concurrency", "-c",
+        type=int,
+        default=config.MAX_CONCURRENT_CALLS,
+        help=f"Calls transcribing at once for the p95 measurement (default: {config.MAX_CONCURRENT_CALLS})",
+    )
+    parser.add_argument("--max-wer", type=float, default=0.15,
+                        help="Accuracy floor: highest acceptable word error rate (default: 0.15)")
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="Also report whether the chosen p95 is within this latency budget")
+    args = parser.parse_args()
+
+    concurrency = max(1, args.concurrency)
+    grid = {
+        "models": args.models,
+        "compute_types": args.compute_types,
+        "cpu_threads": args.cpu_threads or sorted({max(1, cpus // concurrency), cpus}),
+        "num_workers": args.num_workers or sorted({1, concurrency}),
+        "beam_sizes": args.beam_sizes,
+    }
+
+    if args.utterances:
+        utterances = load_wav_utterances(args.utterances)
+    else:
+        with open(UTTERANCES_PATH) as f:
+            lines = [line.strip() for line in f if line.strip()]
+        utterances = asyncio.run(render_utterances(lines, config.TUNING_UTTERANCES_CACHE_DIR))
+    if not utterances:
+        logger.error("No utterances to tune on")
+        return
+    audio_s = sum(len(u["audio"]) for u in utterances) / SAMPLE_RATE
+    logger.info("Tuning on %d utterances (%.0fs of audio), %d calls at once",
+                len(utterances), audio_s, concurrency)
+
+    results = sweep(grid, utterances, concurrency)
+    best = pick_best(results, args.max_wer)
+
+    out_dir = os.path.join(config.STT_TUNING_DIR, time.strftime("%Y%m%d_%H%M%S"))
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, "results.json"), "w") as f:
+        json.dump({
+            "utterances": len(utterances),
+            "audio_seconds": round(audio_s, 1),
+            "concurrency": concurrency,
+            "max_wer": args.max_wer,
+            "budget_ms": args.budget_ms,
+            "grid": grid,
+            "best": best,
+            "results": results,
+        }, f, indent=2)
+
+    if best is None:
+        print(f"\nNo combination reached WER <= {args.max_wer:.0%}. "
+              f"Try larger models or raise --max-wer.")
+        print(f"Results saved to: {out_dir}/results.json")
+        return
+    env_path = os.path.join(out_dir, "whisper.env")
+    with open(env_path, "w") as f:
+        f.write(env_lines(best))
+
+    print(f"\nFastest within {args.max_wer:.0%} WER: {best['model']} {best['compute_type']}, "
+          f"{best['cpu_threads']} threads, {best['num_workers']} workers, beam {best['beam_size']}")
+    print(f"  RTF {best['rtf']:.3f}, p95 {best['p95_ms']:.0f}ms with {concurrency} calls at once, "
+          f"WER {best['wer']:.1%}")
+    if args.budget_ms is not None:
+        verdict = "within" if best["p95_ms"] <= args.budget_ms else "OVER"
+        print(f"  p95 is {verdict} the {args.budget_ms:.0f}ms budget")
+    print(f"\nAdd to .env:\n{env_lines(best)}")
+    print(f"Results saved to: {out_dir}/results.json")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Worker node: the voice bot server plus a loop that runs calls from the job queue.
+
+The node serves the SignalWire webhooks and media stream on its own port
+and public URL, claims one scenario job at a time, places the call, analyzes
+it and hands the transcript and report back through the queue. Capacity
+grows with the number of nodes. They can run on separate machines that
+share the queue, or on one machine with a port and tunnel per node:
+
+    python -m app.pipeline.worker_node --port 8001 --public-url https://a.ngrok.app
+    python -m app.pipeline.worker_node --workers 3 --port 8001 \\
+        --public-url https://a.ngrok.app --public-url https://b.ngrok.app --public-url https://c.ngrok.app
+
+Start the suite with `python -m app.pipeline.run_test_suite --distributed`.
+"""
+import argparse
+import asyncio
+import logging
+import socket
+import subprocess
+import sys
+
+import uvicorn
+
+from app import config
+from app.pipeline.job_queue import JobQueue, open_job_queue
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+
+async def keep_lease(queue: JobQueue, job: dict, worker_id: str, work: asyncio.Task):
+    """Renew a job's lease until cancelled.
+
+    If the lease is lost, the queue may already have given the job to
+    another worker, so `work` is cancelled (hanging up its call) rather
+    than left to run alongside the new attempt.
+    """
+    while True:
+        await asyncio.sleep(config.JOB_LEASE_S / 3)
+        if not await asyncio.to_thread(queue.renew, job["job_id"], worker_id, config.JOB_LEASE_S):
+            logger.warning("Lost the lease on job %s (%s); stopping it",
+                           job["job_id"], job["scenario_id"])
+            work.cancel()
+            return
+
+
+async def run_job(queue: JobQueue, job: dict, worker_id: str, public_url: str):
+    """Run one job while holding its lease. Returns early if the lease is lost."""
+    work = asyncio.create_task(place_and_report(queue, job, worker_id, public_url))
+    lease = asyncio.create_task(keep_lease(queue, job, worker_id, work))
+    try:
+        # wait() rather than await: a job stopped for a lost lease is not an error here
+        await asyncio.wait({work})
+    finally:
+        lease.cancel()
+        if not work.done():
+            work.cancel()
+            await asyncio.gather(work, return_exceptions=True)
+
+
+async def place_and_report(queue: JobQueue, job: dict, worker_id: str, public_url: str):
+    """Place and analyze one job's call, then report the outcome to the queue."""
+    # Imported here so the supervisor process does not load the models
+    from app.pipeline.analysis_worker import analyze_transcript
+    from app.pipeline.call_orchestrator import place_call
+
+    scenario = job["payload"]
+    logger.info("Job %s: %s (attempt %d of %d)", job["job_id"], scenario["id"],
+                job["attempts"], job["max_attempts"])
+    lifecycle: dict = {}
+    try:
+        transcript = await place_call(scenario, public_url, lifecycle)
+        if transcript is None:
+            error = "no transcript" if lifecycle.get("answered") else f"call {lifecycle.get('status')}"
+            await asyncio.to_thread(
+                queue.fail, job["job_id"], worker_id, error, {"lifecycle": lifecycle}
+            )
+            return
+        transcript["run_id"] = job["run_id"]
+        report = await analyze_transcript(transcript, scenario)
+        result = {
+            "call_id": transcript.get("call_id"),
+            "lifecycle": lifecycle,
+            "transcript": transcript,
+            "report": report,
+        }
+        if not await asyncio.to_thread(queue.complete, job["job_id"], worker_id, result):
+            logger.warning("Job %s finished after its lease was lost; result dropped", job["job_id"])
+    except asyncio.CancelledError:
+        await asyncio.to_thread(queue.fail, job["job_id"], worker_id, "worker stopped")
+        raise
+    except Exception as e:
+        logger.exception("Job %s failed", job["job_id"])
+        await asyncio.to_thread(queue.fail, job["job_id"], worker_id, f"{type(e).__name__}: {e}")
+
+
+async def work_loop(queue: JobQueue, worker_id: str, public_url: str, stop: asyncio.Event):
+    """Claim and run jobs one at a time until `stop` is set."""
+    while not stop.is_set():
+        job = await asyncio.to_thread(queue.claim, worker_id, config.JOB_LEASE_S)
+        if job is None:
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=config.JOB_POLL_S)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        await run_job(queue, job, worker_id, public_url)
+
+
+async def serve_node(port: int, public_url: str, worker_id: str, queue_url: str | None):
+    """Run the FastAPI server and the job loop in one process until shutdown."""
+    from app.main import app
+
+    # The /voice webhook points SignalWire at this node's media stream
+    config.NGROK_URL = public_url
+    queue = open_job_queue(queue_url)
+    logger.info("Worker %s serving %s, polling %s", worker_id, public_url, queue_url or config.JOB_QUEUE_URL)
+    server = uvicorn.Server(uvicorn.Config(app, host="0.0.0.0", port=port))
+    stop = asyncio.Event()
+    worker = asyncio.create_task(work_loop(queue, worker_id, public_url, stop))
+    try:
+        await server.serve()
+    finally:
+        stop.set()
+        worker.cancel()
+        await asyncio.gather(worker, return_exceptions=True)
+
+
+def spawn_workers(args) -> int:
+    """Start one worker node process per public URL on consecutive ports."""
+    procs = []
+    for i, url in enumerate(args.public_url):
+        cmd = [sys.executable, "-m", "app.pipeline.worker_node",
+               "--port", str(args.port + i), "--public-url", url]
+        if args.queue:
+            cmd += ["--queue", args.queue]
+        procs.append(subprocess.Popen(cmd))
+        logger.info("Started worker pid %d on port %d (%s)", procs[-1].pid, args.port + i, url)
+    try:
+        return max(p.wait() for p in procs)
+    except KeyboardInterrupt:
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            p.wait()
+        return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a voice bot worker node")
+    parser.add_argument("--port", "-p", type=int, default=8000, help="Server port (first port with --workers)")
+    parser.add_argument(
+        "--public-url", action="append", default=[],
+        help="Public URL routed to this node's port (default: NGROK_URL); repeat once per worker",
+    )
+    parser.add_argument("--workers", "-w", type=int, default=1,
+                        help="Number of worker processes on consecutive ports")
+    parser.add_argument("--queue", "-q", help="Job queue URL (default: JOB_QUEUE_URL)")
+    parser.add_argument("--worker-id", help="Name reported in the queue (default: host:port)")
+    args = parser.parse_args()
+
+    if not args.public_url and config.NGROK_URL:
+        args.public_url = [config.NGROK_URL]
+    if len(args.public_url) != args.workers:
+        parser.error(f"--workers {args.workers} needs {args.workers} --public-url values, "
+                     f"got {len(args.public_url)}")
+
+    if args.workers > 1:
+        sys.exit(spawn_workers(args))
+
+    worker_id = args.worker_id or f"{socket.gethostname()}:{args.port}"
+    asyncio.run(serve_node(args.port, args.public_url[0], worker_id, args.queue))
+
+
+if __name__ == "__main__":
+    main()
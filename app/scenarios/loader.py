@@ -1,41 +1,19 @@
-import os
-import yaml
-import logging
-
-from app import config
-
-logger = logging.getLogger(__name__)
+from app.scenarios.registry import get_registry
 
 
 def load_scenario(scenario_id: str) -> dict:
-    """Load a single scenario by ID from the definitions directory."""
-    definitions_dir = config.SCENARIOS_DIR
-    for filename in os.listdir(definitions_dir):
-        if not filename.endswith(".yaml"):
-            continue
-        filepath = os.path.join(definitions_dir, filename)
-        with open(filepath) as f:
-            scenario = yaml.safe_load(f)
-        if scenario.get("id") == scenario_id:
-            return scenario
-    raise ValueError(f"Scenario not found: {scenario_id}")
+    """Look up a single scenario by ID.
+
+    The returned dict is shared with the registry and must not be modified.
+    """
+    return get_registry().get(scenario_id)
 
 
 def load_all_scenarios() -> list[dict]:
-    """Load all scenario YAML files, sorted by filename."""
-    definitions_dir = config.SCENARIOS_DIR
-    scenarios = []
-    for filename in sorted(os.listdir(definitions_dir)):
-        if not filename.endswith(".yaml"):
-            continue
-        filepath = os.path.join(definitions_dir, filename)
-        with open(filepath) as f:
-            scenario = yaml.safe_load(f)
-        scenarios.append(scenario)
-    logger.info("Loaded %d scenarios", len(scenarios))
-    return scenarios
+    """Return all scenarios, sorted by filename."""
+    return get_registry().all()
 
 
 def list_scenario_ids() -> list[str]:
     """Return a list of all scenario IDs."""
-    return [s["id"] for s in load_all_scenarios()]
+    return get_registry().ids()
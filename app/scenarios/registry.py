@@ -0,0 +1,169 @@
+"""Cached, validated registry of scenario definitions.
+
+All YAML files in the definitions directory are parsed and checked against
+SCENARIO_SCHEMA once, indexed by id, and their persona system prompts are
+built up front. Later lookups only stat the directory and re-parse files
+whose mtime or size changed.
+"""
+import logging
+import os
+import threading
+
+import yaml
+
+from app import config
+from app.brain.patient_persona import build_system_prompt
+
+logger = logging.getLogger(__name__)
+
+# Use the libyaml parser when it is available
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# field: (type, required)
+SCENARIO_SCHEMA = {
+    "id": (str, True),
+    "name": (str, True),
+    "patient_name": (str, True),
+    "patient_age": (int, True),
+    "date_of_birth": (str, False),
+    "personality": (str, True),
+    "speaking_style": (str, True),
+    "goal": (str, True),
+    "backstory": (str, True),
+    "instructions": (str, True),
+    "expected_agent_actions": (list, False),
+    "bug_triggers": (list, False),
+}
+
+
+class ScenarioError(ValueError):
+    """A scenario definition file is malformed."""
+
+
+def validate_scenario(scenario, source: str) -> dict:
+    """Check a parsed definition against SCENARIO_SCHEMA. Returns it unchanged."""
+    if not isinstance(scenario, dict):
+        raise ScenarioError(f"{source}: expected a mapping, got {type(scenario).__name__}")
+    problems = []
+    for field, (expected, required) in SCENARIO_SCHEMA.items():
+        if field not in scenario:
+            if required:
+                problems.append(f"missing '{field}'")
+            continue
+        value = scenario[field]
+        if not isinstance(value, expected) or isinstance(value, bool):
+            problems.append(f"'{field}' should be {expected.__name__}, got {type(value).__name__}")
+        elif expected is list and not all(isinstance(v, str) for v in value):
+            problems.append(f"'{field}' should be a list of strings")
+    if problems:
+        raise ScenarioError(f"{source}: " + "; ".join(problems))
+    return scenario
+
+
+class ScenarioRegistry:
+    """Scenario definitions indexed by id, reloaded by file mtime."""
+
+    def __init__(self, definitions_dir: str):
+        self.definitions_dir = definitions_dir
+        self._lock = threading.Lock()
+        self._files: dict[str, tuple[tuple[int, int], dict]] = {}  # filename -> (stat key, scenario)
+        self._rejected: dict[str, tuple[int, int]] = {}  # filename -> stat key of a bad version
+        self._by_id: dict[str, dict] = {}
+        self._prompts: dict[str, str] = {}
+        self._ordered: list[dict] = []
+        self._loaded = False
+
+    def refresh(self) -> bool:
+        """Re-parse added or changed files and drop removed ones. Returns True if anything changed.
+
+        The first load raises ScenarioError on a malformed file. Later, a file
+        that becomes malformed is logged and its previous version is kept.
+        """
+        with self._lock:
+            strict = not self._loaded
+            entries = sorted(
+                (e for e in os.scandir(self.definitions_dir) if e.name.endswith(".yaml")),
+                key=lambda e: e.name,
+            )
+            files = {}
+            changed = False
+            for entry in entries:
+                stat = entry.stat()
+                key = (stat.st_mtime_ns, stat.st_size)
+                cached = self._files.get(entry.name)
+                if cached and cached[0] == key:
+                    files[entry.name] = cached
+                    continue
+                if self._rejected.get(entry.name) == key:
+                    if cached:
+                        files[entry.name] = cached
+                    continue
+                changed = True
+                try:
+                    with open(entry.path) as f:
+                        scenario = yaml.load(f, Loader=YAML_LOADER)
+                    files[entry.name] = (key, validate_scenario(scenario, entry.path))
+                    self._rejected.pop(entry.name, None)
+                except (yaml.YAMLError, ScenarioError) as e:
+                    if strict:
+                        raise ScenarioError(str(e)) from e
+                    logger.error("Keeping previous version of %s: %s", entry.name, e)
+                    self._rejected[entry.name] = key
+                    if cached:
+                        files[entry.name] = cached
+
+            if not changed and files.keys() == self._files.keys():
+                return False
+
+            by_id: dict[str, dict] = {}
+            for filename, (_, scenario) in files.items():
+                if scenario["id"] in by_id:
+                    message = f"Duplicate scenario id '{scenario['id']}' in {filename}"
+                    if strict:
+                        raise ScenarioError(message)
+                    logger.error(message)
+                    continue
+                by_id[scenario["id"]] = scenario
+
+            self._files = files
+            self._by_id = by_id
+            self._ordered = list(by_id.values())
+            self._prompts = {sid: build_system_prompt(s) for sid, s in by_id.items()}
+            self._loaded = True
+            logger.info("Loaded %d scenarios", len(by_id))
+            return True
+
+    def get(self, scenario_id: str) -> dict:
+        self.refresh()
+        try:
+            return self._by_id[scenario_id]
+        except KeyError:
+            raise ValueError(f"Scenario not found: {scenario_id}") from None
+
+    def all(self) -> list[dict]:
+        """All scenarios, sorted by filename."""
+        self.refresh()
+        return list(self._ordered)
+
+    def ids(self) -> list[str]:
+        self.refresh()
+        return [s["id"] for s in self._ordered]
+
+    def system_prompt(self, scenario: dict) -> str:
+        """Precompiled persona prompt, rebuilt only for scenarios not in the registry."""
+        self.refresh()
+        prompt = self._prompts.get(scenario.get("id"))
+        if prompt is None or self._by_id[scenario["id"]] != scenario:
+            return build_system_prompt(scenario)
+        return prompt
+
+
+_registry: ScenarioRegistry | None = None
+
+
+def get_registry() -> ScenarioRegistry:
+    """Return the process-wide registry for config.SCENARIOS_DIR."""
+    global _registry
+    if _registry is None:
+        _registry = ScenarioRegistry(config.SCENARIOS_DIR)
+    return _registry
@@ -1,5 +1,8 @@
+import re
+import threading
+import time
+
 import numpy as np
-from faster_whisper import WhisperModel
 
 from app import config
 
@@ -7,11 +10,36 @@ from app import config
 class STTEngine:
     """Speech-to-text engine using faster-whisper."""
 
-    def __init__(self, model_size: str | None = None):
-        size = model_size or config.WHISPER_MODEL_SIZE
-        self.model = WhisperModel(size, device="cpu", compute_type="int8")
+    def __init__(
+        self,
+        model_size: str | None = None,
+        cpu_threads: int | None = None,
+        compute_type: str | None = None,
+        num_workers: int | None = None,
+        beam_size: int | None = None,
+    ):
+        """Arguments left as None come from the WHISPER_* settings.
 
-    def transcribe(self, audio_pcm_16khz: np.ndarray) -> tuple[str, float]:
+        num_workers is how many transcribe() calls can run at once from
+        different threads; cpu_threads is the threads each one uses.
+        """
+        # Imported here so importing the server or the suite CLI does not load it
+        from faster_whisper import WhisperModel
+
+        self.model_size = model_size or config.WHISPER_MODEL_SIZE
+        self.compute_type = compute_type or config.WHISPER_COMPUTE_TYPE
+        self.cpu_threads = config.WHISPER_CPU_THREADS if cpu_threads is None else cpu_threads
+        self.num_workers = num_workers or config.WHISPER_NUM_WORKERS
+        self.beam_size = beam_size or config.WHISPER_BEAM_SIZE
+        self.model = WhisperModel(
+            self.model_size,
+            device="cpu",
+            compute_type=self.compute_type,
+            cpu_threads=self.cpu_threads,
+            num_workers=self.num_workers,
+        )
+
+    def transcribe(self, audio_pcm_16khz: np.ndarray, beam_size: int | None = None) -> tuple[str, float]:
         """Transcribe 16kHz 16-bit PCM audio to text.
 
         Returns (text, confidence) where confidence is the average log probability.
@@ -23,7 +51,7 @@ class STTEngine:
 
         segments, _info = self.model.transcribe(
             audio_float,
-            beam_size=1,
+            beam_size=beam_size or self.beam_size,
             language="en",
             vad_filter=True,
             vad_parameters=dict(
@@ -39,3 +67,115 @@ class STTEngine:
         text = " ".join(s.text.strip() for s in segment_list)
         avg_logprob = sum(s.avg_logprob for s in segment_list) / len(segment_list)
         return text, avg_logprob
+
+    def transcribe_detailed(self, audio_pcm_16khz: np.ndarray) -> tuple[str, float, dict]:
+        """transcribe() plus which model decoded it and how long it took."""
+        started = time.perf_counter()
+        text, confidence = self.transcribe(audio_pcm_16khz)
+        info = {
+            "tier": "accurate",
+            "models": {"accurate": self.model_size},
+            "escalated": None,
+            "tier_ms": {"accurate": round((time.perf_counter() - started) * 1000, 1)},
+        }
+        return text, confidence, info
+
+
+# Dates, times, IDs and phone numbers: where small models slip most, and the
+# facts the bug detector checks
+NUMBERS = re.compile(
+    r"\d|\b(one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve|"
+    r"thirteen|fourteen|fifteen|twenty|thirty|forty|fifty|hundred|first|second|third)\b",
+    re.IGNORECASE,
+)
+
+
+class CascadeSTT:
+    """Transcribe with a fast model, re-decoding hard utterances with the accurate one.
+
+    An utterance goes straight to the accurate model if it is longer than
+    escalate_after_s. Otherwise the fast model's result is kept unless its
+    average log probability is below min_logprob ("low_confidence") or it
+    contains numbers ("complex").
+    """
+
+    def __init__(
+        self,
+        fast: STTEngine,
+        accurate: STTEngine,
+        min_logprob: float | None = None,
+        escalate_after_s: float | None = None,
+    ):
+        self.fast = fast
+        self.accurate = accurate
+        self.min_logprob = config.STT_ESCALATE_LOGPROB if min_logprob is None else min_logprob
+        self.escalate_after_s = (
+            config.STT_ESCALATE_AFTER_S if escalate_after_s is None else escalate_after_s
+        )
+
+    def transcribe(self, audio_pcm_16khz: np.ndarray) -> tuple[str, float]:
+        text, confidence, _info = self.transcribe_detailed(audio_pcm_16khz)
+        return text, confidence
+
+    def escalation_reason(self, text: str, confidence: float) -> str | None:
+        if not text.strip():
+            return None
+        if confidence < self.min_logprob:
+            return "low_confidence"
+        if NUMBERS.search(text):
+            return "complex"
+        return None
+
+    def transcribe_detailed(self, audio_pcm_16khz: np.ndarray) -> tuple[str, float, dict]:
+        tier_ms = {}
+        models = {"fast": self.fast.model_size, "accurate": self.accurate.model_size}
+        if len(audio_pcm_16khz) / 16000 > self.escalate_after_s:
+            reason = "long"
+        else:
+            started = time.perf_counter()
+            text, confidence = self.fast.transcribe(audio_pcm_16khz)
+            tier_ms["fast"] = round((time.perf_counter() - started) * 1000, 1)
+            reason = self.escalation_reason(text, confidence)
+            if reason is None:
+                info = {"tier": "fast", "models": models, "escalated": None, "tier_ms": tier_ms}
+                return text, confidence, info
+
+        started = time.perf_counter()
+        text, confidence = self.accurate.transcribe(audio_pcm_16khz)
+        tier_ms["accurate"] = round((time.perf_counter() - started) * 1000, 1)
+        info = {"tier": "accurate", "models": models, "escalated": reason, "tier_ms": tier_ms}
+        return text, confidence, info
+
+
+def build_stt_engine(
+    model_size: str | None = None,
+    cascade_model: str | None = None,
+    cpu_threads: int | None = None,
+) -> STTEngine | CascadeSTT:
+    """Build the engine the live stack uses: a CascadeSTT when a cascade model is set.
+
+    Arguments left as None come from WHISPER_MODEL_SIZE, STT_CASCADE_MODEL and
+    WHISPER_CPU_THREADS.
+    """
+    accurate = STTEngine(model_size, cpu_threads=cpu_threads)
+    fast_model = config.STT_CASCADE_MODEL if cascade_model is None else cascade_model
+    if fast_model and fast_model != accurate.model_size:
+        return CascadeSTT(STTEngine(fast_model, cpu_threads=cpu_threads), accurate)
+    return accurate
+
+
+_engine: STTEngine | CascadeSTT | None = None
+_engine_lock = threading.Lock()
+
+
+def get_stt_engine() -> STTEngine | CascadeSTT:
+    """Return the process-wide engine, so each server worker loads the weights once.
+
+    With STT_CASCADE_MODEL set this is a CascadeSTT in front of the
+    WHISPER_MODEL_SIZE model.
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = build_stt_engine()
+    return _engine
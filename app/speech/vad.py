@@ -1,30 +1,63 @@
+import threading
+
 import numpy as np
-import torch
 
 
 class VADDetector:
-    """Voice Activity Detection using silero-vad."""
+    """Voice Activity Detection using silero-vad.
+
+    Silero runs natively at 8kHz (256-sample frames) and 16kHz (512-sample
+    frames). The call path uses 8kHz, the rate the phone audio arrives at.
+    """
+
+    CHUNK_SAMPLES = {8000: 256, 16000: 512}
 
-    def __init__(self):
+    def __init__(self, sample_rate: int = 8000):
+        # Imported here so importing the server or the suite CLI does not load torch
+        import torch
+
+        self.torch = torch
         self.model, _utils = torch.hub.load(
             repo_or_dir="snakers4/silero-vad",
             model="silero_vad",
             trust_repo=True,
         )
         self.model.eval()
-        self.SAMPLE_RATE = 16000
+        self.sample_rate = sample_rate
+        self.chunk_samples = self.CHUNK_SAMPLES[sample_rate]
 
-    def is_speech(self, audio_chunk_16khz: np.ndarray) -> bool:
+    def is_speech(self, audio_chunk: np.ndarray) -> bool:
         """Check if an audio chunk contains speech.
 
-        The chunk should be 16kHz 16-bit PCM, ideally 512 samples (32ms).
+        The chunk should be 16-bit PCM at the detector's sample rate,
+        chunk_samples long (32ms).
         """
-        audio_tensor = torch.from_numpy(
-            audio_chunk_16khz.astype(np.float32) / 32768.0
-        )
-        confidence = self.model(audio_tensor, self.SAMPLE_RATE).item()
+        audio_tensor = self.torch.from_numpy(audio_chunk.astype(np.float32) / 32768.0)
+        confidence = self.model(audio_tensor, self.sample_rate).item()
         return confidence > 0.5
 
     def reset(self):
         """Reset model state between utterances."""
         self.model.reset_states()
+
+
+# Idle detectors of this process; a silero model keeps per-stream state, so
+# concurrent calls each need their own, but finished calls hand theirs back.
+# Callers run in worker threads, hence the lock
+_idle: list[VADDetector] = []
+_idle_lock = threading.Lock()
+
+
+def acquire_vad() -> VADDetector:
+    """Take an idle detector, loading a new model only if none is free."""
+    with _idle_lock:
+        if _idle:
+            return _idle.pop()
+    return VADDetector()
+
+
+def release_vad(vad: VADDetector):
+    """Reset a detector and keep it for the next call in this process."""
+    vad.reset()
+    with _idle_lock:
+        _idle.append(vad)
@@ -0,0 +1,323 @@
+"""Per-call session state shared between server workers and the suite runner.
+
+place_call registers each call here with its scenario, keyed by CallSid.
+The /status webhook records each SignalWire status callback, and whichever
+server worker receives the call's media stream looks its scenario up by
+the stream's callSid and marks when the stream starts and ends. place_call
+polls the same SQLite file to learn when the call is over. These may all
+run in different processes.
+
+A call moves queued -> initiated -> ringing -> in-progress and ends in one
+of TERMINAL_STATUSES. Callbacks can arrive out of order, so a status never
+moves a call backwards and a terminal status is final. The time each state
+was first reached is kept, and ring time and answer latency are derived
+from those times.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import time
+
+from app import config
+
+logger = logging.getLogger(__name__)
+
+STATUS_RANK = {"queued": 0, "initiated": 1, "ringing": 2, "in-progress": 3}
+TERMINAL_STATUSES = {"completed", "busy", "no-answer", "failed", "canceled"}
+# Callback event names that differ from the CallStatus they stand for
+STATUS_ALIASES = {"answered": "in-progress"}
+STATUS_COLUMNS = {"initiated": "initiated_at", "ringing": "ringing_at", "in-progress": "answered_at"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS call_sessions (
+    call_sid TEXT PRIMARY KEY,
+    scenario_id TEXT,
+    status TEXT NOT NULL,
+    created_at REAL,
+    initiated_at REAL,
+    ringing_at REAL,
+    answered_at REAL,
+    ended_at REAL,
+    updated_at REAL NOT NULL,
+    events TEXT NOT NULL DEFAULT '[]',
+    scenario TEXT,
+    worker_id TEXT,
+    stream_sid TEXT,
+    media_started_at REAL,
+    media_ended_at REAL,
+    transcript_call_id TEXT
+);
+CREATE INDEX IF NOT EXISTS call_sessions_updated ON call_sessions (updated_at);
+
+CREATE TABLE IF NOT EXISTS workers (
+    worker_id TEXT PRIMARY KEY,
+    pid INTEGER NOT NULL,
+    host TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    heartbeat_at REAL NOT NULL,
+    info TEXT NOT NULL DEFAULT '{}',
+    metrics TEXT
+);
+"""
+
+# Columns added after the first release of call_sessions
+MIGRATIONS = {
+    "scenario": "TEXT",
+    "worker_id": "TEXT",
+    "stream_sid": "TEXT",
+    "media_started_at": "REAL",
+    "media_ended_at": "REAL",
+    "transcript_call_id": "TEXT",
+}
+WORKER_MIGRATIONS = {
+    "metrics": "TEXT",
+}
+
+# The media stream may connect before place_call has registered the CallSid
+SCENARIO_LOOKUP_WAIT_S = 5.0
+
+
+def worker_id() -> str:
+    """Id of this server worker process."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def lifecycle_summary(session: dict) -> dict:
+    """Final status, ring time and answer latency of a session row."""
+    ringing = session.get("ringing_at")
+    answered = session.get("answered_at")
+    ended = session.get("ended_at")
+    created = session.get("created_at")
+    ring_end = answered or ended
+    return {
+        "call_sid": session["call_sid"],
+        "status": session["status"],
+        "answered": answered is not None,
+        "ring_time_s": round(ring_end - ringing, 3) if ringing and ring_end else None,
+        "answer_latency_s": round(answered - created, 3) if answered and created else None,
+        "duration_s": round(ended - answered, 3) if answered and ended else None,
+    }
+
+
+class CallSessionStore:
+    """SQLite table of call sessions, safe to share across processes."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        db = self.connect()
+        try:
+            db.executescript(SCHEMA)
+            columns = {row["name"] for row in db.execute("PRAGMA table_info(call_sessions)")}
+            for column, kind in MIGRATIONS.items():
+                if column not in columns:
+                    db.execute(f"ALTER TABLE call_sessions ADD COLUMN {column} {kind}")
+            columns = {row["name"] for row in db.execute("PRAGMA table_info(workers)")}
+            for column, kind in WORKER_MIGRATIONS.items():
+                if column not in columns:
+                    db.execute(f"ALTER TABLE workers ADD COLUMN {column} {kind}")
+        finally:
+            db.close()
+
+    def connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.row_factory = sqlite3.Row
+        return db
+
+    def register(self, call_sid: str, scenario: dict, created_at: float):
+        """Record a placed call's scenario and when the REST request went out."""
+        db = self.connect()
+        try:
+            db.execute(
+                "INSERT INTO call_sessions (call_sid, scenario_id, scenario, status, created_at, "
+                "updated_at) VALUES (?, ?, ?, 'queued', ?, ?) ON CONFLICT(call_sid) DO UPDATE SET "
+                "scenario_id = excluded.scenario_id, scenario = excluded.scenario, "
+                "created_at = excluded.created_at",
+                (call_sid, scenario["id"], json.dumps(scenario, default=str), created_at, time.time()),
+            )
+        finally:
+            db.close()
+
+    def record_status(self, call_sid: str, status: str, at: float | None = None) -> dict:
+        """Apply a status callback and return the updated session."""
+        at = at or time.time()
+        status = STATUS_ALIASES.get(status, status)
+        db = self.connect()
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute("SELECT * FROM call_sessions WHERE call_sid = ?", (call_sid,)).fetchone()
+            session = dict(row) if row else {
+                "call_sid": call_sid, "scenario_id": None, "status": "queued", "created_at": None,
+                "initiated_at": None, "ringing_at": None, "answered_at": None, "ended_at": None,
+                "events": "[]",
+            }
+            events = json.loads(session["events"])
+            events.append([status, at])
+            session["events"] = json.dumps(events)
+
+            current = session["status"]
+            if current in TERMINAL_STATUSES:
+                logger.debug("Call %s already %s; ignoring %s", call_sid, current, status)
+            elif status in TERMINAL_STATUSES:
+                session["status"] = status
+                session["ended_at"] = at
+            elif STATUS_RANK.get(status, -1) > STATUS_RANK.get(current, -1):
+                session["status"] = status
+            column = STATUS_COLUMNS.get(status)
+            if column and session[column] is None and current not in TERMINAL_STATUSES:
+                session[column] = at
+            session["updated_at"] = time.time()
+
+            columns = ("status", "initiated_at", "ringing_at", "answered_at", "ended_at",
+                       "updated_at", "events")
+            if row:
+                db.execute(
+                    f"UPDATE call_sessions SET {', '.join(f'{c} = :{c}' for c in columns)} "
+                    "WHERE call_sid = :call_sid",
+                    session,
+                )
+            else:
+                db.execute(
+                    f"INSERT INTO call_sessions (call_sid, {', '.join(columns)}) "
+                    f"VALUES (:call_sid, {', '.join(':' + c for c in columns)})",
+                    session,
+                )
+            db.execute("COMMIT")
+        finally:
+            db.close()
+        return session
+
+    def get(self, call_sid: str) -> dict | None:
+        db = self.connect()
+        try:
+            row = db.execute("SELECT * FROM call_sessions WHERE call_sid = ?", (call_sid,)).fetchone()
+        finally:
+            db.close()
+        return dict(row) if row else None
+
+    def start_media(self, call_sid: str, worker: str, stream_sid: str) -> dict | None:
+        """Claim a call's media stream for a worker. Returns the session, or None if unknown."""
+        now = time.time()
+        db = self.connect()
+        try:
+            updated = db.execute(
+                "UPDATE call_sessions SET worker_id = ?, stream_sid = ?, media_started_at = ?, "
+                "updated_at = ? WHERE call_sid = ? AND scenario IS NOT NULL",
+                (worker, stream_sid, now, now, call_sid),
+            ).rowcount
+        finally:
+            db.close()
+        return self.get(call_sid) if updated else None
+
+    async def scenario_for_stream(self, call_sid: str, worker: str, stream_sid: str) -> dict | None:
+        """The scenario placed with `call_sid`, waiting briefly for place_call to register it."""
+        deadline = time.monotonic() + SCENARIO_LOOKUP_WAIT_S
+        while True:
+            session = await asyncio.to_thread(self.start_media, call_sid, worker, stream_sid)
+            if session:
+                return json.loads(session["scenario"])
+            if time.monotonic() > deadline:
+                return None
+            await asyncio.sleep(0.1)
+
+    def end_media(self, call_sid: str, transcript_call_id: str | None):
+        """Mark the media stream finished; the transcript (if any) is in the call store."""
+        now = time.time()
+        db = self.connect()
+        try:
+            db.execute(
+                "UPDATE call_sessions SET media_ended_at = ?, transcript_call_id = ?, updated_at = ? "
+                "WHERE call_sid = ?",
+                (now, transcript_call_id, now, call_sid),
+            )
+        finally:
+            db.close()
+
+    async def wait_for_call(self, call_sid: str, timeout: float) -> dict:
+        """Poll until the call's media stream has finished, or it ended without one.
+
+        A call that ended unanswered returns at once. One that was answered
+        gets config.CALL_END_GRACE_S after hang-up for its stream to finish.
+        Returns the last session seen, also when `timeout` runs out.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            session = await asyncio.to_thread(self.get, call_sid)
+            if session["media_ended_at"]:
+                return session
+            if session["status"] in TERMINAL_STATUSES:
+                if not session["answered_at"] and not session["media_started_at"]:
+                    logger.warning("Call %s ended without answer: %s", call_sid, session["status"])
+                    return session
+                if time.time() - session["ended_at"] > config.CALL_END_GRACE_S:
+                    logger.warning("Call %s %s but its media stream never finished",
+                                   call_sid, session["status"])
+                    return session
+            if time.monotonic() > deadline:
+                logger.warning("Call %s timed out waiting for completion", call_sid)
+                return session
+            await asyncio.sleep(config.CALL_STATUS_POLL_S)
+
+    # Server workers
+
+    def heartbeat(self, worker: str, started_at: float, info: dict | None = None,
+                  metrics: dict | None = None):
+        """Record that a server worker is alive, with its latency histograms' state."""
+        db = self.connect()
+        try:
+            db.execute(
+                "INSERT INTO workers (worker_id, pid, host, started_at, heartbeat_at, info, metrics) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(worker_id) DO UPDATE SET "
+                "heartbeat_at = excluded.heartbeat_at, info = excluded.info, metrics = excluded.metrics",
+                (worker, os.getpid(), socket.gethostname(), started_at, time.time(),
+                 json.dumps(info or {}), json.dumps(metrics) if metrics else None),
+            )
+        finally:
+            db.close()
+
+    def worker_metrics(self, stale_s: float) -> dict[str, dict]:
+        """Latency histogram state last published by each live worker, by worker id."""
+        db = self.connect()
+        try:
+            rows = db.execute(
+                "SELECT worker_id, metrics FROM workers WHERE heartbeat_at >= ? AND metrics IS NOT NULL",
+                (time.time() - stale_s,),
+            ).fetchall()
+        finally:
+            db.close()
+        return {row["worker_id"]: json.loads(row["metrics"]) for row in rows}
+
+    def workers(self, stale_s: float) -> list[dict]:
+        """Live workers (heartbeat within `stale_s`) with their active media streams."""
+        db = self.connect()
+        try:
+            rows = db.execute(
+                "SELECT w.*, (SELECT COUNT(*) FROM call_sessions c WHERE c.worker_id = w.worker_id "
+                "AND c.media_started_at IS NOT NULL AND c.media_ended_at IS NULL) AS active_calls, "
+                "(SELECT COUNT(*) FROM call_sessions c WHERE c.worker_id = w.worker_id "
+                "AND c.media_ended_at IS NOT NULL) AS finished_calls "
+                "FROM workers w WHERE w.heartbeat_at >= ? ORDER BY w.started_at",
+                (time.time() - stale_s,),
+            ).fetchall()
+        finally:
+            db.close()
+        workers = [dict(row) for row in rows]
+        for w in workers:
+            w["info"] = json.loads(w["info"])
+            del w["metrics"]  # Served by /metrics
+        return workers
+
+
+_sessions: CallSessionStore | None = None
+
+
+def get_call_sessions() -> CallSessionStore:
+    """Return the process-wide call session store."""
+    global _sessions
+    if _sessions is None:
+        _sessions = CallSessionStore(config.CALL_SESSIONS_PATH)
+    return _sessions
@@ -0,0 +1,146 @@
+"""Local stand-in for the SignalWire LaML Calls REST endpoint.
+
+Accepts call creations the way the real API does (basic auth, form
+fields, 201 with the call resource) without dialing anyone, and can inject
+latency, 503s and 429 rate limiting to exercise the CallPlacer's retries.
+With --outcome it also posts status callbacks for each call (initiated,
+ringing, then the outcome) so the call lifecycle can be tested end to end:
+
+    python -m app.telephony.laml_stub --port 9000 --fail-rate 0.2 --max-cps 5
+    python -m app.telephony.laml_stub --outcome busy --ring-s 3
+    SIGNALWIRE_API_BASE_URL=http://127.0.0.1:9000 uvicorn app.main:app --port 8000
+
+POST .../Calls/{sid}.json with Status=completed hangs a call up, and
+GET /calls lists the calls created so far.
+"""
+import argparse
+import asyncio
+import logging
+import random
+import time
+import uuid
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+
+# Callbacks posted after ringing, per simulated outcome
+OUTCOME_STATUSES = {
+    "answered": ["in-progress", "completed"],
+    "busy": ["busy"],
+    "no-answer": ["no-answer"],
+    "failed": ["failed"],
+}
+
+
+async def send_status_callbacks(call: dict, outcome: str, ring_s: float, talk_s: float):
+    """Post initiated, ringing and the outcome's statuses to the call's StatusCallback."""
+    statuses = ["initiated", "ringing"] + OUTCOME_STATUSES[outcome]
+    delays = [0.1, 0.2, ring_s, talk_s]
+    async with httpx.AsyncClient(timeout=5.0) as client:
+        for status, delay in zip(statuses, delays):
+            await asyncio.sleep(delay)
+            call["status"] = status
+            try:
+                await client.post(call["status_callback"], data={"CallSid": call["sid"], "CallStatus": status})
+            except httpx.HTTPError as e:
+                logger.warning("Status callback for %s failed: %s", call["sid"], e)
+
+
+def create_app(
+    fail_rate: float = 0.0,
+    max_cps: float = 0.0,
+    latency_ms: int = 0,
+    outcome: str | None = None,
+    ring_s: float = 2.0,
+    talk_s: float = 5.0,
+) -> FastAPI:
+    app = FastAPI(title="LaML REST stand-in")
+    app.state.calls = []
+    recent: list[float] = []
+    tasks: set[asyncio.Task] = set()
+
+    @app.post("/api/laml/2010-04-01/Accounts/{project_id}/Calls.json")
+    async def create_call(project_id: str, request: Request):
+        if not request.headers.get("authorization", "").startswith("Basic "):
+            return JSONResponse({"code": 20003, "message": "Authentication Error"}, status_code=401)
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+
+        now = time.monotonic()
+        recent[:] = [t for t in recent if now - t < 1.0]
+        if max_cps and len(recent) >= max_cps:
+            return JSONResponse({"code": 20429, "message": "Too Many Requests"},
+                                status_code=429, headers={"Retry-After": "1"})
+        if random.random() < fail_rate:
+            return JSONResponse({"code": 20500, "message": "Service Unavailable"}, status_code=503)
+
+        form = await request.form()
+        missing = [f for f in ("To", "From", "Url") if not form.get(f)]
+        if missing:
+            return JSONResponse({"code": 21201, "message": f"Missing {', '.join(missing)}"},
+                                status_code=400)
+        recent.append(now)
+        call = {
+            "sid": "CA" + uuid.uuid4().hex,
+            "account_sid": project_id,
+            "to": form["To"],
+            "from": form["From"],
+            "url": form["Url"],
+            "status_callback": form.get("StatusCallback"),
+            "status_callback_event": form.getlist("StatusCallbackEvent"),
+            "status": "queued",
+            "date_created": time.strftime("%a, %d %b %Y %H:%M:%S +0000", time.gmtime()),
+        }
+        app.state.calls.append(call)
+        logger.info("Created call %s to %s", call["sid"], call["to"])
+        if outcome and call["status_callback"]:
+            task = asyncio.create_task(send_status_callbacks(call, outcome, ring_s, talk_s))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        return JSONResponse(call, status_code=201)
+
+    @app.post("/api/laml/2010-04-01/Accounts/{project_id}/Calls/{call_sid}.json")
+    async def update_call(project_id: str, call_sid: str, request: Request):
+        form = await request.form()
+        call = next((c for c in app.state.calls if c["sid"] == call_sid), None)
+        if call is None:
+            return JSONResponse({"code": 20404, "message": "Not Found"}, status_code=404)
+        if form.get("Status"):
+            call["status"] = form["Status"]
+            logger.info("Call %s updated to %s", call_sid, call["status"])
+        return JSONResponse(call)
+
+    @app.get("/calls")
+    async def list_calls():
+        return app.state.calls
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run a stand-in LaML Calls REST server")
+    parser.add_argument("--port", "-p", type=int, default=9000)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of creations answered with 503")
+    parser.add_argument("--max-cps", type=float, default=0.0, help="Answer 429 above this many creations per second")
+    parser.add_argument("--latency-ms", type=int, default=0, help="Delay before each response")
+    parser.add_argument("--outcome", choices=sorted(OUTCOME_STATUSES),
+                        help="Post status callbacks ending in this outcome")
+    parser.add_argument("--ring-s", type=float, default=2.0, help="Seconds between ringing and the outcome")
+    parser.add_argument("--talk-s", type=float, default=5.0, help="Seconds an answered call stays up")
+    args = parser.parse_args()
+    app = create_app(args.fail_rate, args.max_cps, args.latency_ms, args.outcome, args.ring_s, args.talk_s)
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,89 +4,144 @@ import json
 import logging
 import time
 
-import numpy as np
 from fastapi import WebSocket, WebSocketDisconnect
 
 from app import config
 from app.audio.mulaw_converter import mulaw_decode, mulaw_encode
 from app.audio.resampler import resample_audio
 from app.audio.audio_buffer import AudioBuffer
+from app.audio.frame_assembler import FrameAssembler
 from app.audio.tts_engine import text_to_mulaw_chunks
-from app.speech.stt_engine import STTEngine
-from app.speech.vad import VADDetector
+from app.audio.filler_audio import FADE_FRAMES, fade_out, get_filler_clips
+from app.audio.call_recorder import CallRecorder, AGENT, PATIENT
+from app.speech.stt_engine import get_stt_engine
+from app.speech.vad import acquire_vad, release_vad
 from app.speech.turn_detector import TurnDetector, TurnState
 from app.brain.conversation import Conversation
 from app.brain.response_generator import ResponseGenerator
+from app.analysis.bug_detector import LiveBugDetector
+from app.analysis.call_store import get_call_store, new_call_id
 from app.analysis.transcript_logger import save_transcript, format_transcript_text
+from app.analysis.latency_metrics import latency_registry
+from app.pipeline.loop_monitor import loop_monitor
+from app.telephony.call_sessions import get_call_sessions, worker_id
 
 logger = logging.getLogger(__name__)
 
-# Global state for the current call scenario (set before each call)
-_current_scenario: dict | None = None
-_call_complete_event: asyncio.Event | None = None
-_last_transcript: dict | None = None
 
-
-def set_scenario(scenario: dict):
-    global _current_scenario, _call_complete_event, _last_transcript
-    _current_scenario = scenario
-    _call_complete_event = asyncio.Event()
-    _last_transcript = None
-
-
-def get_call_complete_event() -> asyncio.Event | None:
-    return _call_complete_event
-
-
-def get_last_transcript() -> dict | None:
-    return _last_transcript
+async def wait_for_stream_start(websocket: WebSocket) -> dict | None:
+    """Read messages until the stream's start event. Returns its `start` payload."""
+    while True:
+        data = json.loads(await asyncio.wait_for(websocket.receive_text(), timeout=30.0))
+        event = data.get("event")
+        if event == "connected":
+            logger.info("Stream connected")
+        elif event == "start":
+            return data["start"]
+        elif event == "stop":
+            return None
 
 
 async def handle_media_stream(websocket: WebSocket):
     """Handle a SignalWire Media Stream WebSocket connection.
 
-    This is the core real-time audio processing loop.
+    This is the core real-time audio processing loop. The call's scenario
+    is looked up in the shared session store by the callSid of the start
+    event, so the stream can land on any server worker.
     """
-    global _last_transcript
-
     await websocket.accept()
     logger.info("WebSocket connected")
 
-    scenario = _current_scenario
+    try:
+        start = await wait_for_stream_start(websocket)
+    except (WebSocketDisconnect, asyncio.TimeoutError):
+        start = None
+    if not start:
+        logger.error("Media stream closed before it started")
+        return
+    stream_sid = start["streamSid"]
+    call_sid = start.get("callSid")
+    stream_start_time = time.time()
+    logger.info("Stream started: %s (call %s)", stream_sid, call_sid)
+
+    sessions = get_call_sessions()
+    scenario = await sessions.scenario_for_stream(call_sid, worker_id(), stream_sid) if call_sid else None
     if not scenario:
-        logger.error("No scenario set for this call")
+        logger.error("No scenario registered for call %s", call_sid)
         await websocket.close()
         return
 
-    # Initialize components
-    stt = STTEngine()
-    vad = VADDetector()
-    turn_detector = TurnDetector(
-        silence_threshold_ms=config.SILENCE_THRESHOLD_MS,
-        min_speech_ms=300,
-    )
-    audio_buffer = AudioBuffer(max_duration_seconds=30, sample_rate=16000)
-    conversation = Conversation(scenario["id"])
-    response_gen = ResponseGenerator(scenario)
-
-    stream_sid: str | None = None
-    stream_start_time: float | None = None
+    # Initialize components; model weights are loaded once per worker process,
+    # off the event loop in case this call arrives before preloading finished
+    try:
+        stt = await asyncio.to_thread(get_stt_engine)
+        vad = await asyncio.to_thread(acquire_vad)
+        turn_detector = TurnDetector(
+            silence_threshold_ms=config.SILENCE_THRESHOLD_MS,
+            min_speech_ms=300,
+        )
+        # Raw 8kHz audio, resampled for Whisper once per utterance
+        audio_buffer = AudioBuffer(max_duration_seconds=30, sample_rate=8000)
+        conversation = Conversation(scenario["id"])
+        response_gen = ResponseGenerator(scenario)
+        # Known up front so the recording and the transcript share it
+        call_id = new_call_id(scenario["id"])
+        recorder = CallRecorder.for_call(call_id) if config.RECORD_CALLS else None
+        live_detector = LiveBugDetector(scenario)
+        fillers = get_filler_clips()
+    except Exception as e:
+        logger.error("Could not set up call %s: %s", call_sid, e, exc_info=True)
+        await asyncio.to_thread(sessions.end_media, call_sid, None)
+        await websocket.close()
+        return
+    if recorder:
+        recorder.event("stream_start", stream_sid=stream_sid)
+
     trial_ended = False
     chunk_count = 0
     speaking = False
     call_start = time.time()
-
-    # Queue for outbound audio chunks
-    outbound_queue: asyncio.Queue[bytes | None] = asyncio.Queue()
+    call_start_mono = time.monotonic()
+    loop_monitor.start()
+
+    # Queue for outbound audio chunks, each with the patient turn it belongs to
+    # and, for filler frames, the timings of the turn the filler stands in for
+    outbound_queue: asyncio.Queue[tuple[bytes, dict | None, dict | None] | None] = asyncio.Queue()
+
+    # Media-stream clock: ms since stream start, from inbound media timestamps
+    last_media_ms: float | None = None
+    last_media_mono: float | None = None
+
+    def media_now_ms() -> float | None:
+        """Current position on the media-stream clock, extrapolated from the last frame."""
+        if last_media_ms is None:
+            return None
+        return last_media_ms + (time.monotonic() - last_media_mono) * 1000
+
+    # Latency marks for the turn currently being produced/played
+    turn_timings: dict | None = None
+    turn_record: dict | None = None
+
+    def finish_turn_timings():
+        """Aggregate the current turn's marks into the latency histograms."""
+        nonlocal turn_timings, turn_record
+        if turn_timings is None:
+            return
+        durations = latency_registry.record_turn(turn_timings)
+        if turn_record is not None:
+            turn_record["latency_ms"] = durations
+        turn_timings = None
+        turn_record = None
 
     async def send_loop():
         """Send audio chunks from the outbound queue to SignalWire."""
         nonlocal speaking
         try:
             while True:
-                chunk = await outbound_queue.get()
-                if chunk is None:
+                item = await outbound_queue.get()
+                if item is None:
                     break  # Poison pill - call ended
+                chunk, turn, filler_timings = item
 
                 payload = base64.b64encode(chunk).decode("ascii")
                 msg = {
@@ -95,23 +150,112 @@ async def handle_media_stream(websocket: WebSocket):
                     "media": {"payload": payload},
                 }
                 await websocket.send_json(msg)
+                if recorder:
+                    recorder.write(PATIENT, chunk)
+
+                sent_ms = media_now_ms()
+                if turn is not None and sent_ms is not None:
+                    turn.setdefault("playout_start_ms", round(sent_ms))
+                    turn["playout_end_ms"] = round(sent_ms + 20)
+
+                if filler_timings is not None:
+                    filler_timings.setdefault("first_audio_sent", time.monotonic())
+                elif turn_timings is not None and "first_frame_sent" not in turn_timings:
+                    turn_timings["first_frame_sent"] = time.monotonic()
+                    turn_timings.setdefault("first_audio_sent", turn_timings["first_frame_sent"])
+                    finish_turn_timings()
 
                 # Pace at 20ms per chunk (real-time playback)
                 await asyncio.sleep(0.02)
         except (WebSocketDisconnect, Exception) as e:
             logger.debug("Send loop ended: %s", e)
 
-    async def speak_text(text: str):
-        """Convert text to audio and queue it for sending."""
+    # Filler playing (or waiting to play) while the current reply is produced
+    filler_task: asyncio.Task | None = None
+    filler_usage: dict | None = None
+
+    async def play_filler(timings: dict, usage: dict):
+        """Queue a filler clip once the reply has taken FILLER_AFTER_MS since speech_end."""
+        await fillers.load()
+        delay = config.FILLER_AFTER_MS / 1000 - (time.monotonic() - timings["speech_end"])
+        if delay > 0:
+            await asyncio.sleep(delay)
+        clip = fillers.pick()
+        if clip is None:
+            return
+        phrase, frames = clip
+        timings["filler_start"] = time.monotonic()
+        usage.update(
+            phrase=phrase,
+            after_ms=round((timings["filler_start"] - timings["speech_end"]) * 1000),
+            frames=len(frames),
+        )
+        if recorder:
+            recorder.event("filler", text=phrase)
+        for frame in frames:
+            outbound_queue.put_nowait((frame, None, timings))
+
+    def start_filler(timings: dict):
+        nonlocal filler_task, filler_usage
+        if config.FILLER_AFTER_MS <= 0:
+            return
+        filler_usage = {}
+        filler_task = asyncio.create_task(play_filler(timings, filler_usage))
+
+    def cut_filler() -> dict | None:
+        """Stop the current filler: drop its unsent frames, fading out the next few.
+
+        Returns the filler's usage for the turn, or None if none was played.
+        """
+        nonlocal filler_task, filler_usage
+        if filler_task is None:
+            return None
+        filler_task.cancel()
+        usage, filler_task, filler_usage = filler_usage, None, None
+        if not usage:
+            return None
+
+        kept, dropped = [], []
+        while not outbound_queue.empty():
+            item = outbound_queue.get_nowait()
+            (dropped if item is not None and item[2] is not None else kept).append(item)
+        tail = fade_out([chunk for chunk, _, _ in dropped[:FADE_FRAMES]])
+        for item in kept + [(chunk, None, dropped[0][2]) for chunk in tail]:
+            outbound_queue.put_nowait(item)
+
+        usage["played_ms"] = (usage["frames"] - len(dropped) + len(tail)) * 20
+        usage["cut"] = bool(dropped)
+        logger.info(
+            "Filler %r after %dms, played %dms%s", usage["phrase"], usage["after_ms"],
+            usage["played_ms"], " (cut)" if usage["cut"] else "",
+        )
+        return usage
+
+    async def speak_text(text: str, turn: dict | None = None):
+        """Convert text to audio and queue it for sending.
+
+        Playout start/end of `turn` are stamped on the media clock as its
+        frames go out.
+        """
         nonlocal speaking
         speaking = True
         turn_detector.mark_speaking()
+        if recorder:
+            recorder.event("patient_speech_start", text=text)
 
         chunks = await text_to_mulaw_chunks(text)
+        if turn_timings is not None and chunks:
+            turn_timings["tts_done"] = time.monotonic()
+        # The real answer is ready: stop any filler right before it
+        filler = cut_filler()
+        if filler and turn is not None:
+            turn["filler"] = filler
         for chunk in chunks:
             # Check if agent interrupted us (VAD detected speech during our turn)
             if turn_detector.state == TurnState.LISTENING:
                 logger.info("Interrupted by agent, stopping speech")
+                if recorder:
+                    recorder.event("interrupted")
                 # Clear SignalWire's playback buffer
                 try:
                     await websocket.send_json({
@@ -121,7 +265,12 @@ async def handle_media_stream(websocket: WebSocket):
                 except Exception:
                     pass
                 break
-            await outbound_queue.put(chunk)
+            await outbound_queue.put((chunk, turn, None))
+
+        if not chunks:
+            finish_turn_timings()
+        if recorder:
+            recorder.event("patient_speech_queued", frames=len(chunks))
 
         speaking = False
         turn_detector.mark_listening()
@@ -129,13 +278,24 @@ async def handle_media_stream(websocket: WebSocket):
     # Start the send loop
     send_task = asyncio.create_task(send_loop())
 
-    # VAD chunk accumulator (need 512 samples at 16kHz = 32ms)
-    vad_accumulator = np.array([], dtype=np.int16)
-    VAD_CHUNK_SIZE = 512
+    # Regroups 20ms media frames into 32ms VAD frames (256 samples at 8kHz)
+    vad_frames = FrameAssembler(vad.chunk_samples, vad.sample_rate)
+    VAD_CHUNK_MS = vad_frames.frame_ms
+
+    def transcribe_utterance(audio_8k):
+        # The one resample per utterance, off the event loop with the decode
+        return stt.transcribe_detailed(resample_audio(audio_8k, 8000, 16000))
+
+    # Agent speech onset/offset on the media clock for the turn being heard
+    speech_onset_ms: float | None = None
+    speech_offset_ms: float | None = None
 
     agent_silence_start: float | None = None
+    last_speech_mono: float | None = None
+    last_is_speech = False
     timeout_count = 0
     opening_sent = False
+    end_call = False  # Set inside the VAD loop to hang up after it
 
     try:
         while True:
@@ -148,24 +308,19 @@ async def handle_media_stream(websocket: WebSocket):
             data = json.loads(raw)
             event = data.get("event")
 
-            if event == "connected":
-                logger.info("Stream connected")
-
-            elif event == "start":
-                stream_sid = data["start"]["streamSid"]
-                stream_start_time = time.time()
-                logger.info("Stream started: %s", stream_sid)
-
-            elif event == "media":
+            if event == "media":
                 chunk_count += 1
+                media_ms = float(data["media"].get("timestamp", (chunk_count - 1) * 20))
+                last_media_ms, last_media_mono = media_ms, time.monotonic()
 
-                # Decode audio: base64 -> mu-law -> PCM 8kHz -> PCM 16kHz
+                # Decode audio: base64 -> mu-law -> PCM 8kHz
                 mulaw_bytes = base64.b64decode(data["media"]["payload"])
+                if recorder:
+                    recorder.write(AGENT, mulaw_bytes)
                 pcm_8k = mulaw_decode(mulaw_bytes)
-                pcm_16k = resample_audio(pcm_8k, 8000, 16000)
 
                 # Skip initial message period (if any)
-                elapsed = time.time() - (stream_start_time or time.time())
+                elapsed = time.time() - stream_start_time
                 if elapsed < config.TRIAL_MESSAGE_DURATION_S:
                     continue
 
@@ -176,63 +331,105 @@ async def handle_media_stream(websocket: WebSocket):
                     logger.info("Initial message period ended, listening...")
 
                 # Feed to audio buffer
-                await audio_buffer.add_samples(pcm_16k)
-
-                # VAD processing (accumulate to 512 samples)
-                vad_accumulator = np.concatenate([vad_accumulator, pcm_16k])
-                while len(vad_accumulator) >= VAD_CHUNK_SIZE:
-                    vad_chunk = vad_accumulator[:VAD_CHUNK_SIZE]
-                    vad_accumulator = vad_accumulator[VAD_CHUNK_SIZE:]
+                await audio_buffer.add_samples(pcm_8k)
 
+                # VAD processing, once per complete 32ms frame
+                for vad_chunk, timestamp_ms in vad_frames.push(pcm_8k, media_ms):
                     is_speech = vad.is_speech(vad_chunk)
-                    timestamp_ms = elapsed * 1000
 
                     prev_state = turn_detector.state
                     new_state = turn_detector.on_vad_result(is_speech, timestamp_ms)
 
                     if is_speech:
                         agent_silence_start = None
+                        last_speech_mono = time.monotonic()
+                        if speech_onset_ms is None:
+                            speech_onset_ms = timestamp_ms
+                        speech_offset_ms = timestamp_ms + VAD_CHUNK_MS
+                    if recorder and is_speech != last_is_speech:
+                        recorder.event("vad", speech=is_speech, state=new_state.value)
+                    last_is_speech = is_speech
 
                     # Transition: agent finished speaking -> process
                     if new_state == TurnState.PROCESSING and prev_state != TurnState.PROCESSING:
+                        # Previous turn never reached the wire (e.g. interrupted)
+                        finish_turn_timings()
+                        timings = {"speech_end": last_speech_mono or time.monotonic()}
+                        if recorder:
+                            recorder.event("agent_turn_end")
+                        onset_ms, offset_ms = speech_onset_ms, speech_offset_ms
+                        speech_onset_ms = speech_offset_ms = None
+
                         # Get buffered audio and transcribe
                         audio_data = await audio_buffer.get_and_clear()
                         if len(audio_data) > 0:
-                            agent_text, confidence = stt.transcribe(audio_data)
+                            timings["stt_start"] = time.monotonic()
+                            # Off the event loop, so other calls keep streaming; with
+                            # WHISPER_NUM_WORKERS > 1 several calls transcribe at once
+                            agent_text, confidence, stt_info = await asyncio.to_thread(
+                                transcribe_utterance, audio_data
+                            )
+                            timings["stt_end"] = time.monotonic()
 
                             # Skip empty transcriptions
                             if not agent_text.strip():
                                 turn_detector.mark_listening()
                                 continue
+                            start_filler(timings)
 
                             logger.info("Agent said: %s (conf=%.2f)", agent_text, confidence)
-                            conversation.add_agent_utterance(agent_text)
+                            if recorder:
+                                recorder.event("agent_text", text=agent_text, confidence=confidence)
+                            agent_turn = conversation.add_agent_utterance(agent_text)
+                            agent_turn["stt"] = {**stt_info, "logprob": round(confidence, 3)}
+                            if onset_ms is not None:
+                                agent_turn["onset_ms"] = round(onset_ms)
+                                agent_turn["offset_ms"] = round(offset_ms)
+                            live_detector.on_turn(agent_turn)
+                            if live_detector.stop_reason:
+                                reason = live_detector.stop_reason
+                                logger.info(
+                                    "Ending call early on %s: %s", reason["type"], reason["reason"]
+                                )
+                                if recorder:
+                                    recorder.event("early_stop", finding=reason["type"])
+                                cut_filler()
+                                end_call = True
+                                break
 
                             # Generate patient response
                             if not opening_sent:
                                 opening_sent = True
-                                patient_text = await response_gen.get_opening_line()
+                                patient_text = await response_gen.get_opening_line(timings)
                             else:
                                 patient_text = await response_gen.generate_response(
-                                    conversation.get_recent_messages()
+                                    conversation.get_recent_messages(), timings
                                 )
 
                             logger.info("Patient says: %s", patient_text)
-                            conversation.add_patient_utterance(patient_text)
+                            turn_timings = timings
+                            turn_record = conversation.add_patient_utterance(
+                                patient_text, timings=timings
+                            )
+                            live_detector.on_turn(turn_record)
 
                             # Speak the response
-                            await speak_text(patient_text)
+                            await speak_text(patient_text, turn_record)
 
                             # Check if conversation should end
                             goodbye_words = {"goodbye", "bye", "thank you, goodbye", "have a good"}
                             if any(w in patient_text.lower() for w in goodbye_words):
                                 logger.info("Patient said goodbye, ending call")
                                 await asyncio.sleep(2.0)  # Let audio finish
+                                end_call = True
                                 break
 
                             vad.reset()
                             agent_silence_start = time.time()
 
+                if end_call:
+                    break
+
                 # Track agent silence (for timeout prompts)
                 if not speaking and turn_detector.state == TurnState.LISTENING:
                     if agent_silence_start is None:
@@ -245,8 +442,9 @@ async def handle_media_stream(websocket: WebSocket):
                             prompt = "Hello? Are you still there?"
 
                         logger.info("Agent silent too long, prompting: %s", prompt)
-                        conversation.add_patient_utterance(prompt)
-                        await speak_text(prompt)
+                        prompt_turn = conversation.add_patient_utterance(prompt)
+                        live_detector.on_turn(prompt_turn)
+                        await speak_text(prompt, prompt_turn)
                         agent_silence_start = time.time()
 
                         if timeout_count >= 3:
@@ -264,21 +462,31 @@ async def handle_media_stream(websocket: WebSocket):
         logger.error("Media stream error: %s", e, exc_info=True)
     finally:
         # Signal send loop to stop
+        if filler_task is not None:
+            filler_task.cancel()
         await outbound_queue.put(None)
         send_task.cancel()
+        finish_turn_timings()
 
         # Save transcript
         transcript = conversation.to_transcript()
-        _last_transcript = transcript
-
+        transcript["call_id"] = call_id
+        transcript["loop_stalls"] = loop_monitor.stats(since=call_start_mono)
+        transcript["live_detection"] = live_detector.summary()
+        if recorder:
+            transcript["recording"] = await asyncio.to_thread(recorder.close)
+        release_vad(vad)
+
+        saved_call_id = None
         if transcript["turn_count"] > 0:
             filepath = save_transcript(transcript, scenario["id"])
+            saved_call_id = call_id
             logger.info("Call complete. Transcript saved: %s", filepath)
             print("\n" + format_transcript_text(transcript))
+            # place_call may read it from another process as soon as the session ends
+            await asyncio.to_thread(get_call_store().flush)
         else:
             logger.warning("Call ended with no conversation turns")
 
         await response_gen.close()
-
-        if _call_complete_event:
-            _call_complete_event.set()
+        await asyncio.to_thread(sessions.end_media, call_sid, saved_call_id)
@@ -1,30 +1,166 @@
+"""Outbound call placement through the SignalWire LaML (Twilio-compatible) REST API.
+
+One CallPlacer keeps a single pooled HTTP session for the process. It spaces
+call creations to CALLS_PER_SECOND, holds at most MAX_CONCURRENT_CALLS
+calls open at once, and retries transient failures (connection errors,
+timeouts, 429 and 5xx responses) with exponential backoff.
+"""
+import asyncio
 import logging
-from signalwire.rest import Client
+import random
+from contextlib import asynccontextmanager
+
+import httpx
 
 from app import config
 
 logger = logging.getLogger(__name__)
 
+STATUS_CALLBACK_EVENTS = ["initiated", "ringing", "answered", "completed"]
+
+
+class CallPlacementError(RuntimeError):
+    """The call could not be created."""
+
+
+class CallPlacer:
+    """Async, rate-limited client for creating outbound calls."""
+
+    def __init__(
+        self,
+        api_base_url: str | None = None,
+        project_id: str | None = None,
+        api_token: str | None = None,
+        calls_per_second: float | None = None,
+        max_concurrent: int | None = None,
+        max_retries: int | None = None,
+        backoff_s: float | None = None,
+    ):
+        self.project_id = project_id or config.SIGNALWIRE_PROJECT_ID
+        self.api_base_url = (api_base_url or config.SIGNALWIRE_API_BASE_URL).rstrip("/")
+        self.calls_per_second = calls_per_second or config.CALLS_PER_SECOND
+        self.max_concurrent = max_concurrent or config.MAX_CONCURRENT_CALLS
+        self.max_retries = config.CALL_CREATE_RETRIES if max_retries is None else max_retries
+        self.backoff_s = config.CALL_CREATE_BACKOFF_S if backoff_s is None else backoff_s
+        self.client = httpx.AsyncClient(
+            auth=(self.project_id, api_token or config.SIGNALWIRE_API_TOKEN),
+            timeout=httpx.Timeout(10.0, connect=5.0),
+            limits=httpx.Limits(max_connections=self.max_concurrent,
+                                max_keepalive_connections=self.max_concurrent),
+        )
+        self._slots = asyncio.Semaphore(self.max_concurrent)
+        self._rate_lock = asyncio.Lock()
+        self._next_create_at = 0.0
+
+    @property
+    def calls_url(self) -> str:
+        return f"{self.api_base_url}/api/laml/2010-04-01/Accounts/{self.project_id}/Calls.json"
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one of the MAX_CONCURRENT_CALLS slots for the length of a call."""
+        async with self._slots:
+            yield
+
+    async def _throttle(self):
+        """Wait for the next calls-per-second tick."""
+        loop = asyncio.get_running_loop()
+        async with self._rate_lock:
+            now = loop.time()
+            wait = self._next_create_at - now
+            self._next_create_at = max(now, self._next_create_at) + 1.0 / self.calls_per_second
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def _retry_delay(self, attempt: int, response: httpx.Response | None) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return self.backoff_s * (2 ** attempt) * (0.5 + random.random())
+
+    @staticmethod
+    def _call_sid(response: httpx.Response) -> str:
+        """Read the Call SID from a 2xx create response."""
+        try:
+            call_sid = response.json()["sid"]
+        except (ValueError, KeyError, TypeError) as e:
+            raise CallPlacementError(
+                f"Unexpected response (HTTP {response.status_code}): {response.text[:200]}"
+            ) from e
+        if not isinstance(call_sid, str) or not call_sid:
+            raise CallPlacementError(f"Unexpected Call SID in response: {call_sid!r}")
+        return call_sid
+
+    async def create_call(self, webhook_url: str, to: str | None = None) -> str:
+        """Create an outbound call that fetches LaML from `webhook_url`/voice. Returns the Call SID.
+
+        Every failure, including an unreadable 2xx response, raises CallPlacementError.
+        """
+        data = {
+            "To": to or config.TARGET_PHONE_NUMBER,
+            "From": config.SIGNALWIRE_FROM_NUMBER,
+            "Url": f"{webhook_url}/voice",
+            "StatusCallback": f"{webhook_url}/status",
+            "StatusCallbackEvent": STATUS_CALLBACK_EVENTS,
+            "Timeout": "30",
+        }
+        for attempt in range(self.max_retries + 1):
+            await self._throttle()
+            response = None
+            try:
+                response = await self.client.post(self.calls_url, data=data)
+            except httpx.TransportError as e:
+                error = f"{type(e).__name__}: {e}"
+            except httpx.HTTPError as e:
+                raise CallPlacementError(f"{type(e).__name__}: {e}") from e
+            else:
+                if response.status_code < 300:
+                    call_sid = self._call_sid(response)
+                    logger.info("Call initiated: SID=%s to=%s", call_sid, data["To"])
+                    return call_sid
+                error = f"HTTP {response.status_code}: {response.text[:200]}"
+                if response.status_code != 429 and response.status_code < 500:
+                    raise CallPlacementError(error)
+
+            if attempt == self.max_retries:
+                break
+            delay = self._retry_delay(attempt, response)
+            logger.warning("Call create failed (%s); retry %d/%d in %.1fs",
+                           error, attempt + 1, self.max_retries, delay)
+            await asyncio.sleep(delay)
+        raise CallPlacementError(f"Giving up after {self.max_retries + 1} attempts: {error}")
+
+    async def hang_up(self, call_sid: str):
+        """End a call in progress. Failures are logged, not raised."""
+        url = self.calls_url.removesuffix(".json") + f"/{call_sid}.json"
+        try:
+            response = await self.client.post(url, data={"Status": "completed"})
+        except httpx.TransportError as e:
+            logger.warning("Could not hang up %s: %s", call_sid, e)
+            return
+        if response.status_code >= 300:
+            logger.warning("Could not hang up %s: HTTP %d", call_sid, response.status_code)
+        else:
+            logger.info("Hung up call %s", call_sid)
+
+    async def close(self):
+        await self.client.aclose()
+
+
+_placer: CallPlacer | None = None
+
+
+def get_call_placer() -> CallPlacer:
+    """Return the process-wide call placer."""
+    global _placer
+    if _placer is None:
+        _placer = CallPlacer()
+    return _placer
+
 
-def make_call(webhook_url: str) -> str:
-    """Initiate an outbound call via SignalWire REST API.
-
-    Returns the Call SID.
-    """
-    client = Client(
-        config.SIGNALWIRE_PROJECT_ID,
-        config.SIGNALWIRE_API_TOKEN,
-        signalwire_space_url=config.SIGNALWIRE_SPACE_URL,
-    )
-
-    call = client.calls.create(
-        to=config.TARGET_PHONE_NUMBER,
-        from_=config.SIGNALWIRE_FROM_NUMBER,
-        url=f"{webhook_url}/voice",
-        status_callback=f"{webhook_url}/status",
-        status_callback_event=["initiated", "ringing", "answered", "completed"],
-        timeout=30,
-    )
-
-    logger.info("Call initiated: SID=%s to=%s", call.sid, config.TARGET_PHONE_NUMBER)
-    return call.sid
+async def make_call(webhook_url: str) -> str:
+    """Initiate an outbound call with the shared CallPlacer. Returns the Call SID."""
+    return await get_call_placer().create_call(webhook_url)
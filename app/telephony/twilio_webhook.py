@@ -1,8 +1,12 @@
+import asyncio
 import logging
+import time
+
 from fastapi import APIRouter, Request
 from fastapi.responses import Response
 
 from app import config
+from app.telephony.call_sessions import get_call_sessions, lifecycle_summary
 
 logger = logging.getLogger(__name__)
 
@@ -29,9 +33,16 @@ async def voice_webhook(request: Request):
 
 @router.post("/status")
 async def status_callback(request: Request):
-    """Receive call status updates from SignalWire."""
+    """Receive call status updates from SignalWire and advance the call's session."""
+    received_at = time.time()
     form = await request.form()
     status = form.get("CallStatus", "unknown")
     call_sid = form.get("CallSid", "unknown")
     logger.info("Call %s status: %s", call_sid, status)
+    if call_sid != "unknown":
+        session = await asyncio.to_thread(
+            get_call_sessions().record_status, call_sid, status, received_at
+        )
+        if session["ended_at"] == received_at:
+            logger.info("Call %s ended: %s", call_sid, lifecycle_summary(session))
     return {"status": "ok"}
@@ -64,6 +64,17 @@ else
     echo "NGROK_URL=$NGROK_URL" >> .env
 fi
 
+# The server port is public through ngrok: the run control API needs a token
+if ! grep -qE "^RUN_API_TOKEN=.+" .env; then
+    RUN_API_TOKEN=$(python3 -c "import secrets; print(secrets.token_urlsafe(32))")
+    if grep -q "RUN_API_TOKEN=" .env; then
+        sed -i '' "s|RUN_API_TOKEN=.*|RUN_API_TOKEN=$RUN_API_TOKEN|" .env
+    else
+        echo "RUN_API_TOKEN=$RUN_API_TOKEN" >> .env
+    fi
+    echo "Generated RUN_API_TOKEN in .env for the run control API"
+fi
+
 echo "Starting FastAPI server..."
 echo ""
 echo "==================================="
@@ -85,5 +96,6 @@ cleanup() {
 }
 trap cleanup INT TERM
 
-# Start the server (foreground)
-uvicorn app.main:app --host 0.0.0.0 --port 8000
+# Start the server (foreground); SERVER_WORKERS processes share the calls
+SERVER_WORKERS=${SERVER_WORKERS:-$(grep -E '^SERVER_WORKERS=' .env | cut -d= -f2)}
+uvicorn app.main:app --host 0.0.0.0 --port 8000 --workers "${SERVER_WORKERS:-1}"
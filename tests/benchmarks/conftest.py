@@ -0,0 +1,112 @@
+"""Shared harness for the component micro-benchmarks.
+
+A plain pytest run calls each benchmarked function once, so only the
+correctness asserts run. With BENCH_TIMING=1 each benchmark reports the
+fastest seconds per call and is compared against baselines.json; a result
+slower than the baseline by more than BENCH_REGRESSION_PCT percent
+(default 25) fails the test. Baselines are absolute timings for the host
+that recorded them: run with BENCH_UPDATE_BASELINES=1 to record new ones.
+"""
+import json
+import os
+import platform
+import timeit
+import wave
+
+import pytest
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures")
+BASELINES_PATH = os.path.join(BENCH_DIR, "baselines.json")
+
+REGRESSION_PCT = float(os.getenv("BENCH_REGRESSION_PCT", "25"))
+UPDATE_BASELINES = os.getenv("BENCH_UPDATE_BASELINES") == "1"
+TIMING = UPDATE_BASELINES or os.getenv("BENCH_TIMING") == "1"
+
+_results: dict[str, float] = {}
+
+
+def load_baselines() -> dict:
+    if not os.path.exists(BASELINES_PATH):
+        return {"results": {}}
+    with open(BASELINES_PATH) as f:
+        return json.load(f)
+
+
+def measure(fn, repeat: int = 5) -> float:
+    """Return the fastest wall time per call of fn over `repeat` runs, in seconds.
+
+    The minimum is the least disturbed by other load on the host.
+    """
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    times = timer.repeat(repeat=repeat, number=number)
+    return min(times) / number
+
+
+def read_fixture_wav(filename: str) -> tuple[bytes, int]:
+    """Return (raw 16-bit PCM frames, sample rate) for a bundled WAV fixture."""
+    with wave.open(os.path.join(FIXTURES_DIR, filename), "rb") as wf:
+        return wf.readframes(wf.getnframes()), wf.getframerate()
+
+
+def read_fixture_lines(filename: str) -> list[str]:
+    with open(os.path.join(FIXTURES_DIR, filename)) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+@pytest.fixture(scope="session")
+def baselines() -> dict:
+    return load_baselines().get("results", {})
+
+
+@pytest.fixture
+def benchmark_check(baselines):
+    """Measure a callable and fail if it regressed past the baseline.
+
+    Without BENCH_TIMING the callable only runs once and nothing is timed.
+    """
+
+    def check(name: str, fn, repeat: int = 5) -> float | None:
+        if not TIMING:
+            fn()
+            return None
+        seconds = measure(fn, repeat=repeat)
+        _results[name] = seconds
+
+        baseline = baselines.get(name)
+        if baseline and not UPDATE_BASELINES:
+            limit = baseline * (1 + REGRESSION_PCT / 100)
+            assert seconds <= limit, (
+                f"{name} regressed: {seconds * 1e3:.3f}ms per call vs baseline "
+                f"{baseline * 1e3:.3f}ms (+{REGRESSION_PCT:.0f}% allowed)"
+            )
+        return seconds
+
+    return check
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _results:
+        return
+    baselines = load_baselines().get("results", {})
+    terminalreporter.section("benchmarks")
+    for name, seconds in sorted(_results.items()):
+        baseline = baselines.get(name)
+        delta = f"{(seconds / baseline - 1) * 100:+.1f}%" if baseline else "no baseline"
+        terminalreporter.write_line(f"{name:40s} {seconds * 1e3:10.3f} ms  {delta}")
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if not (UPDATE_BASELINES and _results):
+        return
+    data = load_baselines()
+    data.setdefault("results", {}).update(_results)
+    data["host"] = {
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+    }
+    with open(BASELINES_PATH, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
@@ -0,0 +1,72 @@
+"""Regenerate the bundled benchmark audio fixtures.
+
+The clips are deterministic, speech-like harmonic signals (syllable-shaped
+voiced bursts separated by short pauses and a trailing silence), generated with
+the standard library only so the benchmark suite never needs network access.
+
+    python -m tests.benchmarks.fixtures.make_fixtures
+"""
+import math
+import os
+import random
+import struct
+import wave
+
+FIXTURES_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def synth_utterance(sample_rate: int, seconds: float, seed: int) -> list[int]:
+    """Return 16-bit samples of voiced bursts followed by ~0.8s of silence."""
+    rng = random.Random(seed)
+    total = int(sample_rate * seconds)
+    speech_end = total - int(sample_rate * 0.8)
+    samples = []
+
+    while len(samples) < speech_end:
+        syllable = int(sample_rate * rng.uniform(0.15, 0.25))
+        f0 = rng.uniform(100.0, 180.0)
+        formants = [rng.uniform(300, 900), rng.uniform(900, 2500)]
+        for n in range(syllable):
+            t = n / sample_rate
+            env = math.sin(math.pi * n / syllable) ** 2
+            value = 0.0
+            for h in range(1, 12):
+                freq = f0 * h
+                if freq >= sample_rate / 2:
+                    break
+                weight = sum(1.0 / (1.0 + ((freq - f) / 150.0) ** 2) for f in formants)
+                value += weight * math.sin(2 * math.pi * freq * t) / h
+            samples.append(int(6000 * env * value))
+        gap = int(sample_rate * rng.uniform(0.05, 0.1))
+        samples.extend(int(rng.gauss(0, 30)) for _ in range(gap))
+
+    samples = samples[:speech_end]
+    samples.extend(int(rng.gauss(0, 30)) for _ in range(total - len(samples)))
+    return [max(-32768, min(32767, s)) for s in samples]
+
+
+def write_wav(path: str, samples: list[int], sample_rate: int):
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(struct.pack(f"<{len(samples)}h", *samples))
+
+
+def main():
+    # Inbound agent audio as received from the telephony side (8kHz)
+    write_wav(
+        os.path.join(FIXTURES_DIR, "agent_utterance_8k.wav"),
+        synth_utterance(8000, 4.0, seed=1),
+        8000,
+    )
+    # TTS-rate audio for the ffmpeg decode step (edge-tts renders 24kHz)
+    write_wav(
+        os.path.join(FIXTURES_DIR, "tts_sample_24k.wav"),
+        synth_utterance(24000, 2.0, seed=2),
+        24000,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("dotenv")
+
+from app.analysis.bug_detector import BugDetector  # noqa: E402
+from app.scenarios.loader import load_all_scenarios, load_scenario  # noqa: E402
+from tests.benchmarks.conftest import read_fixture_lines  # noqa: E402
+
+
+def synthetic_transcript(turn_count: int) -> dict:
+    """Build a long alternating agent/patient transcript from the text fixtures."""
+    agent_lines = read_fixture_lines("agent_lines.txt")
+    patient_lines = read_fixture_lines("patient_lines.txt")
+    turns = []
+    ts = 1_700_000_000.0
+    for i in range(turn_count):
+        speaker = "agent" if i % 2 == 0 else "patient"
+        lines = agent_lines if speaker == "agent" else patient_lines
+        ts += 2.0 + (i % 7) * 1.5
+        turns.append({
+            "speaker": speaker,
+            "text": lines[(i // 2) % len(lines)],
+            "timestamp": ts,
+            "elapsed": round(ts - 1_700_000_000.0, 2),
+        })
+    return {
+        "scenario_id": "urgent_symptoms",
+        "started_at": 1_700_000_000.0,
+        "duration_seconds": round(ts - 1_700_000_000.0, 2),
+        "turn_count": len(turns),
+        "turns": turns,
+    }
+
+
+@pytest.mark.parametrize("turn_count", [50, 2000])
+def test_bug_detector_analyze(benchmark_check, turn_count):
+    scenario = load_scenario("urgent_symptoms")
+    transcript = synthetic_transcript(turn_count)
+    detector = BugDetector()
+    assert detector.analyze(transcript, scenario)
+    benchmark_check(
+        f"bug_detector.analyze_{turn_count}_turns",
+        lambda: detector.analyze(transcript, scenario),
+    )
+
+
+def test_load_all_scenarios(benchmark_check):
+    assert len(load_all_scenarios()) >= 12
+    benchmark_check("scenarios.load_all", load_all_scenarios)
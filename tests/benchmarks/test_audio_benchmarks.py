@@ -0,0 +1,120 @@
+import asyncio
+import shutil
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+from app.audio.audio_buffer import AudioBuffer  # noqa: E402
+from app.audio.frame_assembler import FrameAssembler  # noqa: E402
+from app.audio.mulaw_converter import mulaw_decode, mulaw_encode  # noqa: E402
+from app.audio.resampler import resample_audio  # noqa: E402
+from tests.benchmarks.conftest import FIXTURES_DIR, read_fixture_wav  # noqa: E402
+
+FRAME_BYTES = 160  # 20ms of 8kHz mu-law
+
+
+@pytest.fixture(scope="module")
+def agent_pcm_8k():
+    frames, _rate = read_fixture_wav("agent_utterance_8k.wav")
+    return np.frombuffer(frames, dtype=np.int16)
+
+
+@pytest.fixture(scope="module")
+def agent_mulaw(agent_pcm_8k):
+    return mulaw_encode(agent_pcm_8k)
+
+
+def test_mulaw_encode_utterance(benchmark_check, agent_pcm_8k):
+    benchmark_check("mulaw_encode.utterance_4s", lambda: mulaw_encode(agent_pcm_8k))
+
+
+def test_mulaw_decode_frame(benchmark_check, agent_mulaw):
+    frame = agent_mulaw[:FRAME_BYTES]
+    benchmark_check("mulaw_decode.frame_20ms", lambda: mulaw_decode(frame))
+
+
+def test_mulaw_codec_is_g711():
+    codewords = bytes(range(256))
+    pcm = mulaw_decode(codewords)
+
+    # Reference values from the G.711 mu-law decode table
+    assert [int(pcm[c]) for c in (0x00, 0x0F, 0x7E, 0x80, 0xBE, 0xFE, 0xFF)] == [
+        -32124, -16764, -8, 32124, 2108, 8, 0,
+    ]
+    assert np.array_equal(pcm[:128], -pcm[128:])
+    assert np.all(np.diff(pcm[128:].astype(np.int32)) < 0)
+
+    # Every codeword survives decode -> encode; 0x7F is negative zero and
+    # encodes as 0xFF
+    expected = bytearray(codewords)
+    expected[0x7F] = 0xFF
+    assert mulaw_encode(pcm) == bytes(expected)
+
+
+def test_mulaw_round_trip_error(agent_pcm_8k, agent_mulaw):
+    # The replay, filler fade and tuner paths re-encode decoded audio, so
+    # one trip through the codec must stay within one quantization step
+    decoded = mulaw_decode(agent_mulaw).astype(np.int32)
+    pcm = agent_pcm_8k.astype(np.int32)
+    step = np.maximum(8, np.abs(pcm) // 16)
+    assert np.all(np.abs(decoded - pcm) <= step)
+    assert np.array_equal(mulaw_decode(mulaw_encode(decoded)), decoded)
+
+
+def test_resample_frame(benchmark_check, agent_pcm_8k):
+    frame = agent_pcm_8k[:FRAME_BYTES]
+    benchmark_check("resample_audio.frame_8k_to_16k", lambda: resample_audio(frame, 8000, 16000))
+
+
+def test_resample_utterance(benchmark_check, agent_pcm_8k):
+    benchmark_check(
+        "resample_audio.utterance_8k_to_16k",
+        lambda: resample_audio(agent_pcm_8k, 8000, 16000),
+    )
+
+
+def test_audio_buffer_fill_and_drain(benchmark_check, agent_pcm_8k):
+    frames = [agent_pcm_8k[i:i + 320] for i in range(0, 16000, 320)]  # 1s of 16kHz frames
+    loop = asyncio.new_event_loop()
+
+    async def fill_and_drain():
+        buffer = AudioBuffer(max_duration_seconds=30, sample_rate=16000)
+        for frame in frames:
+            await buffer.add_samples(frame)
+        return await buffer.get_and_clear()
+
+    try:
+        benchmark_check("audio_buffer.fill_drain_1s", lambda: loop.run_until_complete(fill_and_drain()))
+    finally:
+        loop.close()
+
+
+def test_frame_assembler(benchmark_check, agent_pcm_8k):
+    frames = [agent_pcm_8k[i:i + FRAME_BYTES] for i in range(0, 8000, FRAME_BYTES)]  # 1s of media
+    assembler = FrameAssembler(256)
+
+    # Same samples out as in, in 256-sample frames on the media clock
+    out = [(f.copy(), ms) for i, frame in enumerate(frames) for f, ms in assembler.push(frame, i * 20.0)]
+    assert np.array_equal(np.concatenate([f for f, _ in out]), agent_pcm_8k[:len(out) * 256])
+    assert [ms for _, ms in out[:3]] == [0.0, 32.0, 64.0]
+
+    def assemble():
+        for i, frame in enumerate(frames):
+            for _frame in assembler.push(frame, i * 20.0):
+                pass
+
+    benchmark_check("frame_assembler.vad_frames_1s", assemble)
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+def test_tts_decode(benchmark_check):
+    from app.audio.tts_engine import decode_to_mulaw_chunks
+
+    with open(f"{FIXTURES_DIR}/tts_sample_24k.wav", "rb") as f:
+        audio_bytes = f.read()
+
+    chunks = decode_to_mulaw_chunks(audio_bytes)
+    assert chunks and all(len(c) == FRAME_BYTES for c in chunks)
+    benchmark_check("tts.decode_to_mulaw_chunks_2s", lambda: decode_to_mulaw_chunks(audio_bytes), repeat=3)
@@ -0,0 +1,65 @@
+"""Import-time budgets for the entry points.
+
+Each module is imported in a fresh interpreter. The test fails if it pulls
+in one of the heavy ML dependencies that only the audio path should load, on
+first use, or, with BENCH_TIMING=1, if the import takes longer than its budget.
+"""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("dotenv")
+
+from tests.benchmarks.conftest import BENCH_DIR, TIMING  # noqa: E402
+
+REPO_DIR = os.path.dirname(os.path.dirname(BENCH_DIR))
+# Scaled by BENCH_IMPORT_BUDGET_SCALE for slow hosts
+BUDGET_SCALE = float(os.getenv("BENCH_IMPORT_BUDGET_SCALE", "1"))
+HEAVY_MODULES = ["torch", "faster_whisper", "ctranslate2", "edge_tts", "scipy"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+print(json.dumps({{
+    "seconds": time.perf_counter() - start,
+    "heavy": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def import_in_fresh_process(module: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        cwd=REPO_DIR, capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize("module, budget_s", [
+    ("app.pipeline.run_test_suite", 0.5),
+    ("app.pipeline.query_store", 0.5),
+    ("app.pipeline.worker_node", 0.5),
+])
+def test_cli_import_budget(module, budget_s):
+    best = min((import_in_fresh_process(module) for _ in range(3 if TIMING else 1)),
+               key=lambda r: r["seconds"])
+    assert not best["heavy"], f"{module} imports {', '.join(best['heavy'])}"
+    assert not TIMING or best["seconds"] <= budget_s * BUDGET_SCALE, (
+        f"{module} took {best['seconds'] * 1e3:.0f}ms to import (budget {budget_s * 1e3:.0f}ms)"
+    )
+
+
+def test_server_import_budget():
+    pytest.importorskip("fastapi")
+    pytest.importorskip("numpy")
+    best = min((import_in_fresh_process("app.main") for _ in range(3 if TIMING else 1)),
+               key=lambda r: r["seconds"])
+    assert not best["heavy"], f"app.main imports {', '.join(best['heavy'])}"
+    assert not TIMING or best["seconds"] <= 1.0 * BUDGET_SCALE, (
+        f"app.main took {best['seconds'] * 1e3:.0f}ms to import (budget 1000ms)"
+    )
@@ -0,0 +1,50 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+from app.audio.resampler import resample_audio  # noqa: E402
+from tests.benchmarks.conftest import read_fixture_wav  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def agent_pcm_8k():
+    frames, _rate = read_fixture_wav("agent_utterance_8k.wav")
+    return np.frombuffer(frames, dtype=np.int16)
+
+
+@pytest.fixture(scope="module")
+def agent_pcm_16k():
+    frames, rate = read_fixture_wav("agent_utterance_8k.wav")
+    return resample_audio(np.frombuffer(frames, dtype=np.int16), rate, 16000)
+
+
+@pytest.fixture(scope="module")
+def vad():
+    pytest.importorskip("torch")
+    from app.speech.vad import VADDetector
+
+    try:
+        return VADDetector()
+    except Exception as e:  # Model not in the local torch.hub cache
+        pytest.skip(f"silero-vad unavailable offline: {e}")
+
+
+@pytest.fixture(scope="module")
+def stt():
+    pytest.importorskip("faster_whisper")
+    from app.speech.stt_engine import STTEngine
+
+    try:
+        return STTEngine("tiny")
+    except Exception as e:  # Model not in the local Hugging Face cache
+        pytest.skip(f"whisper tiny unavailable offline: {e}")
+
+
+def test_vad_is_speech(benchmark_check, vad, agent_pcm_8k):
+    chunk = agent_pcm_8k[:vad.chunk_samples]
+    benchmark_check("vad.is_speech_256_8k", lambda: vad.is_speech(chunk))
+
+
+def test_stt_transcribe_tiny(benchmark_check, stt, agent_pcm_16k):
+    benchmark_check("stt.transcribe_tiny_4s", lambda: stt.transcribe(agent_pcm_16k), repeat=3)
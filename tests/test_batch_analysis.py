@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+pytest.importorskip("yaml")
+
+from app import config  # noqa: E402
+from app.pipeline import batch_analysis  # noqa: E402
+
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    transcripts = tmp_path / "transcripts"
+    transcripts.mkdir()
+    batch_dir = tmp_path / "batch"
+    monkeypatch.setattr(config, "TRANSCRIPTS_DIR", str(transcripts))
+    monkeypatch.setattr(batch_analysis, "BATCH_DIR", str(batch_dir))
+    monkeypatch.setattr(batch_analysis, "INDEX_PATH", str(batch_dir / "index.json"))
+    transcript = {
+        "scenario_id": "billing",
+        "started_at": 1_700_000_000.0,
+        "duration_seconds": 8.0,
+        "turn_count": 2,
+        "turns": [
+            {"speaker": "patient", "text": "Why was my insurance claim denied last month?",
+             "timestamp": 1_700_000_001.0, "elapsed": 1.0},
+            {"speaker": "agent", "text": "Our office opens at nine tomorrow morning.",
+             "timestamp": 1_700_000_004.0, "elapsed": 4.0},
+        ],
+    }
+    (transcripts / "billing_1.json").write_text(json.dumps(transcript))
+    return transcripts
+
+
+def test_changed_detector_settings_reanalyze(corpus, monkeypatch):
+    first = batch_analysis.run_batch_analysis(workers=1)
+    assert (first["analyzed"], first["skipped"]) == (1, 0)
+
+    again = batch_analysis.run_batch_analysis(workers=1)
+    assert (again["analyzed"], again["skipped"]) == (0, 1)
+
+    monkeypatch.setattr(config, "NON_SEQUITUR_MIN_TERMS", config.NON_SEQUITUR_MIN_TERMS + 1)
+    retuned = batch_analysis.run_batch_analysis(workers=1)
+    assert (retuned["analyzed"], retuned["skipped"]) == (1, 0)
+    assert retuned["detector_settings"]["non_sequitur_min_terms"] == config.NON_SEQUITUR_MIN_TERMS
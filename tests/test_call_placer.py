@@ -0,0 +1,217 @@
+import asyncio
+import time
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("fastapi")
+
+from app import config  # noqa: E402
+from app.telephony import laml_stub  # noqa: E402
+from app.telephony.twilio_call import STATUS_CALLBACK_EVENTS, CallPlacementError, CallPlacer  # noqa: E402
+
+WEBHOOK = "https://tester.example"
+
+
+class StubClock:
+    """Stands in for the time module inside laml_stub; sleeps advance it."""
+
+    strftime = staticmethod(time.strftime)
+    gmtime = staticmethod(time.gmtime)
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+class ScriptedRandom:
+    """Stands in for the random module inside laml_stub, for its fail rate."""
+
+    def __init__(self, *values: float):
+        self.values = list(values)
+
+    def random(self) -> float:
+        return self.values.pop(0) if self.values else 1.0
+
+
+class FlakyTransport(httpx.AsyncBaseTransport):
+    """Raises the given errors on the first requests, then passes them to the stub."""
+
+    def __init__(self, app, *errors: type[httpx.HTTPError]):
+        self.inner = httpx.ASGITransport(app=app)
+        self.errors = list(errors)
+
+    async def handle_async_request(self, request):
+        if self.errors:
+            raise self.errors.pop(0)("injected", request=request)
+        return await self.inner.handle_async_request(request)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = StubClock()
+    monkeypatch.setattr(laml_stub, "time", clock)
+    return clock
+
+
+@pytest.fixture(autouse=True)
+def fast_sleep(monkeypatch, clock):
+    """Advance the stub's clock instead of waiting out the placer's sleeps."""
+    real_sleep = asyncio.sleep
+
+    async def sleep(delay, *args):
+        clock.now += delay
+        await real_sleep(0)
+
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+
+
+@pytest.fixture(autouse=True)
+def numbers(monkeypatch):
+    monkeypatch.setattr(config, "TARGET_PHONE_NUMBER", "+15550100")
+    monkeypatch.setattr(config, "SIGNALWIRE_FROM_NUMBER", "+15550199")
+
+
+class RecordingPlacer(CallPlacer):
+    """CallPlacer that records the backoff before each retry."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.retry_delays = []
+
+    def _retry_delay(self, attempt, response):
+        self.retry_delays.append(super()._retry_delay(attempt, response))
+        return self.retry_delays[-1]
+
+
+def placer_for(app, *errors, **kwargs) -> RecordingPlacer:
+    options = {"calls_per_second": 1000, "max_retries": 2, "backoff_s": 0.1, **kwargs}
+    placer = RecordingPlacer(api_base_url="http://laml.test", project_id="PJ1", api_token="secret", **options)
+    placer.client = httpx.AsyncClient(auth=placer.client.auth, transport=FlakyTransport(app, *errors))
+    return placer
+
+
+def create(placer: CallPlacer, count: int = 1) -> list[str]:
+    async def main():
+        try:
+            return [await placer.create_call(WEBHOOK) for _ in range(count)]
+        finally:
+            await placer.close()
+    return asyncio.run(main())
+
+
+def test_creates_the_call():
+    app = laml_stub.create_app()
+    placer = placer_for(app)
+    (call_sid,) = create(placer)
+
+    (call,) = app.state.calls
+    assert call["sid"] == call_sid and call["account_sid"] == "PJ1"
+    assert (call["to"], call["from"], call["url"], call["status_callback"]) == (
+        "+15550100", "+15550199", f"{WEBHOOK}/voice", f"{WEBHOOK}/status",
+    )
+    assert call["status_callback_event"] == STATUS_CALLBACK_EVENTS
+    assert placer.retry_delays == []
+
+
+def test_retries_5xx_with_backoff(monkeypatch):
+    monkeypatch.setattr(laml_stub, "random", ScriptedRandom(0.0, 0.0))
+    app = laml_stub.create_app(fail_rate=0.5)
+    placer = placer_for(app)
+
+    create(placer)
+
+    assert len(app.state.calls) == 1
+    # Exponential backoff with jitter: 0.1 * 2**attempt * [0.5, 1.5)
+    first, second = placer.retry_delays
+    assert 0.05 <= first < 0.15 and 0.1 <= second < 0.3
+
+
+def test_gives_up_after_the_retries():
+    app = laml_stub.create_app(fail_rate=1.0)
+    placer = placer_for(app)
+
+    with pytest.raises(CallPlacementError, match=r"Giving up after 3 attempts: HTTP 503"):
+        create(placer)
+    assert app.state.calls == [] and len(placer.retry_delays) == 2
+
+
+def test_429_waits_for_retry_after():
+    app = laml_stub.create_app(max_cps=1)
+    placer = placer_for(app)
+
+    create(placer, count=2)
+
+    # The second creation in the same second is rate limited once
+    assert len(app.state.calls) == 2
+    assert placer.retry_delays == [1.0]
+
+
+def test_transport_errors_are_retried():
+    app = laml_stub.create_app()
+    placer = placer_for(app, httpx.ConnectError, httpx.ReadTimeout)
+
+    create(placer)
+
+    assert len(app.state.calls) == 1 and len(placer.retry_delays) == 2
+
+
+def test_transport_errors_give_up_with_the_last_error():
+    app = laml_stub.create_app()
+
+    with pytest.raises(CallPlacementError, match=r"Giving up after 2 attempts: ConnectError"):
+        create(placer_for(app, httpx.ReadTimeout, httpx.ConnectError, max_retries=1))
+    assert app.state.calls == []
+
+
+def test_client_errors_are_not_retried(monkeypatch):
+    monkeypatch.setattr(config, "SIGNALWIRE_FROM_NUMBER", "")
+    app = laml_stub.create_app()
+    placer = placer_for(app)
+
+    with pytest.raises(CallPlacementError, match=r"^HTTP 400: .*Missing From"):
+        create(placer)
+    assert placer.retry_delays == []
+
+    # Rejected credentials
+    placer = placer_for(app)
+    placer.client.auth = None
+    with pytest.raises(CallPlacementError, match=r"^HTTP 401"):
+        create(placer)
+    assert placer.retry_delays == []
+
+
+def test_other_http_errors_are_not_retried():
+    app = laml_stub.create_app()
+    placer = placer_for(app, httpx.DecodingError)
+
+    with pytest.raises(CallPlacementError, match=r"^DecodingError"):
+        create(placer)
+    assert placer.retry_delays == [] and app.state.calls == []
+
+
+def test_unreadable_success_response_raises():
+    def respond(request):
+        return httpx.Response(201, text="<Response/>")
+
+    placer = placer_for(laml_stub.create_app())
+    placer.client = httpx.AsyncClient(transport=httpx.MockTransport(respond))
+    with pytest.raises(CallPlacementError, match=r"Unexpected response \(HTTP 201\)"):
+        create(placer)
+
+
+def test_hang_up_updates_the_call():
+    app = laml_stub.create_app()
+    placer = placer_for(app)
+
+    async def main():
+        call_sid = await placer.create_call(WEBHOOK)
+        await placer.hang_up(call_sid)
+        # Unknown calls are logged, not raised
+        await placer.hang_up("CAmissing")
+        await placer.close()
+
+    asyncio.run(main())
+    assert app.state.calls[0]["status"] == "completed"
@@ -0,0 +1,41 @@
+import json
+import os
+import wave
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("dotenv")
+
+from app import config  # noqa: E402
+from app.audio.call_recorder import AGENT, PATIENT, CallRecorder  # noqa: E402
+from app.audio.mulaw_converter import mulaw_decode  # noqa: E402
+
+
+def test_recording_is_named_by_call_id_and_finished_on_close(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "RECORDINGS_DIR", str(tmp_path / "recordings"))
+    recorder = CallRecorder.for_call("billing_20261019_142500_abc123")
+    agent = bytes(range(0x80, 0xFF)) + b"\x80" * 33
+    t0 = recorder.started_at
+    recorder.write(AGENT, agent, timestamp=t0)
+    recorder.write(PATIENT, b"\xff" * 160, timestamp=t0)
+    recorder.event("turn_end", speaker="agent")
+
+    # The WAV is complete as soon as close() returns
+    stats = recorder.close()
+
+    assert stats["path"] == str(tmp_path / "recordings" / "billing_20261019_142500_abc123.wav")
+    assert (stats["frames"], stats["dropped_frames"]) == (2, 0)
+    with wave.open(stats["path"], "rb") as wf:
+        assert (wf.getnchannels(), wf.getframerate()) == (2, 8000)
+        stereo = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16).reshape(-1, 2)
+    assert np.array_equal(stereo[:, AGENT], mulaw_decode(agent))
+    assert not stereo[:, PATIENT].any()
+
+    with open(recorder.base_path + ".events.jsonl") as f:
+        events = [json.loads(line) for line in f]
+    assert [e["type"] for e in events] == ["header", "turn_end", "summary"]
+    # The raw per-channel files are cleaned up
+    assert sorted(os.listdir(tmp_path / "recordings")) == [
+        "billing_20261019_142500_abc123.events.jsonl", "billing_20261019_142500_abc123.wav",
+    ]
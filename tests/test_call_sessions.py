@@ -0,0 +1,184 @@
+import asyncio
+import json
+from collections.abc import Callable
+
+import pytest
+
+pytest.importorskip("dotenv")
+
+from app import config  # noqa: E402
+from app.telephony import call_sessions  # noqa: E402
+from app.telephony.call_sessions import CallSessionStore, lifecycle_summary  # noqa: E402
+
+SCENARIO = {"id": "billing", "name": "Billing"}
+
+
+class TickingClock:
+    """Stands in for the time module inside call_sessions.
+
+    Every monotonic() reading advances the clock a second, so each poll of
+    wait_for_call is one simulated second. Callbacks scheduled with at()
+    run when the clock reaches their time.
+    """
+
+    def __init__(self, now: float = 1_700_000_000.0):
+        self.start = self.now = now
+        self.scheduled: list[tuple[float, Callable]] = []
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        self.now += 1
+        for when, fn in [s for s in self.scheduled if s[0] <= self.now]:
+            self.scheduled.remove((when, fn))
+            fn()
+        return self.now
+
+    def at(self, seconds: float, fn):
+        self.scheduled.append((self.start + seconds, fn))
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = TickingClock()
+    monkeypatch.setattr(call_sessions, "time", clock)
+    monkeypatch.setattr(config, "CALL_STATUS_POLL_S", 0)
+    monkeypatch.setattr(config, "CALL_END_GRACE_S", 5)
+    return clock
+
+
+@pytest.fixture
+def store(tmp_path, clock):
+    store = CallSessionStore(str(tmp_path / "sessions" / "calls.sqlite"))
+    store.register("CA1", SCENARIO, created_at=clock.now)
+    return store
+
+
+def statuses(store, *callbacks: tuple[str, float]) -> dict:
+    for status, at in callbacks:
+        session = store.record_status("CA1", status, at=at)
+    return session
+
+
+# --- record_status -------------------------------------------------------------
+
+def test_status_moves_forward_and_records_first_times(store, clock):
+    t0 = clock.now
+    session = statuses(
+        store, ("initiated", t0 + 1), ("ringing", t0 + 2), ("answered", t0 + 6), ("completed", t0 + 30),
+    )
+
+    assert session["status"] == "completed"
+    assert (session["initiated_at"], session["ringing_at"], session["answered_at"], session["ended_at"]) == (
+        t0 + 1, t0 + 2, t0 + 6, t0 + 30,
+    )
+    # The "answered" event is stored under the CallStatus it stands for
+    assert [e[0] for e in json.loads(session["events"])] == [
+        "initiated", "ringing", "in-progress", "completed",
+    ]
+    assert store.get("CA1")["status"] == "completed"
+    summary = lifecycle_summary(store.get("CA1"))
+    assert (summary["answered"], summary["ring_time_s"], summary["answer_latency_s"], summary["duration_s"]) == (
+        True, 4.0, 6.0, 24.0,
+    )
+
+
+def test_late_callback_does_not_move_the_call_backwards(store, clock):
+    t0 = clock.now
+    session = statuses(store, ("in-progress", t0 + 6), ("ringing", t0 + 2), ("initiated", t0 + 1))
+
+    assert session["status"] == "in-progress"
+    # The times are still recorded, so ring time is known
+    assert (session["initiated_at"], session["ringing_at"], session["answered_at"]) == (t0 + 1, t0 + 2, t0 + 6)
+    # A repeated callback keeps the first time
+    assert statuses(store, ("ringing", t0 + 3))["ringing_at"] == t0 + 2
+
+
+def test_terminal_status_is_final(store, clock):
+    t0 = clock.now
+    session = statuses(
+        store, ("ringing", t0 + 2), ("no-answer", t0 + 20), ("in-progress", t0 + 21), ("completed", t0 + 22),
+    )
+
+    assert (session["status"], session["ended_at"], session["answered_at"]) == ("no-answer", t0 + 20, None)
+    # Ignored callbacks are still logged
+    assert len(json.loads(session["events"])) == 4
+    assert not lifecycle_summary(session)["answered"]
+
+
+def test_unknown_status_is_logged_only(store, clock):
+    session = statuses(store, ("ringing", clock.now + 1), ("machine-detected", clock.now + 2))
+    assert session["status"] == "ringing"
+    assert json.loads(session["events"])[-1] == ["machine-detected", clock.now + 2]
+
+
+def test_callback_before_the_call_is_registered(store, clock):
+    session = store.record_status("CA2", "ringing", at=clock.now + 1)
+    assert (session["status"], session["ringing_at"], session["scenario_id"]) == ("ringing", clock.now + 1, None)
+
+    # place_call registers it afterwards; the callback's state is kept
+    store.register("CA2", SCENARIO, created_at=clock.now)
+    row = store.get("CA2")
+    assert (row["status"], row["ringing_at"], row["scenario_id"]) == ("ringing", clock.now + 1, "billing")
+
+
+# --- wait_for_call -------------------------------------------------------------
+
+def wait(store, timeout: float = 60) -> dict:
+    return asyncio.run(store.wait_for_call("CA1", timeout))
+
+
+def test_unanswered_call_returns_at_once(store, clock):
+    statuses(store, ("ringing", clock.now), ("busy", clock.now))
+    session = wait(store)
+    assert session["status"] == "busy"
+    assert clock.now - clock.start <= 1
+
+
+def test_media_ending_returns_the_session(store, clock):
+    statuses(store, ("in-progress", clock.now))
+    store.start_media("CA1", "w1", "MZ1")
+    clock.at(3, lambda: store.end_media("CA1", "call-1"))
+
+    session = wait(store)
+
+    assert (session["status"], session["transcript_call_id"]) == ("in-progress", "call-1")
+    assert clock.now - clock.start == 3
+
+
+def test_hung_up_call_waits_grace_for_its_stream(store, clock):
+    statuses(store, ("in-progress", clock.now), ("completed", clock.now))
+    store.start_media("CA1", "w1", "MZ1")
+    clock.at(4, lambda: store.end_media("CA1", "call-1"))
+
+    # The stream finishes within the grace period
+    assert wait(store)["transcript_call_id"] == "call-1"
+    assert clock.now - clock.start == 4
+
+
+def test_hung_up_call_gives_up_after_grace(store, clock):
+    statuses(store, ("in-progress", clock.now), ("completed", clock.now))
+
+    session = wait(store)
+
+    assert (session["status"], session["media_ended_at"]) == ("completed", None)
+    assert clock.now - clock.start == config.CALL_END_GRACE_S + 1
+
+
+def test_stream_without_answer_callback_still_gets_grace(store, clock):
+    # The media stream connected but the "answered" callback was lost
+    store.start_media("CA1", "w1", "MZ1")
+    statuses(store, ("completed", clock.now))
+    clock.at(2, lambda: store.end_media("CA1", "call-1"))
+
+    assert wait(store)["transcript_call_id"] == "call-1"
+
+
+def test_wait_times_out_on_a_call_that_never_ends(store, clock):
+    statuses(store, ("in-progress", clock.now))
+
+    session = wait(store, timeout=10)
+
+    assert (session["status"], session["media_ended_at"]) == ("in-progress", None)
+    assert 10 < clock.now - clock.start <= 12
@@ -0,0 +1,30 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.audio.filler_audio import FRAME_BYTES, fade_out  # noqa: E402
+from app.audio.mulaw_converter import mulaw_decode, mulaw_encode  # noqa: E402
+
+
+def test_fade_out_ramps_to_silence():
+    t = np.arange(3 * FRAME_BYTES)
+    tone = (24000 * np.sin(2 * np.pi * 300 * t / 8000)).astype(np.int16)
+    mulaw = mulaw_encode(tone)
+    frames = [mulaw[i:i + FRAME_BYTES] for i in range(0, len(mulaw), FRAME_BYTES)]
+
+    faded = fade_out(frames)
+
+    assert [len(f) for f in faded] == [FRAME_BYTES] * 3
+    decoded = np.abs(mulaw_decode(b"".join(faded)).astype(np.int32))
+    original = np.abs(mulaw_decode(mulaw).astype(np.int32))
+    # Never louder than the clip, and the peak of each 10ms window keeps falling
+    assert np.all(decoded <= original)
+    peaks = decoded.reshape(-1, 80).max(axis=1)
+    assert np.all(np.diff(peaks) < 0)
+    assert peaks[0] <= original.max()
+    # ... down to silence: the last millisecond is under 2% of the clip's peak
+    assert decoded[-8:].max() <= 0.02 * original.max() and decoded[-1] == 0
+
+
+def test_fade_out_of_nothing():
+    assert fade_out([]) == []
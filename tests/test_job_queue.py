@@ -0,0 +1,243 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+pytest.importorskip("uvicorn")
+
+from app import config  # noqa: E402
+from app.pipeline import coordinator, job_queue, worker_node  # noqa: E402
+from app.pipeline.job_queue import DONE, FAILED, LEASED, QUEUED, SQLiteJobQueue, open_job_queue  # noqa: E402
+from app.pipeline.run_manifest import RunManifest  # noqa: E402
+
+SCENARIOS = [{"id": "billing", "name": "Billing"}, {"id": "refill_rx", "name": "Refill"}]
+
+
+class FakeClock:
+    """Stands in for the time module inside job_queue."""
+
+    def __init__(self, now: float = 1_700_000_000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(job_queue, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def queue(tmp_path, clock):
+    return SQLiteJobQueue(str(tmp_path / "jobs.sqlite"))
+
+
+def status(queue, job_id):
+    return queue.jobs([job_id])[0]
+
+
+def test_claims_in_suite_order_and_leases(queue, clock):
+    first, second = queue.enqueue("run", SCENARIOS, max_attempts=2)
+
+    job = queue.claim("w1", lease_s=30)
+    assert (job["job_id"], job["status"], job["attempts"], job["lease_owner"]) == (first, LEASED, 1, "w1")
+    assert job["payload"] == SCENARIOS[0]
+    assert status(queue, first)["lease_expires"] == clock.now + 30
+
+    assert queue.claim("w2", lease_s=30)["job_id"] == second
+    assert queue.claim("w3", lease_s=30) is None
+
+
+def test_renew_only_by_the_lease_owner(queue, clock):
+    (job_id,) = queue.enqueue("run", SCENARIOS[:1], max_attempts=2)
+    queue.claim("w1", lease_s=30)
+
+    clock.now += 20
+    assert queue.renew(job_id, "w1", lease_s=30)
+    assert status(queue, job_id)["lease_expires"] == clock.now + 30
+    assert not queue.renew(job_id, "w2", lease_s=30)
+
+
+def test_expired_lease_is_reclaimed_by_another_worker(queue, clock):
+    (job_id,) = queue.enqueue("run", SCENARIOS[:1], max_attempts=2)
+    queue.claim("w1", lease_s=30)
+
+    clock.now += 29
+    assert queue.claim("w2", lease_s=30) is None
+    clock.now += 2
+    job = queue.claim("w2", lease_s=30)
+    assert (job["job_id"], job["attempts"], job["lease_owner"]) == (job_id, 2, "w2")
+
+    # The first worker has lost the job
+    assert not queue.renew(job_id, "w1", lease_s=30)
+    assert not queue.complete(job_id, "w1", {"call_id": "late"})
+    assert not queue.fail(job_id, "w1", "late")
+    assert status(queue, job_id)["lease_owner"] == "w2"
+
+
+def test_expired_lease_on_last_attempt_fails_the_job(queue, clock):
+    (job_id,) = queue.enqueue("run", SCENARIOS[:1], max_attempts=1)
+    queue.claim("w1", lease_s=30)
+
+    clock.now += 31
+    assert queue.claim("w2", lease_s=30) is None
+    job = status(queue, job_id)
+    assert (job["status"], job["error"], job["lease_owner"]) == (FAILED, "lease expired", None)
+
+
+def test_fail_requeues_until_attempts_are_used(queue, clock):
+    (job_id,) = queue.enqueue("run", SCENARIOS[:1], max_attempts=2)
+    queue.claim("w1", lease_s=30)
+
+    assert queue.fail(job_id, "w1", "call busy", {"lifecycle": {"status": "busy"}})
+    job = status(queue, job_id)
+    assert (job["status"], job["error"], job["lease_owner"]) == (QUEUED, "call busy", None)
+    assert job["result"] == {"lifecycle": {"status": "busy"}}
+
+    assert queue.claim("w2", lease_s=30)["attempts"] == 2
+    assert queue.fail(job_id, "w2", "no transcript")
+    job = status(queue, job_id)
+    assert (job["status"], job["attempts"], job["error"]) == (FAILED, 2, "no transcript")
+    assert queue.claim("w3", lease_s=30) is None
+
+
+def test_complete_stores_the_result(queue):
+    (job_id,) = queue.enqueue("run", SCENARIOS[:1], max_attempts=2)
+    queue.claim("w1", lease_s=30)
+
+    assert not queue.complete(job_id, "w2", {"call_id": "x"})
+    assert queue.complete(job_id, "w1", {"call_id": "abc"})
+    job = status(queue, job_id)
+    assert (job["status"], job["result"], job["lease_expires"]) == (DONE, {"call_id": "abc"}, None)
+    # A finished job cannot be failed or renewed
+    assert not queue.fail(job_id, "w1", "late")
+    assert not queue.renew(job_id, "w1", lease_s=30)
+
+
+def test_cancel_only_touches_unfinished_jobs(queue):
+    done, leased, queued = queue.enqueue("run", SCENARIOS + [{"id": "cancel", "name": "C"}], 2)
+    queue.claim("w1", lease_s=30)
+    queue.complete(done, "w1", {})
+    queue.claim("w1", lease_s=30)
+
+    assert queue.cancel([done, leased, queued]) == 2
+    assert [(j["status"], j["error"]) for j in queue.jobs([done, leased, queued])] == [
+        (DONE, None), (FAILED, "canceled"), (FAILED, "canceled"),
+    ]
+
+
+def test_jobs_keeps_order_and_skips_unknown_ids(queue):
+    first, second = queue.enqueue("run", SCENARIOS, max_attempts=1)
+    assert [j["job_id"] for j in queue.jobs([second, "missing", first])] == [second, first]
+
+
+def test_open_job_queue_by_url(tmp_path):
+    assert isinstance(open_job_queue(f"sqlite://{tmp_path}/a.sqlite"), SQLiteJobQueue)
+    assert isinstance(open_job_queue(str(tmp_path / "b.sqlite")), SQLiteJobQueue)
+    with pytest.raises(ValueError):
+        open_job_queue("redis://localhost")
+
+
+def test_lost_lease_cancels_the_running_job(queue, clock, monkeypatch):
+    monkeypatch.setattr(config, "JOB_LEASE_S", 0.06)
+    (job_id,) = queue.enqueue("run", SCENARIOS[:1], max_attempts=3)
+    job = queue.claim("w1", lease_s=30)
+    stopped = asyncio.Event()
+
+    async def place_and_report(queue, job, worker_id, public_url):
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            stopped.set()
+            raise
+
+    async def main():
+        monkeypatch.setattr(worker_node, "place_and_report", place_and_report)
+        # Another worker takes over the job once the lease has run out
+        clock.now += 31
+        assert queue.claim("w2", lease_s=30)["job_id"] == job_id
+        await asyncio.wait_for(worker_node.run_job(queue, job, "w1", "https://node"), timeout=5)
+
+    asyncio.run(main())
+    assert stopped.is_set()
+    assert status(queue, job_id)["lease_owner"] == "w2"
+
+
+def test_run_job_renews_while_the_call_runs(queue, clock, monkeypatch):
+    monkeypatch.setattr(config, "JOB_LEASE_S", 0.06)
+    (job_id,) = queue.enqueue("run", SCENARIOS[:1], max_attempts=3)
+    job = queue.claim("w1", lease_s=30)
+
+    async def place_and_report(queue, job, worker_id, public_url):
+        await asyncio.sleep(0.1)
+        clock.now += 10
+        assert queue.complete(job["job_id"], worker_id, {"call_id": "abc"})
+
+    monkeypatch.setattr(worker_node, "place_and_report", place_and_report)
+    asyncio.run(worker_node.run_job(queue, job, "w1", "https://node"))
+    assert status(queue, job_id)["status"] == DONE
+
+
+class FakeCallStore:
+    def __init__(self):
+        self.saved = []
+
+    def save_transcript(self, transcript, path):
+        self.saved.append(("transcript", transcript["call_id"]))
+
+    def save_report(self, report, path):
+        self.saved.append(("report", report["report_id"]))
+
+    def flush(self):
+        pass
+
+
+def test_coordinator_mirrors_jobs_into_the_manifest(queue, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "RUNS_DIR", str(tmp_path / "runs"))
+    monkeypatch.setattr(config, "JOB_MAX_ATTEMPTS", 1)
+    store = FakeCallStore()
+    monkeypatch.setattr(coordinator, "get_call_store", lambda: store)
+    manifest = RunManifest.create(SCENARIOS)
+
+    # The manifest dict is only changed on the event loop's thread
+    loop_thread = threading.current_thread()
+    update_entry = manifest._update_entry
+
+    def checked_update_entry(scenario_id, fields):
+        assert threading.current_thread() is loop_thread
+        update_entry(scenario_id, fields)
+
+    monkeypatch.setattr(manifest, "_update_entry", checked_update_entry)
+
+    async def worker():
+        while (job := await asyncio.to_thread(queue.claim, "w1", 30)) is None:
+            await asyncio.sleep(0.01)
+        await asyncio.to_thread(queue.complete, job["job_id"], "w1", {
+            "call_id": "abc",
+            "transcript": {"call_id": "abc", "turns": []},
+            "report": {"report_id": "r1", "findings": [{"type": "x"}], "summary": "ok"},
+        })
+        while (job := await asyncio.to_thread(queue.claim, "w1", 30)) is None:
+            await asyncio.sleep(0.01)
+        await asyncio.to_thread(queue.fail, job["job_id"], "w1", "call busy")
+
+    async def main():
+        await asyncio.gather(
+            coordinator.run_distributed(manifest, SCENARIOS, queue=queue, poll_s=0.01),
+            worker(),
+        )
+        await manifest.save_async()
+
+    asyncio.run(main())
+    assert store.saved == [("transcript", "abc"), ("report", "r1")]
+    billing, refill = manifest.entry("billing"), manifest.entry("refill_rx")
+    assert (billing["status"], billing["call_id"], billing["bugs_found"], billing["node"]) == (
+        "done", "abc", 1, "w1",
+    )
+    assert (refill["status"], refill["error"]) == ("failed", "call busy")
+    with open(manifest.path) as f:
+        assert json.load(f)["scenarios"]["billing"]["status"] == "done"
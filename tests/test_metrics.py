@@ -0,0 +1,89 @@
+import asyncio
+import re
+import sqlite3
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("uvicorn")
+
+from app import config, main  # noqa: E402
+from app.analysis.latency_metrics import LatencyRegistry, prometheus_text  # noqa: E402
+from app.telephony.call_sessions import CallSessionStore  # noqa: E402
+
+
+def registry(*responses_ms: float) -> LatencyRegistry:
+    r = LatencyRegistry()
+    for ms in responses_ms:
+        r.record_turn({"speech_end": 0.0, "first_frame_sent": ms / 1000})
+    return r
+
+
+def series(text: str, name: str) -> dict[str, str]:
+    """Label set -> value for one metric name in Prometheus text."""
+    return dict(re.findall(rf"^{name}{{(.*)}} (\S+)$", text, re.M))
+
+
+def test_prometheus_text_labels_each_worker():
+    text = prometheus_text({"b:2": registry(400), "a:1": registry(40, 40)})
+
+    assert series(text, "voicebot_turns_total") == {'worker_id="a:1"': "2", 'worker_id="b:2"': "1"}
+    counts = series(text, "voicebot_stage_latency_ms_count")
+    assert counts['worker_id="a:1",stage="response"'] == "2"
+    assert counts['worker_id="b:2",stage="response"'] == "1"
+    buckets = series(text, "voicebot_stage_latency_ms_bucket")
+    assert buckets['worker_id="a:1",stage="response",le="50"'] == "2"
+    assert buckets['worker_id="b:2",stage="response",le="250"'] == "0"
+    assert buckets['worker_id="b:2",stage="response",le="500"'] == "1"
+    # Each metric family is declared once
+    assert text.count("# TYPE voicebot_stage_latency_ms histogram") == 1
+
+
+def test_add_merges_states():
+    combined = LatencyRegistry().add(registry(40).state()).add(registry(400, 900).state())
+
+    snapshot = combined.snapshot()
+    assert snapshot["turns"] == 3
+    assert snapshot["stages"]["response"]["count"] == 3
+    assert snapshot["stages"]["response"]["mean_ms"] == pytest.approx(446.7)
+    assert snapshot["stages"]["stt"]["count"] == 0
+
+
+def test_metrics_cover_every_live_worker(tmp_path, monkeypatch):
+    store = CallSessionStore(str(tmp_path / "calls.sqlite"))
+    monkeypatch.setattr(main, "get_call_sessions", lambda: store)
+    monkeypatch.setattr(main, "latency_registry", registry(40))
+    # Another worker's heartbeat, and this worker's own (older) one
+    store.heartbeat("other:2", 0.0, {}, registry(400, 900).state())
+    store.heartbeat(main.worker_id(), 0.0, {}, LatencyRegistry().state())
+
+    text = asyncio.run(main.metrics()).body.decode()
+    assert series(text, "voicebot_turns_total") == {
+        f'worker_id="{main.worker_id()}"': "1", 'worker_id="other:2"': "2",
+    }
+
+    report = asyncio.run(main.metrics(format="json"))
+    assert report["all"]["turns"] == 3
+    assert {w: s["turns"] for w, s in report["workers"].items()} == {main.worker_id(): 1, "other:2": 2}
+
+    # A worker that stopped heartbeating drops out
+    monkeypatch.setattr(config, "WORKER_HEARTBEAT_S", -1)
+    assert asyncio.run(main.metrics(format="json"))["all"]["turns"] == 1
+
+
+def test_heartbeat_metrics_column_is_added_to_existing_stores(tmp_path):
+    path = str(tmp_path / "calls.sqlite")
+    db = sqlite3.connect(path)
+    db.execute(
+        "CREATE TABLE workers (worker_id TEXT PRIMARY KEY, pid INTEGER NOT NULL, host TEXT NOT NULL, "
+        "started_at REAL NOT NULL, heartbeat_at REAL NOT NULL, info TEXT NOT NULL DEFAULT '{}')"
+    )
+    db.close()
+
+    store = CallSessionStore(path)
+    store.heartbeat("w:1", 0.0, {"models_loaded": True}, registry(40).state())
+
+    assert store.worker_metrics(60)["w:1"]["turns"] == 1
+    # /workers does not carry the histograms
+    (worker,) = store.workers(60)
+    assert "metrics" not in worker and worker["info"] == {"models_loaded": True}
@@ -0,0 +1,71 @@
+import asyncio
+import wave
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+from app.pipeline import replay  # noqa: E402
+from tests.benchmarks.conftest import read_fixture_wav  # noqa: E402
+
+
+class EnergyVAD:
+    """Stands in for silero: speech is any frame louder than an RMS threshold."""
+
+    chunk_samples = 256
+    sample_rate = 8000
+
+    def is_speech(self, chunk):
+        return float(np.sqrt(np.mean(chunk.astype(np.float64) ** 2))) > 300
+
+    def reset(self):
+        pass
+
+
+class CapturingSTT:
+    def __init__(self):
+        self.utterances = []
+
+    def transcribe_detailed(self, audio):
+        self.utterances.append(audio)
+        return "hello", -0.1, {"tier": "accurate"}
+
+
+@pytest.fixture
+def recording(tmp_path):
+    frames, _rate = read_fixture_wav("agent_utterance_8k.wav")
+    agent = np.frombuffer(frames, dtype=np.int16)
+    stereo = np.column_stack([agent, np.zeros_like(agent)])
+    path = tmp_path / "call.wav"
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(2)
+        wf.setsampwidth(2)
+        wf.setframerate(8000)
+        wf.writeframes(stereo.astype("<i2").tobytes())
+    return str(path), agent
+
+
+def test_agent_frames_are_the_recorded_pcm(recording):
+    path, agent = recording
+    frames = replay.load_agent_frames(path)
+
+    assert all(len(f) == replay.FRAME_SAMPLES for f in frames)
+    assert np.array_equal(np.concatenate(frames), agent)
+
+
+def test_replayed_utterance_is_the_recorded_pcm(recording, monkeypatch):
+    path, agent = recording
+    stt = CapturingSTT()
+    heard = []
+    monkeypatch.setattr(replay, "_vad", EnergyVAD())
+    monkeypatch.setattr(replay, "_stt", stt)
+    monkeypatch.setattr(replay, "resample_audio", lambda audio, _src, _dst: heard.append(audio) or audio)
+
+    turns = asyncio.run(replay._replay_frames(replay.load_agent_frames(path), 500, 300, 0))
+
+    assert [t["text"] for t in turns] == ["hello"]
+    assert turns[0]["stt"] == {"tier": "accurate"}
+    # The buffered utterance is the recording's samples, unchanged
+    assert len(heard) == 1 and len(heard[0]) > len(agent) // 2
+    assert np.array_equal(heard[0], agent[:len(heard[0])])
@@ -0,0 +1,66 @@
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("uvicorn")
+
+from app import config  # noqa: E402
+from app.pipeline import run_api, run_service  # noqa: E402
+from app.pipeline.run_manifest import RUN_RUNNING, RunManifest  # noqa: E402
+
+SCENARIOS = [{"id": "billing", "name": "Billing"}]
+
+
+class OffLoopSessions:
+    """Call session store whose worker query must not run on the event loop."""
+
+    def __init__(self, live: list[str]):
+        self.live = live
+        self.loop_thread = threading.current_thread()
+
+    def workers(self, stale_s):
+        assert threading.current_thread() is not self.loop_thread
+        return [{"worker_id": w} for w in self.live]
+
+
+@pytest.fixture
+def running(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "RUNS_DIR", str(tmp_path / "runs"))
+    manifest = RunManifest.create(SCENARIOS)
+    manifest.data.update(status=RUN_RUNNING, owner="host:1")
+    manifest.save()
+    return manifest
+
+
+def use_sessions(monkeypatch, *live: str):
+    sessions = OffLoopSessions(list(live))
+    monkeypatch.setattr(run_service, "get_call_sessions", lambda: sessions)
+
+
+def test_submit_reads_live_workers_off_the_loop(running, monkeypatch):
+    class Service:
+        async def submit(self, **kwargs):
+            return running
+
+    monkeypatch.setattr(run_api, "get_run_service", Service)
+    use_sessions(monkeypatch, "host:1")
+
+    info = asyncio.run(run_api.submit_run(run_api.RunRequest(distributed=True)))
+
+    assert (info["run_id"], info["status"]) == (running.run_id, RUN_RUNNING)
+
+
+def test_events_read_live_workers_off_the_loop(running, monkeypatch):
+    monkeypatch.setattr(run_service, "EVENTS_POLL_S", 0)
+    use_sessions(monkeypatch)  # The owner stopped heartbeating
+
+    async def collect():
+        return [e async for e in run_service.RunService().events(running.run_id)]
+
+    events = asyncio.run(collect())
+
+    assert [(e["event"], e.get("status")) for e in events] == [
+        ("run", "interrupted"), ("scenario", "pending"), ("end", "interrupted"),
+    ]
@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("uvicorn")
+pytest.importorskip("yaml")
+
+from app import config  # noqa: E402
+from app.pipeline import analysis_worker, run_manifest, run_service  # noqa: E402
+from app.pipeline.run_manifest import (  # noqa: E402
+    ANALYZING, CALLING, DONE, FAILED, PENDING, RunManifest,
+)
+from app.pipeline.run_service import RunNotFound, prepare_run, run_sequential  # noqa: E402
+
+SCENARIO_IDS = ["schedule_new", "refill_rx", "billing", "med_question", "insurance"]
+# The status each scenario was left in when the run was interrupted
+INTERRUPTED = dict(zip(SCENARIO_IDS, [DONE, CALLING, ANALYZING, FAILED, PENDING]))
+
+
+@pytest.fixture(autouse=True)
+def runs_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "RUNS_DIR", str(tmp_path / "runs"))
+    return tmp_path / "runs"
+
+
+def interrupted_run() -> RunManifest:
+    manifest, _ = prepare_run(SCENARIO_IDS)
+    for sid, status in INTERRUPTED.items():
+        manifest.update(sid, status=status, attempts=0 if status == PENDING else 1)
+    manifest.update("billing", call_id="call-billing")
+    return manifest
+
+
+def test_runs_started_in_the_same_second_get_distinct_ids(runs_dir, monkeypatch):
+    monkeypatch.setattr(run_manifest.time, "strftime", lambda _fmt: "20261019_142500")
+    scenarios = [{"id": "billing", "name": "Billing"}]
+
+    ids = [RunManifest.create(scenarios).run_id for _ in range(3)]
+
+    assert ids == ["20261019_142500", "20261019_142500_2", "20261019_142500_3"]
+    assert all(run_manifest.valid_run_id(run_id) for run_id in ids)
+    assert sorted(p.name for p in runs_dir.iterdir()) == ids
+    assert RunManifest.load(ids[1]).run_id == ids[1]
+
+
+def test_todo_skips_done_and_optionally_failed():
+    manifest = interrupted_run()
+
+    assert manifest.todo() == ["refill_rx", "billing", "insurance"]
+    assert manifest.todo(rerun_failed=True) == ["refill_rx", "billing", "med_question", "insurance"]
+
+
+def test_resume_picks_up_unfinished_scenarios():
+    manifest = interrupted_run()
+    RunManifest.create([{"id": "billing", "name": "Billing"}])  # A later run
+
+    resumed, scenarios = prepare_run(resume=manifest.run_id)
+
+    assert resumed.run_id == manifest.run_id
+    assert [s["id"] for s in scenarios] == ["refill_rx", "billing", "insurance"]
+    assert resumed.entry("billing")["call_id"] == "call-billing"
+
+
+def test_rerun_failed_reopens_the_latest_run():
+    manifest = interrupted_run()
+
+    resumed, scenarios = prepare_run(rerun_failed=True)
+
+    assert resumed.run_id == manifest.run_id
+    assert [s["id"] for s in scenarios] == ["refill_rx", "billing", "med_question", "insurance"]
+
+
+def test_resume_without_a_run():
+    with pytest.raises(RunNotFound):
+        prepare_run(rerun_failed=True)
+    with pytest.raises(RunNotFound):
+        prepare_run(resume="20261019_142500")
+    # Not a generated run id, so never looked up as a path
+    with pytest.raises(RunNotFound):
+        prepare_run(resume="../elsewhere")
+
+
+class FakeCallStore:
+    def __init__(self, transcripts: dict):
+        self.transcripts = transcripts
+
+    def transcript(self, call_id):
+        return self.transcripts.get(call_id)
+
+    def flush(self):
+        pass
+
+
+def test_resumed_run_reanalyzes_stored_calls_and_calls_the_rest(monkeypatch):
+    manifest = interrupted_run()
+    store = FakeCallStore({"call-billing": {"call_id": "call-billing", "turns": []}})
+    placed, analyzed = [], []
+
+    async def place_call(scenario, webhook_url, lifecycle):
+        placed.append(scenario["id"])
+        lifecycle["status"] = "completed"
+        return {"call_id": f"call-{scenario['id']}", "turns": []}
+
+    async def analyze_transcript(transcript, scenario):
+        analyzed.append(transcript["call_id"])
+        return {"report_path": None, "findings": [], "summary": "ok"}
+
+    monkeypatch.setattr(run_service, "get_call_store", lambda: store)
+    monkeypatch.setattr(run_service, "place_call", place_call)
+    monkeypatch.setattr(analysis_worker, "analyze_transcript", analyze_transcript)
+
+    resumed, scenarios = prepare_run(rerun_failed=True)
+    asyncio.run(run_sequential(resumed, scenarios, "https://example.test", 0))
+
+    # The call interrupted mid-analysis is not placed again
+    assert placed == ["refill_rx", "med_question", "insurance"]
+    assert sorted(analyzed) == sorted(f"call-{sid}" for sid in SCENARIO_IDS[1:])
+    reloaded = RunManifest.load(manifest.run_id)
+    assert reloaded.counts() == {DONE: len(SCENARIO_IDS)}
+    assert [reloaded.entry(sid)["attempts"] for sid in SCENARIO_IDS] == [1, 2, 1, 2, 1]